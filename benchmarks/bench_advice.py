@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark tra cứu lời khuyên gym: quét tuần tự dict advice_db (cách cũ, trả về
+section đầu tiên khớp) vs AdviceIndex (index từ khóa, trả về mọi section xếp hạng)
+
+Kho thật được nhân thêm các section tổng hợp để thấy độ trễ khi kho lên tới hàng
+nghìn mục.
+
+Chạy: poetry run python benchmarks/bench_advice.py --sections 5000
+"""
+
+import argparse
+import json
+import random
+import time
+
+from gym_agent_test.advice import ADVICE_PATH, AdviceIndex
+
+QUESTIONS = [
+    "muốn tăng cơ và giảm mỡ bụng",
+    "bài tập ngực cho người mới",
+    "tập chân và lưng, ăn gì để tăng sức mạnh",
+    "lịch tập cho dân văn phòng",
+    "xin chào",
+]
+REPEAT = 200
+
+
+def build_sections(count: int, seed: int = 42):
+    with open(ADVICE_PATH, encoding="utf-8") as f:
+        sections = json.load(f)["sections"]
+    rng = random.Random(seed)
+    syllables = ["ta", "bo", "ki", "mu", "ne", "lo", "xa", "vi", "du", "pha"]
+    topics = {section["topic"] for section in sections}
+    while len(sections) < count:
+        topic = " ".join("".join(rng.choices(syllables, k=3)) for _ in range(2))
+        if topic in topics:
+            continue
+        topics.add(topic)
+        sections.append(
+            {"topic": topic, "keywords": [topic], "advice": f"📌 Lời khuyên {topic}"}
+        )
+    return sections
+
+
+def legacy_answer(sections, question: str):
+    """Cách cũ: dựng lại dict mỗi lần gọi, quét tuần tự, section khớp đầu tiên"""
+    advice_db = {section["topic"]: section["advice"] for section in sections}
+    question_lower = question.lower()
+    for key, advice in advice_db.items():
+        if key in question_lower:
+            return advice
+    return None
+
+
+def timed(fn):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        for question in QUESTIONS:
+            fn(question)
+    return (time.perf_counter() - start) * 1e6 / (REPEAT * len(QUESTIONS))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sections", type=int, default=5000)
+    args = parser.parse_args()
+
+    sections = build_sections(args.sections)
+    start = time.perf_counter()
+    index = AdviceIndex(sections)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    print(f"📚 {len(sections)} section | dựng index: {build_ms:.1f} ms (một lần)")
+    print(f"    legacy | {timed(lambda q: legacy_answer(sections, q)):9.1f} µs/câu")
+    print(f"     index | {timed(index.search):9.1f} µs/câu")
+    for question in QUESTIONS[:3]:
+        topics = [section["topic"] for section in index.search(question)]
+        print(f"🔎 {question!r}: {topics}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark phân loại BMI cho roster hội viên: vòng lặp calc_bmi cũ (parse chuỗi +
+chuỗi if/elif cho từng người) vs classify_bmi (NumPy, np.digitize)
+
+Chạy: poetry run python benchmarks/bench_bmi.py --members 100000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from gym_agent_test.bmi import classify_bmi
+
+
+def legacy_calc_bmi(height_weight: str) -> str:
+    """Bản calc_bmi cũ được chép ở các entry point"""
+    try:
+        h, w = map(float, height_weight.split(","))
+        bmi = w / (h * h)
+        if bmi < 18.5:
+            status = "Thiếu cân"
+        elif bmi < 24.9:
+            status = "Bình thường"
+        elif bmi < 29.9:
+            status = "Thừa cân"
+        else:
+            status = "Béo phì"
+        return f"BMI = {bmi:.2f} → {status}"
+    except Exception:
+        return "Sai input! Hãy nhập theo định dạng: chiều_cao,cân_nặng (VD: 1.70,65)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--members", type=int, default=100000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    heights = rng.uniform(1.45, 2.0, args.members).round(2)
+    weights = rng.uniform(38, 130, args.members).round(1)
+
+    start = time.perf_counter()
+    legacy = [
+        legacy_calc_bmi(f"{h},{w}").split("→ ")[1]
+        for h, w in zip(heights.tolist(), weights.tolist())
+    ]
+    legacy_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    _, labels = classify_bmi(heights, weights)
+    vector_ms = (time.perf_counter() - start) * 1000
+
+    mismatches = sum(a != b for a, b in zip(legacy, labels.tolist()))
+    print(f"👥 {args.members} hội viên")
+    print(f"    legacy | {legacy_ms:8.1f} ms")
+    print(f"  digitize | {vector_ms:8.1f} ms ({legacy_ms / vector_ms:.0f}x)")
+    print(f"🔁 Khác biệt nhãn: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark kích thước history trong prompt theo số lượt hội thoại
+
+So sánh cách cũ (5 lượt thô gần nhất) với ConversationMemory (ngân sách token +
+tóm tắt nền). Dùng tóm tắt trích xuất nên không cần API key.
+
+Chạy: poetry run python benchmarks/bench_conversation_memory.py [--turns 200]
+"""
+
+import argparse
+import random
+
+from gym_agent_test.memory import ConversationMemory, estimate_tokens
+
+DISHES = ["Phở bò", "Bún chả", "Cơm tấm", "Gỏi cuốn", "Bánh mì", "Cháo gà"]
+INGREDIENTS = ["thịt bò", "bánh phở", "hành", "gừng", "quế", "hồi", "rau thơm"]
+
+
+def make_turn(i: int, rng: random.Random):
+    """Sinh một lượt hỏi đáp kiểu GraphRAG với danh sách nguyên liệu dài"""
+    dish = rng.choice(DISHES)
+    ingredient_lines = [
+        f"- {rng.choice(INGREDIENTS)} ({rng.randint(5, 200)}g; lợi ích: tăng cơ, "
+        "phục hồi, tốt cho tim mạch, bổ sung sắt)"
+        for _ in range(rng.randint(5, 20))
+    ]
+    answer = "\n\n".join(
+        [
+            f"🍜 **{dish}** phù hợp với mục tiêu của bạn!",
+            f"📊 Calories: {rng.randint(300, 700)} kcal | Protein: {rng.randint(10, 40)}g",
+            "🥬 Nguyên liệu:\n" + "\n".join(ingredient_lines),
+            "💡 Lời khuyên: ăn kèm rau xanh, hạn chế nước dùng nhiều muối. " * 3,
+        ]
+    )
+    return f"Câu hỏi {i}: {dish} có phù hợp tập gym không?", answer
+
+
+def legacy_tokens(history, user_input: str) -> int:
+    """Cách cũ: 5 cặp (user, assistant) thô gần nhất"""
+    return estimate_tokens(user_input) + sum(
+        estimate_tokens(u) + estimate_tokens(a) for u, a in history[-5:]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    memory = ConversationMemory()
+    history = []
+    print(f"{'turn':>6} | {'legacy (tokens)':>16} | {'memory (tokens)':>16}")
+    print("-" * 44)
+    for i in range(1, args.turns + 1):
+        user_msg, ai_msg = make_turn(i, rng)
+        legacy = legacy_tokens(history, user_msg)
+        memory.messages(user_msg)
+        if i == 1 or i % max(args.turns // 10, 1) == 0:
+            print(f"{i:>6} | {legacy:>16} | {memory.last_prompt_tokens:>16}")
+        history.append((user_msg, ai_msg))
+        memory.add_turn(user_msg, ai_msg)
+        memory.wait_idle()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Benchmark truy vấn món theo nguyên liệu: bản một pha cũ và bản hai pha
+
+Bản cũ mở rộng benefit của nguyên liệu cho mọi món khớp (một lần cho nguyên liệu
+khớp, một lần cho toàn bộ nguyên liệu) rồi mới LIMIT; bản hai pha xếp hạng món
+theo match_count, LIMIT k rồi chỉ hydrate k món.
+
+- offline (mặc định): đếm số dòng trung gian mỗi plan sinh ra trên
+  FakeGraph.synthetic với các kích thước catalog và k khác nhau. Pha xếp hạng vẫn
+  quét cạnh CONTAINS của nguyên liệu khớp (tăng theo catalog nhưng không mở
+  rộng benefit); phần hydrate chỉ phụ thuộc k.
+- --live: nạp catalog tổng hợp vào Neo4j (gắn thuộc tính bench_run, xoá sau khi
+  chạy), chạy cả hai Cypher với PROFILE và so db hits, thời gian.
+
+Chạy: poetry run python benchmarks/bench_ingredient_query.py --sizes 500,2000,8000
+"""
+
+import argparse
+import time
+import uuid
+
+import numpy as np
+
+from gym_agent_test.fakes import FakeGraph
+from gym_agent_test.graph_queries import DISHES_BY_INGREDIENTS
+from gym_agent_test.query_profile import profile_stats
+
+# Cypher trước khi tách hai pha, giữ lại để so sánh
+LEGACY_DISHES_BY_INGREDIENTS = """
+    MATCH (d:Dish)-[rel:CONTAINS]->(i:Ingredient)
+    WHERE toLower(i.name) IN $ingredient_names
+    OPTIONAL MATCH (i)-[:PROVIDES_BENEFIT]->(ib:Benefit)
+    WITH d, rel, i, collect(DISTINCT ib.name) AS ingredient_benefits
+    WITH d,
+         collect(
+             DISTINCT {
+                 name: i.name,
+                 quantity: rel.quantity_g,
+                 benefits: ingredient_benefits
+             }
+         ) AS matched_ingredients,
+         count(DISTINCT i) AS match_count
+    OPTIONAL MATCH (d)-[rel_all:CONTAINS]->(all_i:Ingredient)
+    OPTIONAL MATCH (all_i)-[:PROVIDES_BENEFIT]->(all_ib:Benefit)
+    WITH d, matched_ingredients, match_count, rel_all, all_i,
+         collect(DISTINCT all_ib.name) AS all_ingredient_benefits
+    WITH d, matched_ingredients, match_count,
+         collect(
+             DISTINCT {
+                 name: all_i.name,
+                 quantity: rel_all.quantity_g,
+                 benefits: all_ingredient_benefits
+             }
+         ) AS ingredients
+    OPTIONAL MATCH (d)-[:HAS_BENEFIT]->(b:Benefit)
+    RETURN d.name AS dish_name,
+           d.calories AS calories,
+           d.protein_g AS protein,
+           d.carbs_g AS carbs,
+           d.fat_g AS fat,
+           matched_ingredients,
+           ingredients,
+           collect(DISTINCT b.name) AS benefits,
+           match_count
+    ORDER BY match_count DESC, d.calories ASC
+    LIMIT $limit
+"""
+
+DEFAULT_INGREDIENTS = "thịt gà,gừng"
+# Tên nút tổng hợp có hậu tố riêng để không khớp dữ liệu thật trong database
+BENCH_SUFFIX = " #bench"
+BATCH_SIZE = 1000
+
+
+# --- offline: mô hình số dòng trung gian ---
+
+
+def plan_rows(graph: FakeGraph, ingredient_names, k: int) -> dict:
+    """Số dòng mỗi plan sinh ra (OPTIONAL MATCH không khớp vẫn giữ 1 dòng)"""
+    wanted = set(ingredient_names)
+
+    def benefit_rows(name: str) -> int:
+        return max(1, len(graph.ingredients.get(name, ((), []))[1]))
+
+    def hydrate_rows(dish) -> int:
+        rows = sum(benefit_rows(name) for name, _ in dish["ingredients"])
+        return rows + max(1, len(dish["benefits"]))
+
+    matched = []
+    for dish in graph.dishes:
+        names = [name for name, _ in dish["ingredients"] if name.lower() in wanted]
+        if names:
+            matched.append((dish, names))
+
+    legacy = sum(
+        sum(benefit_rows(name) for name in names) + hydrate_rows(dish)
+        for dish, names in matched
+    )
+    ranked = sorted(matched, key=lambda item: (-len(item[1]), item[0]["calories"]))
+    rank_rows = sum(len(names) for _, names in matched)
+    hydrate = sum(hydrate_rows(dish) for dish, _ in ranked[:k])
+    return {
+        "matched_dishes": len(matched),
+        "legacy": legacy,
+        "rank": rank_rows,
+        "hydrate": hydrate,
+        "two_phase": rank_rows + hydrate,
+    }
+
+
+def run_offline(args, names):
+    print(f"🧮 Mô hình số dòng trung gian | nguyên liệu: {', '.join(names)}")
+    print(
+        f"{'món':>7s} {'k':>4s} {'khớp':>6s} {'một pha':>9s} "
+        f"{'xếp hạng':>9s} {'hydrate':>8s} {'hai pha':>9s} {'giảm':>6s}"
+    )
+    for size in args.sizes:
+        graph = FakeGraph.synthetic(size, args.seed)
+        for k in args.k:
+            rows = plan_rows(graph, names, k)
+            print(
+                f"{size:7d} {k:4d} {rows['matched_dishes']:6d} {rows['legacy']:9d} "
+                f"{rows['rank']:9d} {rows['hydrate']:8d} {rows['two_phase']:9d} "
+                f"{rows['legacy'] / max(rows['two_phase'], 1):5.1f}x"
+            )
+
+
+# --- live: PROFILE trên Neo4j ---
+
+
+def load_catalog(session, graph: FakeGraph, run_id: str, start: int, stop: int):
+    """Nạp graph.dishes[start:stop] (tên có hậu tố BENCH_SUFFIX); start=0 nạp cả
+    nguyên liệu"""
+    if start == 0:
+        session.run(
+            """
+            UNWIND $rows AS row
+            CREATE (i:Ingredient {name: row.name, bench_run: $run_id})
+            WITH i, row
+            UNWIND row.benefits AS benefit
+            MERGE (b:Benefit {name: benefit, bench_run: $run_id})
+            CREATE (i)-[:PROVIDES_BENEFIT]->(b)
+            """,
+            rows=[
+                {
+                    "name": name + BENCH_SUFFIX,
+                    "benefits": [b + BENCH_SUFFIX for b in benefits],
+                }
+                for name, (_, benefits) in graph.ingredients.items()
+            ],
+            run_id=run_id,
+        ).consume()
+
+    dishes = graph.dishes[start:stop]
+    for offset in range(0, len(dishes), BATCH_SIZE):
+        rows = [
+            {
+                "name": dish["name"] + BENCH_SUFFIX,
+                "calories": dish["calories"],
+                "protein_g": dish["protein_g"],
+                "carbs_g": dish["carbs_g"],
+                "fat_g": dish["fat_g"],
+                "uses": [
+                    {"name": name + BENCH_SUFFIX, "quantity": quantity}
+                    for name, quantity in dish["ingredients"]
+                ],
+                "benefits": [b + BENCH_SUFFIX for b in dish["benefits"]],
+            }
+            for dish in dishes[offset : offset + BATCH_SIZE]
+        ]
+        session.run(
+            """
+            UNWIND $rows AS row
+            CREATE (d:Dish {name: row.name, calories: row.calories,
+                            protein_g: row.protein_g, carbs_g: row.carbs_g,
+                            fat_g: row.fat_g, bench_run: $run_id})
+            WITH d, row
+            CALL {
+                WITH d, row
+                UNWIND row.uses AS use
+                MATCH (i:Ingredient {name: use.name, bench_run: $run_id})
+                CREATE (d)-[:CONTAINS {quantity_g: use.quantity}]->(i)
+            }
+            CALL {
+                WITH d, row
+                UNWIND row.benefits AS benefit
+                MERGE (b:Benefit {name: benefit, bench_run: $run_id})
+                CREATE (d)-[:HAS_BENEFIT]->(b)
+            }
+            """,
+            rows=rows,
+            run_id=run_id,
+        ).consume()
+
+
+def profile_query(session, cypher: str, params: dict, repeat: int) -> dict:
+    timings = []
+    db_hits = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = session.run(f"PROFILE {cypher}", params)
+        rows = len(list(result))
+        summary = result.consume()
+        timings.append((time.perf_counter() - start) * 1000)
+        db_hits = profile_stats(summary.profile).get("db_hits", 0)
+    return {"db_hits": db_hits, "p50_ms": float(np.median(timings)), "rows": rows}
+
+
+def run_live(args, names):
+    from neo4j import GraphDatabase
+
+    import gym_agent_test.main_RAG_Graph as agent
+
+    driver = GraphDatabase.driver(
+        agent.neo4j_uri, auth=(agent.neo4j_user, agent.neo4j_password)
+    )
+    run_id = uuid.uuid4().hex[:8]
+    graph = FakeGraph.synthetic(max(args.sizes), args.seed)
+    params = {"ingredient_names": [name + BENCH_SUFFIX for name in names]}
+    print(f"🔗 Neo4j live | bench_run={run_id} | nguyên liệu: {', '.join(names)}")
+    print(
+        f"{'món':>7s} {'k':>4s} {'db hits một pha':>16s} {'db hits hai pha':>16s} "
+        f"{'ms một pha':>11s} {'ms hai pha':>11s}"
+    )
+    loaded = 0
+    try:
+        with driver.session(database=agent.neo4j_database) as session:
+            for size in sorted(args.sizes):
+                load_catalog(session, graph, run_id, loaded, size)
+                loaded = size
+                for k in args.k:
+                    query_params = {**params, "limit": k}
+                    legacy = profile_query(
+                        session, LEGACY_DISHES_BY_INGREDIENTS, query_params, args.repeat
+                    )
+                    two_phase = profile_query(
+                        session, DISHES_BY_INGREDIENTS, query_params, args.repeat
+                    )
+                    print(
+                        f"{size:7d} {k:4d} {legacy['db_hits']:16d} "
+                        f"{two_phase['db_hits']:16d} {legacy['p50_ms']:11.1f} "
+                        f"{two_phase['p50_ms']:11.1f}"
+                    )
+    finally:
+        # Xoá dữ liệu tổng hợp của lần chạy này
+        with driver.session(database=agent.neo4j_database) as session:
+            session.run(
+                "MATCH (n) WHERE n.bench_run = $run_id DETACH DELETE n",
+                run_id=run_id,
+            ).consume()
+        driver.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="500,2000,8000")
+    parser.add_argument("--k", default="5,20")
+    parser.add_argument("--ingredients", default=DEFAULT_INGREDIENTS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--live", action="store_true", help="PROFILE trên Neo4j thật")
+    args = parser.parse_args()
+    args.sizes = [int(size) for size in args.sizes.split(",")]
+    args.k = [int(k) for k in args.k.split(",")]
+    names = [name.strip().lower() for name in args.ingredients.split(",")]
+
+    if args.live:
+        run_live(args, names)
+    else:
+        run_offline(args, names)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark phân loại intent: chuỗi any(keyword in text) cũ vs IntentClassifier
+
+Đo độ chính xác (exact match, precision/recall theo nhãn) trên tập câu hỏi tiếng
+Việt có nhãn và latency trung bình mỗi câu.
+
+Chạy: poetry run python benchmarks/bench_intents.py
+"""
+
+import time
+
+from gym_agent_test.intents import INTENT_KEYWORDS, SLOT_KEYWORDS, classify
+
+# (câu hỏi, nhãn đúng) - nhãn slot có dạng "goals:tăng cơ", "injuries:gối"...
+LABELED_QUERIES = [
+    ("Tính BMI 1.75,70", {"bmi"}),
+    ("chỉ số bmi của tôi là bao nhiêu nếu cao 1m70 nặng 65kg", {"bmi"}),
+    ("tôi muốn tăng cơ bắp", {"gym_advice", "goals:tăng cơ"}),
+    ("gợi ý bài tập ngực cho người mới", {"gym_advice"}),
+    ("bài tập giảm cân hiệu quả", {"gym_advice", "goals:giảm cân"}),
+    ("tôi bị đau gối nên tập gì", {"gym_advice", "injuries:gối"}),
+    ("chấn thương vai có nên đi gym không", {"gym_advice", "injuries:vai"}),
+    ("đau cổ tay khi đẩy ngực", {"injuries:cổ tay"}),
+    ("lưng bị đau sau khi deadlift", {"injuries:lưng"}),
+    ("tôi đau chân quá", {"injuries:chân"}),
+    ("muốn tăng sức mạnh squat", {"goals:tăng sức mạnh"}),
+    ("làm sao giữ dáng sau tết", {"goals:giữ dáng"}),
+    ("món nào nhiều protein cao", {"benefits:tăng cơ"}),
+    ("món ăn tốt cho tim mạch", {"benefits:tim mạch"}),
+    ("món gì giúp tăng miễn dịch", {"benefits:miễn dịch"}),
+    ("đồ uống pre-workout tăng năng lượng", {"benefits:năng lượng"}),
+    ("món dễ tiêu cho người đau dạ dày", {"benefits:tiêu hóa"}),
+    ("món nhiều collagen tốt cho khớp", {"benefits:khớp"}),
+    ("món ít calories nhiều rau xanh", {"benefits:giảm cân"}),
+    ("chế độ dinh dưỡng cho người gầy", {"gym_advice", "goals:giảm cân"}),
+    ("phở bò có bao nhiêu calories", set()),
+    ("xin chào", set()),
+    ("cảm ơn bạn nhiều", set()),
+    ("I want to build muscle", {"goals:tăng cơ"}),
+    ("knee pain when running", {"injuries:gối"}),
+    ("shoulder pain after bench press", {"injuries:vai"}),
+    ("lose weight fast", {"goals:giảm cân"}),
+    (
+        "tôi cao 1m75 nặng 70kg muốn tăng cơ, bị đau lưng",
+        {"gym_advice", "goals:tăng cơ", "injuries:lưng"},
+    ),
+    ("duy trì cân nặng hiện tại", {"bmi", "goals:giữ dáng"}),
+    ("lịch tập 3 buổi một tuần", {"gym_advice"}),
+]
+
+REPEAT = 2000
+
+
+def legacy_labels(text: str):
+    """Cách cũ: một chuỗi any() cho mỗi nhãn, lowercase lại ở mỗi lần kiểm tra"""
+    labels = set()
+    for intent, keywords in INTENT_KEYWORDS.items():
+        if any(keyword in text.lower() for keyword in keywords):
+            labels.add(intent)
+    for slot, values in SLOT_KEYWORDS.items():
+        for value, keywords in values.items():
+            if any(keyword in text.lower() for keyword in keywords):
+                labels.add(f"{slot}:{value}")
+    return labels
+
+
+def classifier_labels(text: str):
+    result = classify(text)
+    labels = set(result["intents"])
+    for slot in SLOT_KEYWORDS:
+        labels.update(f"{slot}:{value}" for value in result[slot])
+    return labels
+
+
+def evaluate(name, predict):
+    tp = fp = fn = exact = 0
+    for text, expected in LABELED_QUERIES:
+        predicted = predict(text)
+        exact += predicted == expected
+        tp += len(predicted & expected)
+        fp += len(predicted - expected)
+        fn += len(expected - predicted)
+
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        for text, _ in LABELED_QUERIES:
+            predict(text)
+    latency_us = (time.perf_counter() - start) * 1e6 / (REPEAT * len(LABELED_QUERIES))
+
+    print(
+        f"{name:>10} | exact: {exact / len(LABELED_QUERIES):.3f} | "
+        f"precision: {tp / max(tp + fp, 1):.3f} | recall: {tp / max(tp + fn, 1):.3f} | "
+        f"{latency_us:.2f} µs/câu"
+    )
+
+
+def main():
+    print(f"📚 {len(LABELED_QUERIES)} câu hỏi có nhãn")
+    evaluate("any()", legacy_labels)
+    evaluate("classifier", classifier_labels)
+    mismatches = [
+        text
+        for text, _ in LABELED_QUERIES
+        if legacy_labels(text) != classifier_labels(text)
+    ]
+    print(f"🔁 Khác biệt giữa hai cách: {len(mismatches)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark lập thực đơn (gym_agent_test.meal_plan) trên catalog món ăn giả
+
+Chạy: poetry run python benchmarks/bench_meal_plan.py
+"""
+
+import time
+
+import numpy as np
+
+from gym_agent_test.meal_plan import DishCatalog, plan_day, plan_week
+
+SIZES = [100, 1_000, 10_000]
+REPEAT = 10
+BUDGET_MS = 100
+
+
+def make_catalog(n: int, seed: int = 7) -> DishCatalog:
+    """Sinh catalog n món với macro ngẫu nhiên"""
+    rng = np.random.default_rng(seed)
+    matrix = np.column_stack(
+        [
+            rng.uniform(30, 800, n),
+            rng.uniform(0, 50, n),
+            rng.uniform(0, 100, n),
+            rng.uniform(0, 35, n),
+        ]
+    )
+    ingredients = [["thịt bò"] if i % 7 == 0 else ["rau"] for i in range(n)]
+    return DishCatalog([f"Món {i}" for i in range(n)], matrix, ingredients)
+
+
+def timed(fn, repeat: int = REPEAT):
+    """Trả về (thời gian trung bình ms, kết quả lần cuối)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) * 1000 / repeat, result
+
+
+def main():
+    print(f"{'n':>7} | {'solver':>6} | {'day (ms)':>9} | {'week (ms)':>10} | totals")
+    print("-" * 80)
+    for n in SIZES:
+        catalog = make_catalog(n)
+        for solver in ("local", "milp"):
+            day_ms, plan = timed(
+                lambda: plan_day(
+                    catalog, 2200, protein=150, exclude=["bò"], solver=solver
+                )
+            )
+            week_ms, _ = timed(
+                lambda: plan_week(catalog, 2200, protein=150, solver=solver),
+                repeat=2,
+            )
+            flag = "✅" if day_ms < BUDGET_MS else "❌"
+            print(
+                f"{n:>7} | {solver:>6} | {day_ms:>9.2f} | {week_ms:>10.2f} | "
+                f"{plan['totals']} {flag}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Đo bộ nhớ của món ăn cache và của mỗi phiên: dict cũ và models có __slots__
+
+- món: dựng các dòng từ Dish.summary của FakeGraph.synthetic (json.loads tạo
+  chuỗi mới cho từng món, giống driver Neo4j) theo hai cách: dict lồng dict như
+  trước và models.Dish/IngredientUse/Benefit qua result_rows.
+- phiên: profile dict so với models.UserProfile, và toàn bộ ChatSession rỗng.
+
+Số byte là bộ nhớ còn giữ lại (tracemalloc) chia cho số món/phiên.
+
+Chạy: poetry run python benchmarks/bench_memory.py --dishes 2000 --sessions 5000
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+from gym_agent_test.dish_summary import build_summary, parse_summary
+from gym_agent_test.fakes import FakeGraph
+from gym_agent_test.models import UserProfile
+from gym_agent_test.result_rows import map_rows
+from gym_agent_test.session import ChatSession
+
+
+def legacy_dish(record) -> dict:
+    """Dòng món dạng dict như trước khi có models"""
+    return {
+        "type": "dish",
+        "name": record["dish_name"],
+        "calories": record["calories"],
+        "protein": record["protein"],
+        "carbs": record["carbs"],
+        "fat": record["fat"],
+        **parse_summary(record["summary"]),
+    }
+
+
+def legacy_profile() -> dict:
+    return {
+        "height": None,
+        "weight": None,
+        "bmi": None,
+        "goals": [],
+        "preferences": [],
+        "name": None,
+        "injuries": [],
+    }
+
+
+def fill_profile(profile):
+    profile["height"] = 1.72
+    profile["weight"] = 68.0
+    profile["bmi"] = 68.0 / (1.72 * 1.72)
+    profile["goals"].append("tăng cơ")
+    profile["injuries"].append("đau gối")
+    return profile
+
+
+def retained(build, count: int) -> float:
+    """Số byte còn giữ lại trung bình trên mỗi phần tử do build() tạo ra"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        items = build()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del items
+    return (after - before) / count
+
+
+def summary_records(dish_count: int, seed: int) -> list:
+    graph = FakeGraph.synthetic(dish_count, seed)
+    return [
+        {
+            "dish_name": dish["name"],
+            "calories": dish["calories"],
+            "protein": dish["protein_g"],
+            "carbs": dish["carbs_g"],
+            "fat": dish["fat_g"],
+            "summary": build_summary(
+                source["cuisine"], source["ingredients"], source["benefits"]
+            ),
+        }
+        for dish, source in zip(graph.dishes, graph.dish_summary_source())
+    ]
+
+
+def report(title: str, before: float, after: float):
+    print(
+        f"{title:28s} {before:10.0f} {after:10.0f} "
+        f"{(1 - after / before) * 100:7.1f}%"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dishes", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    records = summary_records(args.dishes, args.seed)
+    sessions = range(args.sessions)
+    print(f"🧠 Bộ nhớ giữ lại | {args.dishes} món, {args.sessions} phiên")
+    print(f"{'':28s} {'dict (B)':>10s} {'slots (B)':>10s} {'giảm':>8s}")
+    report(
+        "mỗi món cache",
+        retained(lambda: [legacy_dish(r) for r in records], len(records)),
+        retained(lambda: map_rows("dish_summary_by_name", records), len(records)),
+    )
+    report(
+        "profile rỗng",
+        retained(lambda: [legacy_profile() for _ in sessions], args.sessions),
+        retained(lambda: [UserProfile() for _ in sessions], args.sessions),
+    )
+    report(
+        "profile đã điền",
+        retained(
+            lambda: [fill_profile(legacy_profile()) for _ in sessions], args.sessions
+        ),
+        retained(
+            lambda: [fill_profile(UserProfile()) for _ in sessions], args.sessions
+        ),
+    )
+    per_session = retained(
+        lambda: [ChatSession(f"user-{i}", log_dir=None) for i in sessions],
+        args.sessions,
+    )
+    print(f"{'mỗi ChatSession rỗng':28s} {'':10s} {per_session:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
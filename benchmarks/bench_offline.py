@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark end-to-end offline: throughput và độ trễ một lượt hội thoại GraphRAG
+
+Agent thật (AgentExecutor, tools, fast path, memory) chạy trên các bản giả lập
+trong gym_agent_test.fakes: FakeChatModel, FakeGraphDriver và FakeEmbeddings,
+với độ trễ lognormal cấu hình được. Không cần API key hay Neo4j, nên đo được
+chi phí của chính code ứng dụng và ảnh hưởng của độ trễ đuôi khi chạy đồng thời.
+
+Chạy: poetry run python benchmarks/bench_offline.py --turns 200 --concurrency 1,8
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from rich.console import Console
+
+import gym_agent_test.main_RAG_Graph as graph_agent
+from gym_agent_test.fakes import (
+    FakeChatModel,
+    FakeEmbeddings,
+    FakeGraph,
+    FakeGraphDriver,
+    Latency,
+)
+from gym_agent_test.memory import llm_summarizer
+from gym_agent_test.session import ChatSession, use_session
+
+QUERIES = [
+    "Phở bò có bao nhiêu calories?",
+    "Tôi cao 1m75 nặng 70kg, BMI của tôi thế nào?",
+    "Món nào nhiều protein cao để tăng cơ?",
+    "Tôi có thịt gà và gừng, nấu món gì?",
+    "Gợi ý món ăn ít calories để giảm cân",
+    "Lên thực đơn 2000 calo cho ngày mai",
+    "Tôi bị đau vai, nên tập gì?",
+    "Món nào khoảng 300 cal?",
+    "Nguyên liệu tôm có bao nhiêu protein?",
+    "Xin chào, bạn là ai?",
+]
+
+
+def percentiles(samples) -> str:
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000
+    return f"p50 {p50:7.1f} | p95 {p95:7.1f} | p99 {p99:7.1f} ms"
+
+
+def run_turns(agent_executor, llm, turns: int, concurrency: int):
+    """Chạy turns lượt chia đều cho concurrency phiên, trả về (thời gian, độ trễ)"""
+    summarizer = llm_summarizer(llm)
+    sessions = [
+        ChatSession(f"bench-{i}", summarizer=summarizer, log_dir="")
+        for i in range(concurrency)
+    ]
+
+    def worker(index: int):
+        latencies = []
+        with use_session(sessions[index]):
+            for turn in range(index, turns, concurrency):
+                start = time.perf_counter()
+                graph_agent.respond(
+                    agent_executor,
+                    llm,
+                    QUERIES[turn % len(QUERIES)],
+                    show_progress=False,
+                )
+                latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(worker, range(concurrency)))
+    return time.perf_counter() - start, [x for latencies in results for x in latencies]
+
+
+def bench_vector_rag(embed_latency: Latency):
+    """main_RAG: dựng Chroma với FakeEmbeddings và đo một lượt truy hồi"""
+    import gym_agent_test.main_RAG as vector_agent
+
+    vector_agent.console = Console(quiet=True)
+    embeddings = FakeEmbeddings(latency=embed_latency)
+    start = time.perf_counter()
+    if not vector_agent.initialize_rag(embeddings):
+        print("⚠️ Không khởi tạo được main_RAG (thiếu chromadb?)")
+        return
+    build_ms = (time.perf_counter() - start) * 1000
+
+    latencies = []
+    for query in QUERIES:
+        start = time.perf_counter()
+        vector_agent.nutrition_advisor_rag.func(query)
+        latencies.append(time.perf_counter() - start)
+    print(
+        f"🧮 main_RAG | dựng index {build_ms:.0f} ms "
+        f"({embeddings.calls} lần embed) | tra cứu {percentiles(latencies)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--concurrency", default="1,8")
+    parser.add_argument("--dishes", type=int, default=500)
+    parser.add_argument("--llm-ms", type=float, default=300.0)
+    parser.add_argument("--llm-sigma", type=float, default=0.5)
+    parser.add_argument("--graph-ms", type=float, default=5.0)
+    parser.add_argument("--graph-sigma", type=float, default=0.5)
+    parser.add_argument("--embed-ms", type=float, default=80.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Log của tool/agent làm nhiễu kết quả đo
+    graph_agent.console = Console(quiet=True)
+    driver = FakeGraphDriver(
+        FakeGraph.synthetic(args.dishes, args.seed),
+        Latency(args.graph_ms, args.graph_sigma, args.seed),
+    )
+    graph_agent.initialize_rag(driver)
+    llm = FakeChatModel(latency=Latency(args.llm_ms, args.llm_sigma, args.seed))
+    agent_executor = graph_agent.create_agent(llm)
+
+    print(
+        f"🤖 LLM ~{args.llm_ms:.0f} ms (σ={args.llm_sigma}) | "
+        f"Neo4j ~{args.graph_ms:.0f} ms | {args.dishes} món"
+    )
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        elapsed, latencies = run_turns(agent_executor, llm, args.turns, concurrency)
+        print(
+            f"⚡ {concurrency:3d} phiên | {len(latencies) / elapsed:7.1f} lượt/s | "
+            f"{percentiles(latencies)}"
+        )
+    print(f"🔗 Truy vấn graph: {dict(sorted(driver.queries.items()))}")
+
+    bench_vector_rag(Latency(args.embed_ms, 0.3, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Benchmark độ trễ end-to-end theo từng giai đoạn của một lượt hội thoại
+
+Phát lại corpus câu hỏi tiếng Việt (benchmarks/data/corpus_vi.json) qua pipeline
+của từng entry point (graph = main_RAG_Graph, vector = main_RAG):
+
+- routing:    fast path theo luật (BMI, dinh dưỡng một món)
+- profile:    trích chiều cao, cân nặng, mục tiêu, chấn thương
+- planning:   các lần gọi LLM của agent
+- tool:<tên>: từng tool (nutrition_advisor_rag, exercise_advisor_rag, calc_bmi...)
+- formatting: phần còn lại (dựng prompt, history, parse output, lưu lượt)
+
+In p50/p95/p99 mỗi giai đoạn và token mỗi lượt, lưu JSON vào
+benchmarks/results/<commit>-<entry>.json để so sánh giữa các commit (--compare).
+Mặc định dùng gym_agent_test.fakes (offline, độ trễ 0 để đo riêng chi phí code);
+--live dùng Gemini và Neo4j thật.
+
+Chạy: poetry run python benchmarks/bench_pipeline.py --entry graph --repeat 5
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from langchain_core.callbacks import BaseCallbackHandler
+from rich.console import Console
+
+from gym_agent_test.fakes import (
+    FakeChatModel,
+    FakeEmbeddings,
+    FakeGraph,
+    FakeGraphDriver,
+    Latency,
+)
+from gym_agent_test.profile import new_user_profile
+from gym_agent_test.session import ChatSession, use_session
+
+BENCH_DIR = Path(__file__).parent
+CORPUS_PATH = BENCH_DIR / "data" / "corpus_vi.json"
+RESULTS_DIR = BENCH_DIR / "results"
+FIXED_STAGES = ("routing", "profile", "planning")
+
+
+class StageTimer(BaseCallbackHandler):
+    """Cộng dồn thời gian theo giai đoạn cho lượt đang chạy
+
+    Hàm của pipeline được bọc qua wrap(); LLM và tool đo qua callback của
+    LangChain (gắn vào model và từng tool của agent).
+    """
+
+    def __init__(self):
+        self.turns = []
+        self._stages = {}
+        self._tokens = {"input": 0, "output": 0}
+        self._starts = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self._stages[stage] = self._stages.get(stage, 0.0) + seconds
+
+    def wrap(self, module, name: str, stage: str):
+        original = getattr(module, name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+
+        setattr(module, name, timed)
+
+    def run_turn(self, turn):
+        """Chạy turn() và ghi lại thời gian từng giai đoạn của lượt"""
+        self._stages, self._tokens = {}, {"input": 0, "output": 0}
+        start = time.perf_counter()
+        turn()
+        total = time.perf_counter() - start
+        stages = dict(self._stages)
+        stages["formatting"] = max(0.0, total - sum(stages.values()))
+        stages["total"] = total
+        self.turns.append({"stages": stages, "tokens": dict(self._tokens)})
+
+    # --- callback LangChain ---
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._starts[run_id] = ("planning", time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        stage, start = self._starts.pop(run_id, (None, None))
+        if stage:
+            self.add(stage, time.perf_counter() - start)
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(generation.message, "usage_metadata", None) or {}
+                self._tokens["input"] += usage.get("input_tokens", 0)
+                self._tokens["output"] += usage.get("output_tokens", 0)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        stage, start = self._starts.pop(run_id, (None, None))
+        if stage:
+            self.add(stage, time.perf_counter() - start)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name", "tool")
+        self._starts[run_id] = (f"tool:{name}", time.perf_counter())
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        stage, start = self._starts.pop(run_id, (None, None))
+        if stage:
+            self.add(stage, time.perf_counter() - start)
+
+    on_tool_error = on_llm_error
+
+
+def attach(timer: StageTimer, llm, agent_executor):
+    llm.callbacks = [*(llm.callbacks or []), timer]
+    for tool in getattr(agent_executor, "tools", []) if agent_executor else []:
+        tool.callbacks = [*(tool.callbacks or []), timer]
+
+
+def make_llm(args):
+    if args.live:
+        from gym_agent_test.llm_client import get_llm
+
+        return get_llm()
+    return FakeChatModel(latency=Latency(args.llm_ms, args.llm_sigma, args.seed))
+
+
+def graph_pipeline(args, timer: StageTimer):
+    """main_RAG_Graph: chạy nguyên respond() của entry point"""
+    import gym_agent_test.main_RAG_Graph as agent
+
+    agent.console = Console(quiet=True)
+    driver = None
+    if not args.live:
+        driver = FakeGraphDriver(
+            FakeGraph.synthetic(args.dishes, args.seed),
+            Latency(args.graph_ms, args.graph_sigma, args.seed),
+        )
+    agent.initialize_rag(driver)
+    llm = make_llm(args)
+    agent_executor = agent.create_agent(llm)
+    attach(timer, llm, agent_executor)
+    timer.wrap(agent, "fast_path_answer", "routing")
+    timer.wrap(agent, "extract_user_info", "profile")
+
+    def conversation(queries):
+        session = ChatSession("bench", log_dir="")
+        with use_session(session):
+            for query in queries:
+                timer.run_turn(
+                    lambda: agent.respond(
+                        agent_executor, llm, query, show_progress=False
+                    )
+                )
+
+    return conversation
+
+
+def vector_pipeline(args, timer: StageTimer):
+    """main_RAG: các bước của một lượt trong chat_loop, bỏ phần hiển thị"""
+    import gym_agent_test.main_RAG as agent
+
+    agent.console = Console(quiet=True)
+    embeddings = None
+    if not args.live:
+        embeddings = FakeEmbeddings(latency=Latency(args.embed_ms, 0.3, args.seed))
+    agent.initialize_rag(embeddings)
+    llm = make_llm(args)
+    agent_executor = agent.create_agent(llm)
+    attach(timer, llm, agent_executor)
+    timer.wrap(agent, "fast_path_answer", "routing")
+    timer.wrap(agent, "extract_user_info", "profile")
+
+    def turn(query):
+        agent.extract_user_info(query)
+        response = agent.fast_path_answer(query)
+        if response is None:
+            agent_input = {
+                "input": query,
+                "chat_history": agent.format_chat_history_for_agent(),
+                "user_profile": agent.format_user_profile(agent.user_profile),
+            }
+            response = agent_executor.invoke(agent_input)["output"]
+        agent.conversation_history.append(query, response)
+
+    def conversation(queries):
+        agent.conversation_history.clear()
+        agent.user_profile.clear()
+        agent.user_profile.update(new_user_profile())
+        for query in queries:
+            timer.run_turn(lambda: turn(query))
+
+    return conversation
+
+
+PIPELINES = {"graph": graph_pipeline, "vector": vector_pipeline}
+
+
+def summarize(turns) -> dict:
+    """p50/p95/p99 (ms) theo giai đoạn, tính trên các lượt có giai đoạn đó"""
+    names = {stage for turn in turns for stage in turn["stages"]}
+    stages = {}
+    for stage in sorted(names, key=lambda s: (s == "total", s not in FIXED_STAGES, s)):
+        samples = np.array([t["stages"][stage] for t in turns if stage in t["stages"]])
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000
+        stages[stage] = {
+            "count": len(samples),
+            "mean_ms": round(samples.mean() * 1000, 3),
+            "p50_ms": round(p50, 3),
+            "p95_ms": round(p95, 3),
+            "p99_ms": round(p99, 3),
+        }
+    tokens = {
+        key: round(float(np.mean([t["tokens"][key] for t in turns])), 1)
+        for key in ("input", "output")
+    }
+    return {"turns": len(turns), "stages": stages, "tokens_per_turn": tokens}
+
+
+def git_revision() -> str:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=BENCH_DIR,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            cwd=BENCH_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def print_report(result: dict, baseline=None):
+    base_stages = (baseline or {}).get("stages", {})
+    print(f"{'giai đoạn':28s} {'n':>5s} {'p50':>9s} {'p95':>9s} {'p99':>9s}  (ms)")
+    for stage, stats in result["stages"].items():
+        line = (
+            f"{stage:28s} {stats['count']:5d} {stats['p50_ms']:9.2f} "
+            f"{stats['p95_ms']:9.2f} {stats['p99_ms']:9.2f}"
+        )
+        if stage in base_stages and base_stages[stage]["p95_ms"]:
+            change = stats["p95_ms"] / base_stages[stage]["p95_ms"] - 1
+            line += f"  p95 {change:+.0%}"
+        print(line)
+    tokens = result["tokens_per_turn"]
+    print(f"🔢 Token/lượt: input {tokens['input']:.0f} | output {tokens['output']:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entry", choices=sorted(PIPELINES), default="graph")
+    parser.add_argument("--corpus", type=Path, default=CORPUS_PATH)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--live", action="store_true", help="Gemini + Neo4j thật")
+    parser.add_argument("--dishes", type=int, default=500)
+    parser.add_argument("--llm-ms", type=float, default=0.0)
+    parser.add_argument("--llm-sigma", type=float, default=0.0)
+    parser.add_argument("--graph-ms", type=float, default=0.0)
+    parser.add_argument("--graph-sigma", type=float, default=0.0)
+    parser.add_argument("--embed-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, help="mặc định results/<commit>-<entry>")
+    parser.add_argument("--compare", type=Path, help="file JSON của lần chạy trước")
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        conversations = json.load(f)["conversations"]
+
+    timer = StageTimer()
+    conversation = PIPELINES[args.entry](args, timer)
+    for _ in range(args.repeat):
+        for queries in conversations:
+            conversation(queries)
+
+    revision = git_revision()
+    result = {
+        "entry": args.entry,
+        "commit": revision,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "mode": "live" if args.live else "offline",
+        "config": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("corpus", "output", "compare")
+        },
+        **summarize(timer.turns),
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"📎 So với {baseline.get('commit')} ({args.compare})")
+    print(f"🏁 {args.entry} @ {revision} | {result['turns']} lượt ({result['mode']})")
+    print_report(result, baseline)
+
+    output = args.output or RESULTS_DIR / f"{revision}-{args.entry}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"💾 {output}")
+
+
+if __name__ == "__main__":
+    main()
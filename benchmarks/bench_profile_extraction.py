@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark trích xuất profile: các vòng regex cũ trong extract_user_info vs
+extract_profile_slots (một regex biên dịch sẵn, lowercase một lần)
+
+Sinh một corpus lớn các câu tiếng Việt có nhãn chiều cao/cân nặng, đo độ chính
+xác từng slot và latency trung bình mỗi câu.
+
+Chạy: poetry run python benchmarks/bench_profile_extraction.py --size 50000
+"""
+
+import argparse
+import random
+import re
+import time
+
+from gym_agent_test.intents import classify
+from gym_agent_test.profile_extraction import extract_profile_slots
+
+HEIGHT_FORMATS = [
+    lambda h: f"cao {h:.2f}",
+    lambda h: f"{h:.2f}m",
+    lambda h: f"{int(round(h * 100))}cm",
+    lambda h: f"1m{int(round(h * 100)) - 100}",
+    lambda h: f"cao {int(round(h * 100))}",
+    lambda h: f"{h:.2f}".replace(".", ",") + "m",
+]
+WEIGHT_FORMATS = [
+    lambda w: f"{w}kg",
+    lambda w: f"{w} kg",
+    lambda w: f"nặng {w}",
+    lambda w: f"{w} ký",
+    lambda w: f"{w} kí",
+    lambda w: f"cân {w}",
+]
+TEMPLATES = [
+    "tôi {h}, {w}",
+    "mình {h} và {w}, muốn tăng cơ",
+    "em {w}, {h}, bị đau gối thì tập gì",
+    "{h} {w} có béo không",
+    "gợi ý bài tập cho người {h} {w} muốn giảm cân",
+    "tôi {h}",
+    "hiện tại {w}, muốn giữ dáng",
+    "bài tập ngực cho người mới",
+    "chấn thương vai có nên đi gym không",
+]
+
+
+def build_corpus(size: int, seed: int = 42):
+    """Các câu (text, chiều cao đúng, cân nặng đúng)"""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        template = rng.choice(TEMPLATES)
+        height = rng.randint(150, 195) / 100
+        weight = rng.randint(40, 110)
+        text = template.format(
+            h=rng.choice(HEIGHT_FORMATS)(height), w=rng.choice(WEIGHT_FORMATS)(weight)
+        )
+        corpus.append(
+            (
+                text,
+                height if "{h}" in template else None,
+                weight if "{w}" in template else None,
+            )
+        )
+    return corpus
+
+
+def legacy_slots(user_input: str):
+    """Cách cũ: compile/search từng pattern, lowercase lại ở mỗi lần thử"""
+    slots = {"height": None, "weight": None}
+    height_patterns = [
+        r"(\d+\.?\d*)\s*m(?:\s|$)",
+        r"(\d+)\s*cm",
+        r"cao\s+(\d+\.?\d*)",
+    ]
+    for pattern in height_patterns:
+        match = re.search(pattern, user_input.lower())
+        if match:
+            height = float(match.group(1))
+            if height > 10:
+                height = height / 100
+            slots["height"] = height
+            break
+
+    weight_patterns = [
+        r"(\d+\.?\d*)\s*kg",
+        r"nặng\s+(\d+\.?\d*)",
+        r"cân\s+(\d+\.?\d*)",
+    ]
+    for pattern in weight_patterns:
+        match = re.search(pattern, user_input.lower())
+        if match:
+            slots["weight"] = float(match.group(1))
+            break
+
+    result = classify(user_input)
+    slots["goals"], slots["injuries"] = result["goals"], result["injuries"]
+    return slots
+
+
+def same(value, expected):
+    if value is None or expected is None:
+        return value is expected
+    return abs(value - expected) < 1e-6
+
+
+def evaluate(name, extract, corpus):
+    height_ok = weight_ok = 0
+    for text, height, weight in corpus:
+        slots = extract(text)
+        height_ok += same(slots["height"], height)
+        weight_ok += same(slots["weight"], weight)
+
+    start = time.perf_counter()
+    for text, _, _ in corpus:
+        extract(text)
+    latency_us = (time.perf_counter() - start) * 1e6 / len(corpus)
+
+    print(
+        f"{name:>10} | chiều cao: {height_ok / len(corpus):.3f} | "
+        f"cân nặng: {weight_ok / len(corpus):.3f} | {latency_us:.2f} µs/câu"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50000, help="Số câu trong corpus")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.size)
+    print(f"📚 {len(corpus)} câu")
+    evaluate("legacy", legacy_slots, corpus)
+    evaluate("one-pass", extract_profile_slots, corpus)
+
+    for text in ("tôi cao 1m70, 70 ký", "cao 1m75 nặng 68kg"):
+        legacy, new = legacy_slots(text), extract_profile_slots(text)
+        print(
+            f"🔎 {text!r}: legacy {legacy['height']}/{legacy['weight']} -> "
+            f"{new['height']}/{new['weight']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark xếp hạng macro món ăn (gym_agent_test.ranking)
+
+Chạy: poetry run python benchmarks/bench_ranking.py
+"""
+
+import random
+import time
+
+import numpy as np
+
+from gym_agent_test.ranking import (
+    macro_matrix,
+    macro_weights,
+    rank_dishes,
+    score_macros,
+    target_macros,
+    top_k,
+)
+
+PROFILE = {"height": 1.75, "weight": 70, "bmi": None, "goals": ["tăng cơ"]}
+SIZES = [100, 1_000, 5_000, 10_000]
+REPEAT = 200
+
+
+def make_candidates(n: int, seed: int = 42):
+    """Sinh n món ăn giả với macro ngẫu nhiên"""
+    rng = random.Random(seed)
+    return [
+        {
+            "type": "dish",
+            "name": f"Món {i}",
+            "calories": rng.uniform(30, 900),
+            "protein": rng.uniform(0, 60),
+            "carbs": rng.uniform(0, 120),
+            "fat": None if rng.random() < 0.05 else rng.uniform(0, 40),
+        }
+        for i in range(n)
+    ]
+
+
+def timed(fn, repeat: int = REPEAT):
+    """Trả về thời gian trung bình (ms) của fn"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    target = target_macros(PROFILE)
+    weights = macro_weights(PROFILE)
+    print(f"🎯 Target macro / bữa: {np.round(target, 1)}")
+    print(
+        f"{'n':>8} | {'load (ms)':>10} | {'score+top5 (ms)':>16} | {'end-to-end (ms)':>16}"
+    )
+    print("-" * 60)
+
+    for n in SIZES:
+        candidates = make_candidates(n)
+        matrix = macro_matrix(candidates)
+        load_ms = timed(lambda: macro_matrix(candidates), repeat=20)
+        score_ms = timed(lambda: top_k(score_macros(matrix, target, weights), 5))
+        e2e_ms = timed(lambda: rank_dishes(candidates, PROFILE, k=5), repeat=20)
+        print(f"{n:>8} | {load_ms:>10.3f} | {score_ms:>16.3f} | {e2e_ms:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
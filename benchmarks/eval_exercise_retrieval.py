@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Đánh giá offline retrieval bài tập: recall@k và latency cho BM25, dense và hybrid (RRF)
+
+Chạy: poetry run python benchmarks/eval_exercise_retrieval.py [--k 4]
+Nhánh dense/hybrid cần GOOGLE_API_KEY trong .env, nếu không chỉ đánh giá BM25.
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from dotenv import load_dotenv
+
+from gym_agent_test.exercise_catalog import EXERCISE_DATA, exercise_metadata
+from gym_agent_test.hybrid_search import HybridRetriever
+
+# Câu hỏi mẫu -> tiền tố của các bài tập được coi là liên quan
+LABELED_QUERIES = [
+    ("NGỰC", ["NGỰC -"]),
+    ("bài tập ngực", ["NGỰC -"]),
+    ("gối", ["CHẤN THƯƠNG GỐI -"]),
+    ("đau gối nên tập gì", ["CHẤN THƯƠNG GỐI -"]),
+    ("lưng xô", ["LƯNG - Pull-ups", "LƯNG - Lat Pulldowns"]),
+    ("chấn thương lưng", ["CHẤN THƯƠNG LƯNG -"]),
+    ("vai", ["VAI -"]),
+    ("tay sau", ["TAY SAU -"]),
+    ("cổ tay", ["CHẤN THƯƠNG TAY - Wrist Curls"]),
+    ("cardio nhẹ", ["CARDIO NHẸ -"]),
+    ("bơi", ["CARDIO NHẸ - Swimming"]),
+    ("squat", ["CHÂN - Squats"]),
+    ("giãn cơ", ["STRETCHING -"]),
+    ("bụng", ["BỤNG -"]),
+    ("recovery", ["RECOVERY -", "CARDIO NHẸ - Walking"]),
+]
+
+
+def relevant_ids(prefixes):
+    """Chỉ số các bài tập bắt đầu bằng một trong các tiền tố"""
+    return {
+        i
+        for i, text in enumerate(EXERCISE_DATA)
+        if any(text.startswith(prefix) for prefix in prefixes)
+    }
+
+
+def build_retriever():
+    """Tạo HybridRetriever; có vector store nếu có GOOGLE_API_KEY"""
+    from langchain_core.documents import Document
+
+    documents = [
+        Document(page_content=text, metadata=exercise_metadata(text))
+        for text in EXERCISE_DATA
+    ]
+    load_dotenv()
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        print("⚠️ Không có GOOGLE_API_KEY: chỉ đánh giá BM25")
+        return HybridRetriever(documents)
+
+    from langchain_community.vectorstores import Chroma
+
+    from gym_agent_test.llm_client import get_embeddings
+
+    embeddings = get_embeddings(api_key)
+    vectorstore = Chroma.from_documents(
+        documents=documents, embedding=embeddings, collection_name="exercises-eval"
+    )
+    return HybridRetriever(documents, vectorstore)
+
+
+def evaluate(name, search_ids, k):
+    """In recall@k và latency (p50/max) của một chiến lược retrieval"""
+    recalls, latencies = [], []
+    for query, prefixes in LABELED_QUERIES:
+        relevant = relevant_ids(prefixes)
+        start = time.perf_counter()
+        ids = search_ids(query)[:k]
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(relevant & set(ids)) / min(len(relevant), k))
+
+    print(
+        f"{name:>8} | recall@{k}: {statistics.mean(recalls):.3f} | "
+        f"p50: {statistics.median(latencies):.2f} ms | max: {max(latencies):.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--k", type=int, default=4)
+    args = parser.parse_args()
+
+    retriever = build_retriever()
+    doc_ids = {doc.page_content: i for i, doc in enumerate(retriever.documents)}
+
+    print(f"📚 {len(EXERCISE_DATA)} bài tập, {len(LABELED_QUERIES)} câu hỏi có nhãn")
+    evaluate("bm25", retriever.sparse_ids, args.k)
+    if retriever.vectorstore:
+        evaluate("dense", retriever.dense_ids, args.k)
+        evaluate(
+            "hybrid",
+            lambda q: [doc_ids[d.page_content] for d in retriever.search(q, args.k)],
+            args.k,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Kho lời khuyên gym: nạp từ file dữ liệu, đánh index từ khóa một lần
+
+Mỗi section có topic, danh sách từ khóa và nội dung. Câu hỏi được quét một lần
+bằng IntentClassifier (regex dạng trie của toàn bộ từ khóa), trả về mọi section
+khớp theo thứ tự điểm thay vì chỉ section đầu tiên trong dict.
+"""
+
+import json
+import os
+from pathlib import Path
+
+from gym_agent_test.intents import IntentClassifier
+
+ADVICE_PATH = Path(
+    os.getenv("GYM_ADVICE_PATH", Path(__file__).parent / "data" / "gym_advice.json")
+)
+MAX_SECTIONS = 3
+
+NO_MATCH = (
+    "🤔 Hỏi cụ thể hơn về: tăng cơ, giảm cân, tăng sức mạnh, "
+    "bài tập bụng/chân/tay/ngực/lưng, dinh dưỡng"
+)
+# Các entry point RAG có tool chuyên sâu hơn để agent chuyển sang
+RAG_NO_MATCH = NO_MATCH + ". Hoặc dùng RAG tools cho tư vấn chi tiết!"
+
+
+class AdviceIndex:
+    """Index từ khóa -> section của kho lời khuyên"""
+
+    def __init__(self, sections):
+        self.sections = list(sections)
+        self.topics = [section["topic"] for section in self.sections]
+        self._by_topic = {section["topic"]: section for section in self.sections}
+        self._keywords = IntentClassifier(
+            {
+                section["topic"]: section.get("keywords") or [section["topic"]]
+                for section in self.sections
+            }
+        )
+
+    @classmethod
+    def from_file(cls, path=ADVICE_PATH):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["sections"])
+
+    def search(self, question: str, limit: int = MAX_SECTIONS):
+        """Các section khớp câu hỏi, xếp theo điểm
+
+        Điểm là tổng độ dài các từ khóa khác nhau đã match (từ khóa dài cụ thể
+        hơn); hòa điểm thì section được nhắc sớm hơn trong câu đứng trước.
+        """
+        scores, first_seen, seen = {}, {}, set()
+        for position, keyword in self._keywords.matches(question.lower()):
+            if keyword in seen:
+                continue
+            seen.add(keyword)
+            for topic in self._keywords.labels_for(keyword):
+                scores[topic] = scores.get(topic, 0) + len(keyword)
+                first_seen.setdefault(topic, position)
+
+        ranked = sorted(scores, key=lambda topic: (-scores[topic], first_seen[topic]))
+        return [self._by_topic[topic] for topic in ranked[:limit]]
+
+    def answer(self, question: str, limit: int = MAX_SECTIONS, fallback=NO_MATCH):
+        """Nội dung các section khớp, nối liền; fallback nếu không có section nào"""
+        sections = self.search(question, limit)
+        if not sections:
+            return fallback
+        return "\n\n".join(section["advice"] for section in sections)
+
+
+_advice_index = None
+
+
+def get_advice_index() -> AdviceIndex:
+    """Index dùng chung, nạp từ ADVICE_PATH ở lần gọi đầu tiên"""
+    global _advice_index
+    if _advice_index is None:
+        _advice_index = AdviceIndex.from_file()
+    return _advice_index
+
+
+def gym_advice(question: str, limit: int = MAX_SECTIONS, fallback=NO_MATCH) -> str:
+    return get_advice_index().answer(question, limit, fallback)
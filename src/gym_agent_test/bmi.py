@@ -0,0 +1,140 @@
+"""Tính và phân loại BMI dùng chung cho mọi entry point
+
+Bảng ngưỡng duy nhất; classify_bmi vector hóa bằng NumPy cho cả danh sách hội
+viên, CLI đọc file roster CSV theo từng khối nên không phải nạp hết vào bộ nhớ.
+
+Chạy: poetry run python -m gym_agent_test.bmi members.csv -o members_bmi.csv
+"""
+
+import argparse
+import csv
+import sys
+from bisect import bisect_right
+from itertools import islice
+
+import numpy as np
+
+# Ngưỡng trên (không tính) của từng nhóm, theo thứ tự BMI_LABELS
+BMI_THRESHOLDS = (18.5, 24.9, 29.9)
+BMI_LABELS = ("Thiếu cân", "Bình thường", "Thừa cân", "Béo phì")
+
+INPUT_ERROR = "Sai input! Hãy nhập theo định dạng: chiều_cao,cân_nặng (VD: 1.70,65)"
+
+_THRESHOLDS = np.array(BMI_THRESHOLDS)
+_LABELS = np.array(BMI_LABELS + ("",))  # "" cho dòng thiếu/sai số đo
+
+# Chiều cao lớn hơn giá trị này được hiểu là cm
+MAX_HEIGHT_M = 3.0
+CHUNK_SIZE = 10000
+
+
+def bmi_category(bmi: float) -> str:
+    """Phân loại một giá trị BMI"""
+    return BMI_LABELS[bisect_right(BMI_THRESHOLDS, bmi)]
+
+
+def bmi_report(height_weight: str) -> str:
+    """Câu trả lời của tool calc_bmi cho input 'chiều_cao,cân_nặng'"""
+    try:
+        h, w = map(float, height_weight.split(","))
+        bmi = w / (h * h)
+    except Exception:
+        return INPUT_ERROR
+    return f"BMI = {bmi:.2f} → {bmi_category(bmi)}"
+
+
+def classify_bmi(heights, weights):
+    """BMI và nhãn phân loại cho cả mảng chiều cao (m hoặc cm) và cân nặng (kg)
+
+    Trả về (bmi, labels); dòng có số đo không hợp lệ cho BMI nan và nhãn "".
+    """
+    heights = np.asarray(heights, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    heights = np.where(heights > MAX_HEIGHT_M, heights / 100, heights)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bmi = weights / (heights * heights)
+    valid = np.isfinite(bmi) & (heights > 0) & (weights > 0)
+    bmi = np.where(valid, bmi, np.nan)
+
+    categories = np.digitize(bmi, _THRESHOLDS)
+    categories[~valid] = len(BMI_LABELS)
+    return bmi, _LABELS[categories]
+
+
+def refresh_profile_bmi(profile: dict):
+    """Cập nhật BMI lưu sẵn trên profile sau khi chiều cao/cân nặng thay đổi"""
+    height, weight = profile.get("height"), profile.get("weight")
+    profile["bmi"] = weight / (height * height) if height and weight else None
+    return profile["bmi"]
+
+
+def _to_float(value: str) -> float:
+    try:
+        return float(value.replace(",", "."))
+    except (AttributeError, ValueError):
+        return np.nan
+
+
+def classify_roster(
+    rows, height_col="height", weight_col="weight", chunk_size=CHUNK_SIZE
+):
+    """Thêm cột bmi, bmi_category cho từng dòng roster (dict), xử lý theo khối"""
+    rows = iter(rows)
+    while chunk := list(islice(rows, chunk_size)):
+        bmi, labels = classify_bmi(
+            [_to_float(row.get(height_col)) for row in chunk],
+            [_to_float(row.get(weight_col)) for row in chunk],
+        )
+        for row, value, label in zip(chunk, bmi.tolist(), labels.tolist()):
+            row["bmi"] = "" if value != value else f"{value:.2f}"
+            row["bmi_category"] = label
+            yield row
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Tính BMI và phân loại cho file roster hội viên (CSV)"
+    )
+    parser.add_argument("roster", help="File CSV có cột chiều cao và cân nặng")
+    parser.add_argument("-o", "--output", help="File CSV kết quả (mặc định stdout)")
+    parser.add_argument("--height-col", default="height")
+    parser.add_argument("--weight-col", default="weight")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    with open(args.roster, newline="", encoding="utf-8-sig") as src:
+        reader = csv.DictReader(src)
+        missing = {args.height_col, args.weight_col} - set(reader.fieldnames or ())
+        if missing:
+            parser.error(f"Thiếu cột trong roster: {', '.join(sorted(missing))}")
+
+        dst = (
+            open(args.output, "w", newline="", encoding="utf-8")
+            if args.output
+            else sys.stdout
+        )
+        try:
+            added = [c for c in ("bmi", "bmi_category") if c not in reader.fieldnames]
+            writer = csv.DictWriter(
+                dst, fieldnames=reader.fieldnames + added, extrasaction="ignore"
+            )
+            writer.writeheader()
+            counts = dict.fromkeys(BMI_LABELS + ("",), 0)
+            for row in classify_roster(
+                reader, args.height_col, args.weight_col, args.chunk_size
+            ):
+                writer.writerow(row)
+                counts[row["bmi_category"]] += 1
+        finally:
+            if dst is not sys.stdout:
+                dst.close()
+
+    summary = ", ".join(
+        f"{label or 'không hợp lệ'}: {n}" for label, n in counts.items()
+    )
+    print(f"📊 {sum(counts.values())} hội viên | {summary}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
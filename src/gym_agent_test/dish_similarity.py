@@ -0,0 +1,227 @@
+"""Tính trước độ tương đồng giữa các món và lưu thành quan hệ SIMILAR_TO
+
+score = JACCARD_WEIGHT * Jaccard(nguyên liệu CONTAINS) + phần còn lại * độ gần
+macro (exp của khoảng cách macro đã chuẩn hóa). Mỗi món giữ SIMILAR_TOP_K món
+gần nhất, quan hệ mang score, jaccard và macro_distance; tool gợi ý "món giống X
+nhưng ít calo/nhiều protein hơn" chỉ cần một bước từ Dish theo index tên.
+
+Mỗi Dish lưu similarity_signature (băm nguyên liệu + macro) và similar_count.
+Refresh tăng dần chỉ tính lại món mới/đổi, món đang trỏ tới món đó, món có
+SIMILAR_TO bị mất (món bị xóa) và món mà món đổi nay lọt vào top-k.
+
+Chạy sau mỗi lần import/cập nhật món:
+    poetry run python -m gym_agent_test.dish_similarity [--full]
+"""
+
+import argparse
+import hashlib
+import os
+import time
+
+import numpy as np
+from rich.console import Console
+
+from gym_agent_test.graph_queries import run_query
+from gym_agent_test.meal_plan import DishCatalog, load_dish_catalog
+
+SIMILAR_TOP_K = int(os.getenv("SIMILAR_TOP_K", "10"))
+JACCARD_WEIGHT = 0.6
+MIN_SIMILARITY = 0.2
+# Thang chuẩn hóa cố định (calories, protein, carbs, fat) để score không phụ
+# thuộc vào phần còn lại của catalog, nhờ vậy refresh tăng dần khớp với tính lại
+MACRO_SCALE = np.array([100.0, 10.0, 20.0, 10.0])
+# Số món mỗi lô khi tính score và ghi quan hệ
+WRITE_BATCH = 200
+
+console = Console()
+
+
+def signature(catalog: DishCatalog, index: int) -> str:
+    """Băm nguyên liệu và macro của một món: đổi thì cần tính lại"""
+    ingredients = ",".join(sorted(set(catalog.ingredients[index])))
+    macros = ",".join(f"{value:g}" for value in catalog.matrix[index])
+    text = f"{ingredients}|{macros}"
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+
+class SimilarityModel:
+    """Ma trận nguyên liệu (n, m) và macro của catalog để tính score theo hàng"""
+
+    def __init__(self, catalog: DishCatalog, top_k: int = SIMILAR_TOP_K):
+        self.catalog = catalog
+        self.top_k = top_k
+        vocabulary = {}
+        rows, cols = [], []
+        for row, ingredients in enumerate(catalog.ingredients):
+            for name in set(ingredients):
+                rows.append(row)
+                cols.append(vocabulary.setdefault(name, len(vocabulary)))
+        self.incidence = np.zeros((len(catalog), max(len(vocabulary), 1)), np.float32)
+        self.incidence[rows, cols] = 1.0
+        self.sizes = self.incidence.sum(axis=1)
+        self.scaled = catalog.matrix / MACRO_SCALE
+
+    def scores(self, indices):
+        """(score, jaccard, macro_distance) của các món indices với mọi món"""
+        indices = np.asarray(indices, dtype=int)
+        overlap = self.incidence[indices] @ self.incidence.T
+        union = self.sizes[indices, None] + self.sizes[None, :] - overlap
+        jaccard = np.divide(overlap, union, out=np.zeros_like(overlap), where=union > 0)
+        # Cộng từng cột macro để không tạo mảng (len(indices), n, 4)
+        distance = np.zeros(overlap.shape)
+        for column in range(self.scaled.shape[1]):
+            values = self.scaled[:, column]
+            distance += np.abs(values[indices, None] - values[None, :])
+        distance /= self.scaled.shape[1]
+        # Thiếu macro thì chỉ dựa vào nguyên liệu
+        closeness = np.nan_to_num(np.exp(-distance), nan=0.0)
+        score = JACCARD_WEIGHT * jaccard + (1 - JACCARD_WEIGHT) * closeness
+        score[np.arange(len(indices)), indices] = -np.inf
+        return score, jaccard, distance
+
+    def neighbors(self, indices) -> dict:
+        """Top-k món tương đồng (score >= MIN_SIMILARITY) cho mỗi index"""
+        result = {}
+        if len(indices) == 0:
+            return result
+        score, jaccard, distance = self.scores(indices)
+        k = min(self.top_k, len(self.catalog) - 1)
+        for row, index in enumerate(indices):
+            if k <= 0:
+                result[index] = []
+                continue
+            # Hòa điểm ở biên top-k thì xếp theo tên, để refresh tăng dần và tính
+            # lại toàn bộ cho cùng kết quả dù thứ tự món trong catalog thay đổi
+            kth = np.partition(score[row], -k)[-k]
+            candidates = np.flatnonzero(score[row] >= kth)
+            names = self.catalog.names
+            top = sorted(candidates, key=lambda j: (-score[row, j], names[j]))[:k]
+            result[index] = [
+                {
+                    "name": self.catalog.names[j],
+                    "score": round(float(score[row, j]), 4),
+                    "jaccard": round(float(jaccard[row, j]), 4),
+                    "macro_distance": (
+                        None
+                        if np.isnan(distance[row, j])
+                        else round(float(distance[row, j]), 4)
+                    ),
+                }
+                for j in top
+                if score[row, j] >= MIN_SIMILARITY
+            ]
+        return result
+
+
+def stale_indices(model: SimilarityModel, state: dict) -> list:
+    """Các món cần tính lại SIMILAR_TO so với trạng thái đang lưu
+
+    state: tên món -> {"signature", "similar_count", "neighbors": [{name, score}]}
+    """
+    catalog = model.catalog
+    signatures = [signature(catalog, i) for i in range(len(catalog))]
+    changed = [
+        i
+        for i, name in enumerate(catalog.names)
+        if (state.get(name) or {}).get("signature") != signatures[i]
+    ]
+    stale = set(changed)
+
+    changed_names = {catalog.names[i] for i in changed}
+    # Score cao nhất mà một món vừa đổi đạt được với từng món (tính theo lô)
+    best_new = np.full(len(catalog), -np.inf)
+    pending = changed if len(changed) < len(catalog) else []
+    for offset in range(0, len(pending), WRITE_BATCH):
+        batch = pending[offset : offset + WRITE_BATCH]
+        best_new = np.maximum(best_new, model.scores(batch)[0].max(axis=0))
+    for i, name in enumerate(catalog.names):
+        if i in stale:
+            continue
+        stored = state[name]
+        neighbors = stored.get("neighbors") or []
+        if len(neighbors) != (stored.get("similar_count") or 0):
+            # Món lân cận đã bị xóa (DETACH DELETE xóa luôn quan hệ)
+            stale.add(i)
+        elif any(n["name"] in changed_names for n in neighbors):
+            stale.add(i)
+        else:
+            full = len(neighbors) >= min(model.top_k, len(catalog) - 1)
+            threshold = min(n["score"] for n in neighbors) if full else MIN_SIMILARITY
+            if best_new[i] >= threshold:
+                stale.add(i)
+    return sorted(stale)
+
+
+def load_state(session) -> dict:
+    state = {}
+    for record in run_query(session, "similarity_state"):
+        state[record["name"]] = {
+            "signature": record["signature"],
+            "similar_count": record["similar_count"],
+            "neighbors": [n for n in record["neighbors"] if n.get("name")],
+        }
+    return state
+
+
+def refresh_similarity(driver, database: str, full: bool = False, top_k=None) -> dict:
+    """Tính lại SIMILAR_TO (tăng dần, hoặc toàn bộ khi full=True) và ghi vào Neo4j"""
+    start = time.perf_counter()
+    catalog = load_dish_catalog(driver, database)
+    model = SimilarityModel(catalog, top_k or SIMILAR_TOP_K)
+
+    with driver.session(database=database) as session:
+        run_query(session, "dish_name_index")
+        state = {} if full else load_state(session)
+        indices = list(range(len(catalog))) if full else stale_indices(model, state)
+
+        written = 0
+        for offset in range(0, len(indices), WRITE_BATCH):
+            batch = indices[offset : offset + WRITE_BATCH]
+            neighbors = model.neighbors(batch)
+            rows = [
+                {
+                    "name": catalog.names[i],
+                    "signature": signature(catalog, i),
+                    "neighbors": neighbors[i],
+                }
+                for i in batch
+            ]
+            run_query(session, "write_similar", rows=rows)
+            written += sum(len(row["neighbors"]) for row in rows)
+
+    return {
+        "dishes": len(catalog),
+        "refreshed": len(indices),
+        "relationships": written,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tính quan hệ SIMILAR_TO giữa các món")
+    parser.add_argument("--full", action="store_true", help="tính lại toàn bộ")
+    parser.add_argument("--top-k", type=int, default=SIMILAR_TOP_K)
+    args = parser.parse_args()
+
+    from neo4j import GraphDatabase
+
+    import gym_agent_test.main_RAG_Graph as agent
+
+    driver = GraphDatabase.driver(
+        agent.neo4j_uri, auth=(agent.neo4j_user, agent.neo4j_password)
+    )
+    try:
+        stats = refresh_similarity(
+            driver, agent.neo4j_database, full=args.full, top_k=args.top_k
+        )
+    finally:
+        driver.close()
+    console.print(
+        f"🔗 SIMILAR_TO: tính lại {stats['refreshed']}/{stats['dishes']} món, "
+        f"{stats['relationships']} quan hệ trong {stats['seconds']}s",
+        style="bold green",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Bản tóm tắt materialized của từng món (thuộc tính Dish.summary)
+
+summary là JSON gọn gồm cuisine, nguyên liệu (định lượng + benefit) và benefit
+của món, dựng từ traversal CONTAINS -> Ingredient -> PROVIDES_BENEFIT -> Benefit.
+Tra cứu món trong nutrition_advisor_rag chỉ cần đọc một node; món chưa có
+summary (vừa thêm) vẫn được đọc bằng traversal đầy đủ nên kết quả luôn đúng.
+
+Mỗi Dish lưu kèm summary_signature: blake2b của nguồn (cuisine, tên + định
+lượng + benefit của nguyên liệu, benefit của món, đã sắp xếp). Job chỉ ghi món
+có chữ ký khác; tra cứu vẫn chỉ đọc d.summary. Nơi ghi dữ liệu món (import,
+sửa nguyên liệu/benefit) phải gọi refresh_dish_summaries(driver, db, names=[...])
+hoặc invalidate_dish_summaries(driver, db, names) cho các món vừa chạm tới;
+đổi benefit của một nguyên liệu thì chạy lại toàn bộ.
+    poetry run python -m gym_agent_test.dish_summary [--dish "Phở bò"]
+"""
+
+import argparse
+import hashlib
+import json
+import time
+
+from rich.console import Console
+
+from gym_agent_test.graph_queries import run_query
+
+# Số món mỗi lô khi ghi summary
+WRITE_BATCH = 500
+
+console = Console()
+
+
+def clean_ingredients(raw) -> list:
+    """Nguyên liệu từ collect({name, quantity, benefits}) của Cypher, bỏ giá trị null"""
+    ingredients = []
+    for ing in raw or []:
+        if not ing:
+            continue
+        if isinstance(ing, dict):
+            name = ing.get("name")
+            quantity = ing.get("quantity")
+            benefits = [b for b in (ing.get("benefits") or []) if b]
+        else:
+            name, quantity, benefits = ing, None, []
+        if name:
+            ingredients.append(
+                {"name": name, "quantity": quantity, "benefits": benefits}
+            )
+    return ingredients
+
+
+def build_summary(cuisine, ingredients, benefits) -> str:
+    """JSON gọn của món (giữ thứ tự nguyên liệu, bỏ benefit trùng/null)"""
+    ingredients = clean_ingredients(ingredients)
+    for ing in ingredients:
+        ing["benefits"] = list(dict.fromkeys(ing["benefits"]))
+    summary = {
+        "cuisine": cuisine,
+        "ingredients": ingredients,
+        "benefits": list(dict.fromkeys(b for b in benefits or [] if b)),
+    }
+    return json.dumps(summary, ensure_ascii=False, separators=(",", ":"))
+
+
+def parse_summary(text: str) -> dict:
+    return json.loads(text)
+
+
+def summary_signature(cuisine, ingredients, benefits) -> str:
+    """Băm nguồn của summary (không phụ thuộc thứ tự): đổi thì cần dựng lại"""
+    uses = sorted(
+        f"{ing['name']}:{ing['quantity']}:{','.join(sorted(set(ing['benefits'])))}"
+        for ing in clean_ingredients(ingredients)
+    )
+    names = sorted({b for b in benefits or [] if b})
+    text = f"{cuisine}|{';'.join(uses)}|{','.join(names)}"
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+
+def refresh_dish_summaries(driver, database: str, names=None) -> dict:
+    """Dựng lại summary cho mọi món (hoặc các món names), chỉ ghi món bị đổi"""
+    start = time.perf_counter()
+    with driver.session(database=database) as session:
+        records = run_query(
+            session, "dish_summary_source", names=list(names) if names else None
+        )
+        rows = []
+        for record in records:
+            source = (record["cuisine"], record["ingredients"], record["benefits"])
+            signature = summary_signature(*source)
+            if signature != record["signature"] or not record["summary"]:
+                rows.append(
+                    {
+                        "name": record["name"],
+                        "summary": build_summary(*source),
+                        "signature": signature,
+                    }
+                )
+        for offset in range(0, len(rows), WRITE_BATCH):
+            run_query(
+                session,
+                "write_dish_summaries",
+                rows=rows[offset : offset + WRITE_BATCH],
+            )
+    return {
+        "dishes": len(records),
+        "updated": len(rows),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def invalidate_dish_summaries(driver, database: str, names) -> None:
+    """Bỏ summary của các món vừa sửa để tra cứu đọc traversal tới lần refresh"""
+    with driver.session(database=database) as session:
+        run_query(session, "clear_dish_summaries", names=list(names))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Materialize Dish.summary")
+    parser.add_argument(
+        "--dish", action="append", help="chỉ làm mới món này (lặp lại được)"
+    )
+    args = parser.parse_args()
+
+    from neo4j import GraphDatabase
+
+    import gym_agent_test.main_RAG_Graph as agent
+
+    driver = GraphDatabase.driver(
+        agent.neo4j_uri, auth=(agent.neo4j_user, agent.neo4j_password)
+    )
+    try:
+        stats = refresh_dish_summaries(driver, agent.neo4j_database, args.dish)
+    finally:
+        driver.close()
+    console.print(
+        f"🧾 Dish.summary: cập nhật {stats['updated']}/{stats['dishes']} món "
+        f"trong {stats['seconds']}s",
+        style="bold green",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Dữ liệu bài tập theo nhóm cơ và chấn thương dùng cho RAG bài tập"""
+
+import re
+
+# Dữ liệu bài tập theo nhóm cơ và chấn thương
+EXERCISE_DATA = [
+    "NGỰC - Bench Press: Tập ngực, vai trước, tay sau. 3 sets x 8-12 reps. Chú ý: giữ vai ổn định, hạ bar chạm ngực.",
+    "NGỰC - Push-ups: Bodyweight, tập ngực toàn diện. 3 sets x 15-20 reps. Biến thể: incline, decline, diamond.",
+    "NGỰC - Dumbbell Flyes: Tập ngực giữa. 3 sets x 10-15 reps. Chú ý: không hạ quá thấp, tránh chấn thương vai.",
+    "LƯNG - Pull-ups: Tập lưng xô, tay trước. 3 sets x 5-12 reps. Biến thể: wide grip, chin-ups.",
+    "LƯNG - Bent-over Rows: Tập lưng giữa, sau vai. 3 sets x 8-12 reps. Chú ý: giữ lưng thẳng.",
+    "LƯNG - Lat Pulldowns: Máy tập lưng xô. 3 sets x 10-15 reps. Tập trung vào kéo bằng lưng.",
+    "VAI - Overhead Press: Tập vai toàn diện. 3 sets x 8-12 reps. Chú ý: core chặt, không lắc lưng.",
+    "VAI - Lateral Raises: Tập vai giữa. 3 sets x 12-15 reps. Tạ nhẹ, động tác chậm và kiểm soát.",
+    "VAI - Rear Delt Flyes: Tập vai sau. 3 sets x 15-20 reps. Quan trọng để cân bằng tư thế.",
+    "TAY TRƯỚC - Bicep Curls: Tập tay trước. 3 sets x 10-15 reps. Chú ý: không swing, kiểm soát âm tính.",
+    "TAY TRƯỚC - Hammer Curls: Tập tay trước + cẳng tay. 3 sets x 10-15 reps. Grip ngang, tạ dumbbell.",
+    "TAY SAU - Tricep Dips: Tập tay sau. 3 sets x 10-15 reps. Có thể dùng ghế hoặc parallel bars.",
+    "TAY SAU - Overhead Tricep Extension: Tập tay sau. 3 sets x 10-15 reps. Chú ý: giữ khuỷu tay ổn định.",
+    "CHÂN - Squats: Tập đùi, mông toàn diện. 3 sets x 10-15 reps. Chú ý: gót chân không rời đất.",
+    "CHÂN - Deadlifts: Tập đùi sau, mông, lưng dưới. 3 sets x 5-8 reps. Kỹ thuật quan trọng nhất.",
+    "CHÂN - Lunges: Tập đùi, mông đơn bên. 3 sets x 12/leg. Tốt cho cân bằng và stability.",
+    "BỤNG - Plank: Tập core tĩnh. 3 sets x 30-60s. Foundation cho mọi bài tập khác.",
+    "BỤNG - Crunches: Tập bụng trên. 3 sets x 15-25 reps. Chú ý: không kéo cổ.",
+    "BỤNG - Russian Twists: Tập bụng chéo. 3 sets x 20 total. Có thể thêm tạ để tăng khó.",
+    "CHẤN THƯƠNG TAY - Wrist Curls: Phục hồi cổ tay. 2 sets x 15-20 reps với tạ nhẹ.",
+    "CHẤN THƯƠNG TAY - Resistance Band Exercises: An toàn cho vai, khuỷu tay. Elastic band với các hướng khác nhau.",
+    "CHẤN THƯƠNG LƯNG - Cat-Cow Stretch: Mobility lưng. 2 sets x 10 reps. Làm ấm trước tập.",
+    "CHẤN THƯƠNG LƯNG - Bird Dog: Stability core và lưng. 3 sets x 10/side. Tăng dần độ khó.",
+    "CHẤN THƯƠNG GỐI - Wall Sits: Tập đùi không impact. 3 sets x 20-45s. An toàn cho gối.",
+    "CHẤN THƯƠNG GỐI - Glute Bridges: Tập mông, ít stress gối. 3 sets x 15-20 reps.",
+    "CARDIO NHẸ - Walking: 30-45 phút, an toàn cho mọi chấn thương. Tốt cho recovery.",
+    "CARDIO NHẸ - Swimming: Toàn thân, ít impact. 20-30 phút, tốt cho chấn thương khớp.",
+    "STRETCHING - Hip Flexor Stretch: Giãn cơ hông. 30s/side. Quan trọng cho người ngồi nhiều.",
+    "STRETCHING - Chest Stretch: Giãn ngực. 30s. Cân bằng với bài tập push.",
+    "RECOVERY - Foam Rolling: Self-massage. 5-10 phút/nhóm cơ. Tốt cho recovery.",
+]
+
+# Chấn thương (theo user_profile["injuries"]) -> key metadata dạng ASCII cho Chroma
+INJURY_METADATA_KEYS = {
+    "vai": "safe_for_vai",
+    "tay": "safe_for_tay",
+    "lưng": "safe_for_lung",
+    "gối": "safe_for_goi",
+    "cổ tay": "safe_for_co_tay",
+    "chân": "safe_for_chan",
+}
+
+# Nhóm bài tập -> các chấn thương không nên tập (chống chỉ định)
+CONTRAINDICATIONS = {
+    "NGỰC": {"vai", "tay", "cổ tay"},
+    "LƯNG": {"lưng", "vai"},
+    "VAI": {"vai"},
+    "TAY TRƯỚC": {"tay", "cổ tay"},
+    "TAY SAU": {"tay", "vai", "cổ tay"},
+    "CHÂN": {"gối", "chân", "lưng"},
+    "BỤNG": {"lưng"},
+}
+
+# Các nhóm an toàn để phục hồi khi có chấn thương
+REHAB_CATEGORIES = [
+    "CHẤN THƯƠNG TAY",
+    "CHẤN THƯƠNG LƯNG",
+    "CHẤN THƯƠNG GỐI",
+    "CARDIO NHẸ",
+    "STRETCHING",
+    "RECOVERY",
+]
+
+# Từ khóa trong câu hỏi -> nhóm bài tập cần tìm (ưu tiên cụm từ dài hơn)
+QUERY_CATEGORY_KEYWORDS = {
+    "ngực": ["NGỰC"],
+    "lưng": ["LƯNG", "CHẤN THƯƠNG LƯNG"],
+    "vai": ["VAI"],
+    "tay trước": ["TAY TRƯỚC"],
+    "bắp tay": ["TAY TRƯỚC"],
+    "tay sau": ["TAY SAU"],
+    "cổ tay": ["CHẤN THƯƠNG TAY"],
+    "tay": ["TAY TRƯỚC", "TAY SAU"],
+    "chân": ["CHÂN"],
+    "đùi": ["CHÂN"],
+    "mông": ["CHÂN", "CHẤN THƯƠNG GỐI"],
+    "gối": ["CHẤN THƯƠNG GỐI"],
+    "bụng": ["BỤNG"],
+    "core": ["BỤNG"],
+    "cardio": ["CARDIO NHẸ"],
+    "giãn cơ": ["STRETCHING"],
+    "stretch": ["STRETCHING"],
+    "phục hồi": ["RECOVERY", "CARDIO NHẸ"],
+    "recovery": ["RECOVERY", "CARDIO NHẸ"],
+}
+
+REHAB_KEYWORDS = ["đau", "chấn thương", "bị thương", "injury", "pain"]
+
+QUERY_INJURY_PATTERN = re.compile(
+    r"(?:đau|chấn thương|bị thương)\s+("
+    + "|".join(sorted(INJURY_METADATA_KEYS, key=len, reverse=True))
+    + ")"
+)
+
+
+def exercise_metadata(text: str) -> dict:
+    """Tách nhóm bài tập và chống chỉ định từ nội dung để lưu vào metadata Chroma"""
+    category = text.split(" - ", 1)[0].strip()
+    unsafe = CONTRAINDICATIONS.get(category, set())
+    metadata = {
+        "category": category,
+        "rehab": category in REHAB_CATEGORIES,
+    }
+    for injury, key in INJURY_METADATA_KEYS.items():
+        metadata[key] = injury not in unsafe
+    return metadata
+
+
+def build_exercise_filter(query: str, injuries=(), by_category: bool = True):
+    """Tạo where-clause Chroma từ câu hỏi và chấn thương trong profile
+
+    by_category=False bỏ điều kiện nhóm cơ (mở rộng tìm kiếm) nhưng vẫn giữ
+    điều kiện an toàn theo chấn thương.
+    """
+    query_lower = query.lower()
+    rehab = any(keyword in query_lower for keyword in REHAB_KEYWORDS)
+
+    # Chấn thương nhắc tới trong câu hỏi (VD: "đau vai") cũng là chống chỉ định
+    injuries = set(injuries) | set(QUERY_INJURY_PATTERN.findall(query_lower))
+
+    conditions = [
+        {INJURY_METADATA_KEYS[injury]: True}
+        for injury in sorted(injuries)
+        if injury in INJURY_METADATA_KEYS
+    ]
+
+    if by_category:
+        categories = []
+        remaining = query_lower
+        for keyword in sorted(QUERY_CATEGORY_KEYWORDS, key=len, reverse=True):
+            if keyword in remaining:
+                categories += QUERY_CATEGORY_KEYWORDS[keyword]
+                remaining = remaining.replace(keyword, " ")
+        if rehab:
+            categories = [c for c in categories if c in REHAB_CATEGORIES] or list(
+                REHAB_CATEGORIES
+            )
+        if categories:
+            conditions.append({"category": {"$in": sorted(set(categories))}})
+
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
@@ -0,0 +1,675 @@
+"""Bản giả lập LLM, embeddings và Neo4j để benchmark offline
+
+Không cần API key hay database: FakeChatModel gọi tool theo luật cố định,
+FakeEmbeddings băm từ khóa thành vector, FakeGraphDriver trả lời các truy vấn
+trong graph_queries.QUERIES từ dữ liệu trong bộ nhớ. Mỗi fake nhận một Latency
+để mô phỏng độ trễ mạng (phân phối lognormal có đuôi dài như API thật).
+"""
+
+import hashlib
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from typing import Any
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from gym_agent_test.fast_path import parse_measurements
+from gym_agent_test.graph_queries import NODE_LABELS, QUERY_NAMES
+from gym_agent_test.memory import estimate_tokens
+from gym_agent_test.tracing import span
+
+
+class Latency:
+    """Độ trễ giả lập: lognormal quanh median_ms, sigma=0 là độ trễ cố định"""
+
+    def __init__(self, median_ms: float = 0.0, sigma: float = 0.0, seed: int = 0):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        """Một mẫu độ trễ (giây)"""
+        if self.median_ms <= 0:
+            return 0.0
+        if self.sigma <= 0:
+            return self.median_ms / 1000
+        with self._lock:
+            return self._rng.lognormvariate(math.log(self.median_ms), self.sigma) / 1000
+
+    def sleep(self) -> float:
+        delay = self.sample()
+        if delay:
+            time.sleep(delay)
+        return delay
+
+
+NO_LATENCY = Latency()
+
+# ----------------------------------------------------------------------------
+# LLM
+# ----------------------------------------------------------------------------
+
+# Tool -> từ khóa kích hoạt; câu hỏi khớp nhiều nhóm thì gọi song song nhiều tool
+TOOL_ROUTES = {
+    "meal_plan_tool": ("thực đơn", "meal plan"),
+    "similar_dish_tool": ("giống", "tương tự"),
+    "nutrition_advisor_rag": (
+        "món",
+        "ăn",
+        "calo",
+        "protein",
+        "carb",
+        "phở",
+        "bún",
+        "cơm",
+        "nguyên liệu",
+        "dinh dưỡng",
+    ),
+    "exercise_advisor_rag": ("bài tập", "tập", "đau", "chấn thương", "nhóm cơ"),
+    "gym_advice_tool": ("gym", "tăng cơ", "giảm cân", "lời khuyên"),
+}
+
+
+def _text(message) -> str:
+    return message.content if isinstance(message.content, str) else str(message.content)
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model tất định: lượt đầu gọi tool theo từ khóa, sau ToolMessage thì trả lời
+
+    Chỉ gọi các tool đã bind; câu hỏi bài tập dùng gym_advice_tool khi không có
+    exercise_advisor_rag (như prompt của các entry point).
+    """
+
+    latency: Any = NO_LATENCY
+    # Thời gian sinh mỗi token output, cộng thêm vào latency
+    ms_per_output_token: float = 0.0
+    answer_chars: int = 400
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-gym-chat"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def plan_tool_calls(self, text: str, tools) -> list:
+        """Các tool call cho câu hỏi, theo thứ tự TOOL_ROUTES"""
+        schemas = {tool["function"]["name"]: tool["function"] for tool in tools}
+        text_lower = text.lower()
+        calls = []
+
+        # LLM tự suy ra số đo kể cả khi không ghi đơn vị
+        measurements = parse_measurements(text_lower, units_only=False)
+        if measurements and "calc_bmi" in schemas:
+            calls.append(("calc_bmi", "{:.2f},{:g}".format(*measurements)))
+        for name, keywords in TOOL_ROUTES.items():
+            if name == "exercise_advisor_rag" and name not in schemas:
+                name = "gym_advice_tool"
+            called = {call[0] for call in calls}
+            if (
+                name not in schemas
+                or name in called
+                or (name == "gym_advice_tool" and "exercise_advisor_rag" in called)
+                or not any(k in text_lower for k in keywords)
+            ):
+                continue
+            calls.append((name, text))
+
+        tool_calls = []
+        for index, (name, value) in enumerate(calls):
+            properties = schemas[name].get("parameters", {}).get("properties", {})
+            argument = next(iter(properties), "query")
+            tool_calls.append(
+                {
+                    "name": name,
+                    "args": {argument: value},
+                    "id": f"call_{index}_{zlib.crc32(text.encode()):08x}",
+                }
+            )
+        return tool_calls
+
+    def _answer(self, text: str, tool_outputs) -> str:
+        if tool_outputs:
+            body = "\n".join(output[: self.answer_chars] for output in tool_outputs)
+        else:
+            body = f"Mình đã ghi nhận câu hỏi: {text}"
+        return body[: self.answer_chars]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        last_human = max(
+            (i for i, m in enumerate(messages) if isinstance(m, HumanMessage)),
+            default=-1,
+        )
+        text = _text(messages[last_human]) if last_human >= 0 else ""
+        tool_outputs = [
+            _text(m) for m in messages[last_human + 1 :] if isinstance(m, ToolMessage)
+        ]
+
+        tool_calls = []
+        if not tool_outputs and kwargs.get("tools"):
+            tool_calls = self.plan_tool_calls(text, kwargs["tools"])
+        content = "" if tool_calls else self._answer(text, tool_outputs)
+
+        input_tokens = sum(estimate_tokens(_text(m)) for m in messages)
+        output_tokens = estimate_tokens(content) + 20 * len(tool_calls)
+        time.sleep(
+            self.latency.sample() + output_tokens * self.ms_per_output_token / 1000
+        )
+
+        message = AIMessage(
+            content=content,
+            tool_calls=tool_calls,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+# ----------------------------------------------------------------------------
+# Embeddings
+# ----------------------------------------------------------------------------
+
+
+class FakeEmbeddings(Embeddings):
+    """Feature hashing các từ và cặp từ liền nhau thành vector chuẩn hóa L2
+
+    Văn bản chung từ khóa có cosine cao, nên truy hồi vẫn có nghĩa khi benchmark.
+    """
+
+    def __init__(self, dimensions: int = 256, latency: Latency = NO_LATENCY):
+        self.dimensions = dimensions
+        self.latency = latency
+        self.calls = 0
+
+    def _embed(self, text: str) -> list:
+        words = re.findall(r"\w+", text.lower())
+        vector = np.zeros(self.dimensions)
+        for feature in words + [" ".join(pair) for pair in zip(words, words[1:])]:
+            digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.dimensions] += 1.0 if value >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts) -> list:
+        with span("embeddings", model="fake", texts=len(texts)):
+            self.calls += 1
+            self.latency.sleep()
+            return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list:
+        return self.embed_documents([text])[0]
+
+
+# ----------------------------------------------------------------------------
+# Neo4j
+# ----------------------------------------------------------------------------
+
+# Nguyên liệu: (calories, protein, carbs, fat) trên 100g và benefit
+INGREDIENTS = {
+    "thịt bò": ((250, 26, 0, 15), ["Giàu sắt", "Tăng cơ"]),
+    "thịt gà": ((165, 31, 0, 4), ["Protein cao", "Tăng cơ"]),
+    "thịt heo": ((242, 27, 0, 14), ["Protein cao"]),
+    "tôm": ((99, 24, 0, 0), ["Protein cao", "Ít calories"]),
+    "cá": ((120, 22, 0, 3), ["Omega-3", "Tim mạch"]),
+    "trứng": ((155, 13, 1, 11), ["Protein cao"]),
+    "bánh phở": ((110, 2, 25, 0), ["Năng lượng"]),
+    "bún": ((110, 2, 25, 0), ["Năng lượng"]),
+    "gạo": ((130, 3, 28, 0), ["Năng lượng"]),
+    "bánh mì": ((265, 9, 49, 3), ["Năng lượng"]),
+    "rau xanh": ((25, 2, 4, 0), ["Rau xanh", "Vitamin C"]),
+    "hành lá": ((32, 2, 7, 0), ["Miễn dịch"]),
+    "gừng": ((80, 2, 18, 1), ["Tiêu hóa"]),
+    "sả": ((99, 2, 25, 0), ["Tiêu hóa"]),
+    "cà chua": ((18, 1, 4, 0), ["Vitamin C"]),
+    "me": ((239, 3, 63, 1), ["Vitamin C"]),
+    "đậu xanh": ((347, 24, 63, 1), ["Tiêu hóa", "Năng lượng"]),
+    "xương bò": ((120, 10, 0, 9), ["Collagen", "Khớp"]),
+}
+
+# Món: (tên, cuisine, calories, protein, carbs, fat, [(nguyên liệu, gram)], benefit)
+DISHES = [
+    ("Phở bò", "Miền Bắc", 350, 15, 45, 12, [("bánh phở", 200), ("thịt bò", 80), ("xương bò", 50), ("hành lá", 10), ("gừng", 5)], ["Collagen", "Tốt cho khớp và da"]),
+    ("Phở gà", "Miền Bắc", 320, 18, 44, 8, [("bánh phở", 200), ("thịt gà", 90), ("hành lá", 10), ("gừng", 5)], ["Protein cao", "Dễ tiêu"]),
+    ("Bún bò Huế", "Miền Trung", 400, 18, 50, 14, [("bún", 200), ("thịt bò", 80), ("sả", 10), ("xương bò", 50)], ["Năng lượng"]),
+    ("Bún chả Hà Nội", "Miền Bắc", 420, 22, 35, 20, [("bún", 180), ("thịt heo", 100), ("rau xanh", 50)], ["Cân bằng dinh dưỡng"]),
+    ("Cơm tấm", "Miền Nam", 450, 20, 60, 15, [("gạo", 200), ("thịt heo", 100), ("trứng", 50)], ["Protein cao", "Phục hồi sau tập"]),
+    ("Bánh mì thịt", "Miền Nam", 380, 16, 42, 18, [("bánh mì", 100), ("thịt heo", 60), ("rau xanh", 20)], ["Năng lượng", "Pre-workout"]),
+    ("Gỏi cuốn tôm thịt", "Miền Nam", 180, 12, 20, 6, [("tôm", 50), ("thịt heo", 30), ("bún", 50), ("rau xanh", 40)], ["Giảm cân", "Rau xanh"]),
+    ("Chả cá Lã Vọng", "Miền Bắc", 280, 25, 8, 16, [("cá", 150), ("hành lá", 20)], ["Omega-3", "Tim mạch", "Não bộ"]),
+    ("Canh chua cá", "Miền Nam", 150, 18, 12, 4, [("cá", 100), ("cà chua", 50), ("me", 10), ("rau xanh", 50)], ["Ít calories", "Vitamin C", "Miễn dịch"]),
+    ("Thịt kho tàu", "Miền Nam", 380, 28, 15, 24, [("thịt heo", 150), ("trứng", 50)], ["Tăng cơ"]),
+    ("Gà luộc", "Miền Bắc", 200, 30, 0, 8, [("thịt gà", 150), ("gừng", 5)], ["Protein cao", "Tăng cơ", "Ít calories"]),
+    ("Cháo gà", "Miền Bắc", 180, 12, 28, 3, [("gạo", 60), ("thịt gà", 60), ("gừng", 5)], ["Dễ tiêu", "Tiêu hóa"]),
+    ("Bò lúc lắc", "Miền Nam", 350, 26, 12, 22, [("thịt bò", 150), ("cà chua", 30)], ["Protein cao", "Tăng cơ"]),
+    ("Chè đậu xanh", "Miền Bắc", 220, 6, 42, 4, [("đậu xanh", 60)], ["Năng lượng"]),
+    ("Tôm rang me", "Miền Nam", 260, 22, 18, 12, [("tôm", 150), ("me", 20)], ["Protein cao"]),
+]  # fmt: skip
+
+
+COUNT_QUERIES = {f"count_{label.lower()}": label for label in NODE_LABELS}
+
+
+class FakeRecord:
+    """Record tối giản tương thích neo4j.Record: record[key], get, keys, data"""
+
+    __slots__ = ("_values",)
+
+    def __init__(self, values: dict):
+        self._values = values
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+    def keys(self):
+        return list(self._values)
+
+    def data(self) -> dict:
+        return dict(self._values)
+
+
+class FakeSummary:
+    """Tương ứng ResultSummary: thời gian (ms) server trả kết quả và đọc hết"""
+
+    def __init__(self, query: str, parameters: dict, available_ms: int):
+        self.query = query
+        self.parameters = parameters
+        self.result_available_after = available_ms
+        self.result_consumed_after = 0
+        self.profile = None
+
+
+class FakeResult:
+    def __init__(self, records, summary: FakeSummary):
+        self._records = records
+        self._summary = summary
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def single(self):
+        return self._records[0] if self._records else None
+
+    def data(self) -> list:
+        return [record.data() for record in self._records]
+
+    def consume(self) -> FakeSummary:
+        return self._summary
+
+
+class FakeGraph:
+    """Dữ liệu graph trong bộ nhớ và handler Python cho từng truy vấn có tên"""
+
+    def __init__(self, dishes=DISHES, ingredients=INGREDIENTS):
+        self.ingredients = dict(ingredients)
+        self.dishes = []
+        for name, cuisine, calories, protein, carbs, fat, uses, benefits in dishes:
+            self.dishes.append(
+                {
+                    "name": name,
+                    "cuisine": cuisine,
+                    "calories": calories,
+                    "protein_g": protein,
+                    "carbs_g": carbs,
+                    "fat_g": fat,
+                    "ingredients": list(uses),
+                    "benefits": list(benefits),
+                }
+            )
+        # Quan hệ SIMILAR_TO: tên món -> danh sách {name, score, jaccard, ...}
+        self.similar = {}
+
+    @classmethod
+    def synthetic(cls, dish_count: int, seed: int = 42):
+        """Nhân DISHES thành dish_count món (biến thể lệch macro ±20%)"""
+        rng = random.Random(seed)
+        dishes = list(DISHES)
+        while len(dishes) < dish_count:
+            name, cuisine, *macros, uses, benefits = rng.choice(DISHES)
+            macros = [round(value * rng.uniform(0.8, 1.2)) for value in macros]
+            dishes.append((f"{name} {len(dishes)}", cuisine, *macros, uses, benefits))
+        return cls(dishes[:dish_count])
+
+    # --- chuyển đổi dòng kết quả ---
+
+    def _ingredient(self, name: str, quantity) -> dict:
+        return {
+            "name": name,
+            "quantity": quantity,
+            "benefits": list(self.ingredients.get(name, ((), []))[1]),
+        }
+
+    @staticmethod
+    def _macros(dish) -> dict:
+        return {
+            "dish_name": dish["name"],
+            "calories": dish["calories"],
+            "protein": dish["protein_g"],
+            "carbs": dish["carbs_g"],
+            "fat": dish["fat_g"],
+        }
+
+    def _full(self, dish) -> dict:
+        return {
+            **self._macros(dish),
+            "ingredients": [self._ingredient(n, q) for n, q in dish["ingredients"]],
+            "benefits": list(dish["benefits"]),
+        }
+
+    def _benefit_names(self) -> set:
+        names = {b for dish in self.dishes for b in dish["benefits"]}
+        return names | {b for _, bs in self.ingredients.values() for b in bs}
+
+    # --- handler theo tên truy vấn ---
+
+    def ping(self):
+        return [{"test": 1}]
+
+    def count(self, label: str):
+        counts = {
+            "Dish": len(self.dishes),
+            "Cuisine": len({dish["cuisine"] for dish in self.dishes}),
+            "Tag": 0,
+            "Ingredient": len(self.ingredients),
+            "Macro": len(self.ingredients),
+            "Benefit": len(self._benefit_names()),
+        }
+        return [{"count": counts[label]}]
+
+    def count_nodes(self):
+        return [{"total": sum(self.count(l)[0]["count"] for l in NODE_LABELS)}]
+
+    def count_relationships(self):
+        total = sum(
+            1 + len(dish["ingredients"]) + len(dish["benefits"]) for dish in self.dishes
+        )
+        total += sum(1 + len(bs) for _, bs in self.ingredients.values())
+        return [{"total": total}]
+
+    def ingredient_names(self):
+        return [{"name": name.lower()} for name in self.ingredients]
+
+    def sample_dishes(self):
+        return [{"name": dish["name"]} for dish in self.dishes[:5]]
+
+    def clear_graph(self):
+        self.dishes, self.ingredients = [], {}
+        return []
+
+    def dish_by_name(self, keyword):
+        keyword = keyword.lower()
+        return [
+            {**self._full(dish), "cuisine": dish["cuisine"]}
+            for dish in self.dishes
+            if keyword in dish["name"].lower()
+        ][:5]
+
+    def dish_summary_by_name(self, keyword):
+        keyword = keyword.lower()
+        return [
+            {
+                **self._macros(dish),
+                "summary": dish.get("summary"),
+            }
+            for dish in self.dishes
+            if keyword in dish["name"].lower()
+        ][:5]
+
+    def dish_summary_source(self, names=None):
+        wanted = set(names) if names is not None else None
+        return [
+            {
+                "name": dish["name"],
+                "summary": dish.get("summary"),
+                "signature": dish.get("summary_signature"),
+                "cuisine": dish["cuisine"],
+                "ingredients": [self._ingredient(n, q) for n, q in dish["ingredients"]],
+                "benefits": list(dish["benefits"]),
+            }
+            for dish in self.dishes
+            if wanted is None or dish["name"] in wanted
+        ]
+
+    def write_dish_summaries(self, rows):
+        written = {row["name"]: row for row in rows}
+        for dish in self.dishes:
+            if dish["name"] in written:
+                dish["summary"] = written[dish["name"]]["summary"]
+                dish["summary_signature"] = written[dish["name"]]["signature"]
+        return []
+
+    def clear_dish_summaries(self, names):
+        for dish in self.dishes:
+            if dish["name"] in names:
+                dish.pop("summary", None)
+                dish.pop("summary_signature", None)
+        return []
+
+    def dishes_by_ingredients(self, ingredient_names, limit=5):
+        wanted = set(ingredient_names)
+        rows = []
+        for dish in self.dishes:
+            matched = [(n, q) for n, q in dish["ingredients"] if n.lower() in wanted]
+            if matched:
+                rows.append(
+                    {
+                        **self._full(dish),
+                        "matched_ingredients": [
+                            self._ingredient(n, q) for n, q in matched
+                        ],
+                        "match_count": len(matched),
+                    }
+                )
+        rows.sort(key=lambda row: (-row["match_count"], row["calories"]))
+        return rows[:limit]
+
+    def dishes_by_calories(self, target_cal):
+        rows = [
+            {**self._macros(dish), "benefits": list(dish["benefits"])}
+            for dish in self.dishes
+            if abs(dish["calories"] - target_cal) <= 50
+        ]
+        rows.sort(key=lambda row: abs(row["calories"] - target_cal))
+        return rows[:5]
+
+    def dishes_by_benefit(self, search_terms):
+        terms = [term.lower() for term in search_terms]
+        # Cypher trả một dòng cho mỗi cặp (món, benefit) khớp
+        rows = [
+            self._macros(dish)
+            for dish in self.dishes
+            for benefit in dish["benefits"]
+            if any(term in benefit.lower() for term in terms)
+        ]
+        return rows[:5]
+
+    def high_protein_dishes(self):
+        dishes = [dish for dish in self.dishes if dish["protein_g"] >= 20]
+        dishes.sort(key=lambda dish: -dish["protein_g"])
+        return [self._macros(dish) for dish in dishes[:5]]
+
+    def low_calorie_dishes(self):
+        dishes = [dish for dish in self.dishes if dish["calories"] <= 250]
+        dishes.sort(key=lambda dish: dish["calories"])
+        return [self._macros(dish) for dish in dishes[:5]]
+
+    def ingredient_macros(self, search_term):
+        term = search_term.lower()
+        rows = []
+        for name, ((calories, protein, carbs, fat), _) in self.ingredients.items():
+            if term in name.lower():
+                rows.append(
+                    {
+                        "ingredient": name,
+                        "calories": calories,
+                        "protein": protein,
+                        "carbs": carbs,
+                        "fat": fat,
+                    }
+                )
+        return rows[:5]
+
+    def dish_catalog(self):
+        return [
+            {
+                "name": dish["name"],
+                "calories": dish["calories"],
+                "protein": dish["protein_g"],
+                "carbs": dish["carbs_g"],
+                "fat": dish["fat_g"],
+                "ingredients": [n.lower() for n, _ in dish["ingredients"]],
+            }
+            for dish in self.dishes
+        ]
+
+    def dish_name_index(self):
+        return []
+
+    def similarity_state(self):
+        names = {dish["name"] for dish in self.dishes}
+        return [
+            {
+                "name": dish["name"],
+                "signature": dish.get("similarity_signature"),
+                "similar_count": dish.get("similar_count"),
+                "neighbors": [
+                    {"name": n["name"], "score": n["score"]}
+                    for n in self.similar.get(dish["name"], [])
+                    if n["name"] in names
+                ],
+            }
+            for dish in self.dishes
+        ]
+
+    def write_similar(self, rows):
+        dishes = {dish["name"]: dish for dish in self.dishes}
+        for row in rows:
+            dish = dishes.get(row["name"])
+            if dish is None:
+                continue
+            dish["similarity_signature"] = row["signature"]
+            dish["similar_count"] = len(row["neighbors"])
+            self.similar[dish["name"]] = [
+                dict(n) for n in row["neighbors"] if n["name"] in dishes
+            ]
+        return []
+
+    def similar_dishes(self, dish_name, goal=None, limit=5):
+        dishes = {dish["name"]: dish for dish in self.dishes}
+        source = dishes.get(dish_name)
+        if source is None:
+            return []
+        rows = []
+        for neighbor in self.similar.get(dish_name, []):
+            dish = dishes.get(neighbor["name"])
+            if dish is None:
+                continue
+            if goal == "lower_calorie" and not dish["calories"] < source["calories"]:
+                continue
+            if goal == "higher_protein" and not dish["protein_g"] > source["protein_g"]:
+                continue
+            rows.append(
+                {
+                    "source": source["name"],
+                    "source_calories": source["calories"],
+                    "source_protein": source["protein_g"],
+                    **self._macros(dish),
+                    "score": neighbor["score"],
+                    "jaccard": neighbor["jaccard"],
+                }
+            )
+        rows.sort(key=lambda row: -row["score"])
+        return rows[:limit]
+
+    def profile(self, name: str, rows: int) -> dict:
+        """Plan giả cho PROFILE: quét toàn bộ Dish rồi trả kết quả"""
+        scanned = len(self.dishes) if "dish" in name else len(self.ingredients)
+        return {
+            "operatorType": "ProduceResults@fake",
+            "dbHits": 0,
+            "rows": rows,
+            "children": [
+                {
+                    "operatorType": "NodeByLabelScan@fake",
+                    "dbHits": scanned + 1,
+                    "rows": scanned,
+                    "children": [],
+                }
+            ],
+        }
+
+    def answer(self, name: str, params: dict) -> list:
+        if name in COUNT_QUERIES:
+            return self.count(COUNT_QUERIES[name])
+        return getattr(self, name)(**params)
+
+
+class FakeSession:
+    def __init__(self, driver: "FakeGraphDriver"):
+        self._driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        pass
+
+    def run(self, query, parameters=None, **kwargs):
+        profile = query.startswith("PROFILE ")
+        name = QUERY_NAMES.get(query[len("PROFILE ") :] if profile else query)
+        if name is None:
+            raise ValueError(f"Fake graph không hỗ trợ truy vấn: {query.strip()[:80]}")
+        params = {**(parameters or {}), **kwargs}
+        delay = self._driver.latency_for(name).sleep()
+        records = [FakeRecord(row) for row in self._driver.graph.answer(name, params)]
+        self._driver.queries[name] = self._driver.queries.get(name, 0) + 1
+        summary = FakeSummary(query, params, round(delay * 1000))
+        if profile:
+            summary.profile = self._driver.graph.profile(name, len(records))
+        return FakeResult(records, summary)
+
+
+class FakeGraphDriver:
+    """Thay cho neo4j.Driver: session(database=...) -> FakeSession
+
+    query_latency cho phép đặt độ trễ riêng theo tên truy vấn.
+    """
+
+    def __init__(self, graph=None, latency=NO_LATENCY, query_latency=None):
+        self.graph = graph or FakeGraph()
+        self.latency = latency
+        self.query_latency = query_latency or {}
+        # Số lần chạy theo tên truy vấn
+        self.queries = {}
+
+    def latency_for(self, name: str) -> Latency:
+        return self.query_latency.get(name, self.latency)
+
+    def session(self, database=None, **kwargs) -> FakeSession:
+        return FakeSession(self)
+
+    def verify_connectivity(self):
+        pass
+
+    def close(self):
+        pass
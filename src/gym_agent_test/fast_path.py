@@ -0,0 +1,159 @@
+"""Pre-router chấm điểm độ tin cậy cho các câu hỏi xác định (BMI, tra cứu món ăn)
+
+Câu hỏi có độ tin cậy cao được trả lời trực tiếp bằng tool + template, không cần
+gọi LLM; câu hỏi mơ hồ (so sánh, hỏi có phù hợp không...) vẫn đi qua agent.
+"""
+
+import re
+
+from gym_agent_test.profile_extraction import extract_profile_slots
+
+# Ngưỡng tin cậy để trả lời trực tiếp không qua agent
+FAST_PATH_THRESHOLD = 0.85
+
+BMI_KEYWORDS = ("bmi", "chỉ số khối")
+# Cặp "chiều_cao,cân_nặng" đúng định dạng input của calc_bmi (VD: "1.75,70"),
+# chỉ nhận khi câu có BMI_KEYWORDS
+BMI_PAIR_PATTERN = re.compile(
+    r"(?<![\d.,])([12](?:\.\d{1,2})?)\s*,\s*(\d{2,3}(?:\.\d+)?)(?![\d.,])"
+)
+BMI_WEAK_KEYWORDS = ("chỉ số", "tính", "cân nặng", "chiều cao")
+NUTRIENT_KEYWORDS = (
+    "calo",
+    "kcal",
+    "bao nhiêu",
+    "protein",
+    "đạm",
+    "carb",
+    "chất béo",
+    "fat",
+    "macro",
+    "dinh dưỡng",
+)
+# Câu hỏi cần suy luận/tư vấn thì để agent trả lời
+AMBIGUOUS_KEYWORDS = (
+    "phù hợp",
+    "nên",
+    "có tốt",
+    "so với",
+    "so sánh",
+    "hay là",
+    "thay",
+    "tại sao",
+    "giảm cân",
+    "tăng cơ",
+    "thực đơn",
+)
+
+
+def parse_measurements(text: str, units_only: bool = True):
+    """Trích (chiều cao m, cân nặng kg) từ câu, None nếu thiếu một trong hai
+
+    Mặc định chỉ nhận số đo có đơn vị ("1m6", "170cm", "65kg") để không nhầm
+    tuổi hay số khác trong câu thành cân nặng.
+    """
+    slots = extract_profile_slots(text, units_only=units_only)
+    if slots["height"] is None or slots["weight"] is None:
+        return None
+    return slots["height"], slots["weight"]
+
+
+def parse_bmi_pair(text: str):
+    """(chiều cao m, cân nặng kg) từ cặp "1.75,70" như input của calc_bmi"""
+    match = BMI_PAIR_PATTERN.search(text)
+    if not match:
+        return None
+    return float(match.group(1)), float(match.group(2))
+
+
+def score_bmi(text_lower: str):
+    """Độ tin cậy của intent tính BMI và các slot chiều cao/cân nặng"""
+    has_keyword = any(keyword in text_lower for keyword in BMI_KEYWORDS)
+    measurements = parse_measurements(text_lower)
+    if not measurements and has_keyword:
+        measurements = parse_bmi_pair(text_lower)
+    if not measurements:
+        return 0.0, {}
+    slots = {"height": measurements[0], "weight": measurements[1]}
+    if has_keyword:
+        return 0.95, slots
+    if any(keyword in text_lower for keyword in BMI_WEAK_KEYWORDS):
+        return 0.6, slots
+    return 0.3, slots
+
+
+def find_dishes(text_lower: str, dish_names):
+    """Các món có tên xuất hiện trong câu, ưu tiên tên dài (VD: 'bún bò huế' > 'bún bò')"""
+    found = []
+    for name in sorted(dish_names, key=len, reverse=True):
+        key = name.lower()
+        if (
+            key
+            and key in text_lower
+            and not any(key in other.lower() for other in found)
+        ):
+            found.append(name)
+    return found
+
+
+def score_dish_lookup(text_lower: str, dish_names):
+    """Độ tin cậy của intent tra cứu dinh dưỡng một món cụ thể"""
+    dishes = find_dishes(text_lower, dish_names)
+    if not dishes:
+        return 0.0, {}
+    slots = {"dish": dishes[0]}
+    if not any(keyword in text_lower for keyword in NUTRIENT_KEYWORDS):
+        return 0.4, slots
+    if len(dishes) > 1 or any(keyword in text_lower for keyword in AMBIGUOUS_KEYWORDS):
+        return 0.5, slots
+    return 0.9, slots
+
+
+def route_query(user_input: str, dish_names=()):
+    """Chọn intent có độ tin cậy cao nhất
+
+    Trả về dict {"intent": "bmi" | "dish_lookup" | None, "confidence", "slots"}
+    """
+    text_lower = user_input.lower()
+    best = {"intent": None, "confidence": 0.0, "slots": {}}
+    for intent, (confidence, slots) in (
+        ("bmi", score_bmi(text_lower)),
+        ("dish_lookup", score_dish_lookup(text_lower, dish_names)),
+    ):
+        if confidence > best["confidence"]:
+            best = {"intent": intent, "confidence": confidence, "slots": slots}
+    return best
+
+
+def is_confident(decision: dict, threshold: float = FAST_PATH_THRESHOLD) -> bool:
+    return decision["intent"] is not None and decision["confidence"] >= threshold
+
+
+def render_bmi(height: float, weight: float, bmi_result: str) -> str:
+    """Template câu trả lời BMI"""
+    return (
+        f"📊 Với chiều cao {height:.2f} m và cân nặng {weight:g} kg: {bmi_result}\n\n"
+        "💡 Hãy cho tôi biết mục tiêu (tăng cơ, giảm cân...) để tôi gợi ý "
+        "chế độ tập luyện và dinh dưỡng phù hợp!"
+    )
+
+
+def render_dish(name: str, macros: dict, ingredients=()) -> str:
+    """Template câu trả lời dinh dưỡng của một món"""
+
+    def fmt(value, unit):
+        return "?" if value is None else f"{value:g}{unit}"
+
+    lines = [
+        f"🍜 **{name}** (1 phần):",
+        f"🔥 Calories: {fmt(macros.get('calories'), ' kcal')}",
+        f"💪 Protein: {fmt(macros.get('protein'), 'g')} | "
+        f"🍚 Carbs: {fmt(macros.get('carbs'), 'g')} | "
+        f"🥑 Fat: {fmt(macros.get('fat'), 'g')}",
+    ]
+    if ingredients:
+        lines.append(f"🥬 Nguyên liệu: {', '.join(list(ingredients)[:8])}")
+    lines.append(
+        "\n💡 Muốn biết món này có phù hợp với mục tiêu của bạn không? Cứ hỏi tôi nhé!"
+    )
+    return "\n".join(lines)
@@ -0,0 +1,328 @@
+"""Danh mục Cypher có tên cho GraphRAG (Neo4j)
+
+Mọi truy vấn của main_RAG_Graph và meal_plan đi qua run_query(session, name, ...),
+nên fake graph trong fakes.py, tracing và profiling đều nhận diện được truy vấn
+theo tên thay vì theo chuỗi Cypher.
+"""
+
+import time
+
+from gym_agent_test.query_profile import profile_stats, profiled, record_execution
+from gym_agent_test.tracing import span
+
+NODE_LABELS = ("Dish", "Cuisine", "Tag", "Ingredient", "Macro", "Benefit")
+# Số món trả về cho truy vấn theo nguyên liệu ($limit của DISHES_BY_INGREDIENTS)
+INGREDIENT_MATCH_LIMIT = 5
+
+# Món ăn kèm cuisine, nguyên liệu (định lượng + benefit) và benefit của món
+DISH_BY_NAME = """
+    MATCH (d:Dish)
+    WHERE toLower(d.name) CONTAINS toLower($keyword)
+    OPTIONAL MATCH (d)-[:BELONGS_TO]->(c:Cuisine)
+    OPTIONAL MATCH (d)-[rel:CONTAINS]->(i:Ingredient)
+    OPTIONAL MATCH (i)-[:PROVIDES_BENEFIT]->(ib:Benefit)
+    WITH d, c, rel, i, collect(DISTINCT ib.name) AS ingredient_benefits
+    WITH d,
+         c,
+         collect(
+             DISTINCT {
+                 name: i.name,
+                 quantity: rel.quantity_g,
+                 benefits: ingredient_benefits
+             }
+         ) AS ingredients
+    OPTIONAL MATCH (d)-[:HAS_BENEFIT]->(b:Benefit)
+    RETURN d.name as dish_name,
+           d.calories as calories,
+           d.protein_g as protein,
+           d.carbs_g as carbs,
+           d.fat_g as fat,
+           c.name as cuisine,
+           ingredients,
+           collect(DISTINCT b.name) as benefits
+    LIMIT 5
+"""
+
+# Hai pha: (1) xếp hạng món theo số nguyên liệu khớp và LIMIT trước, (2) chỉ
+# hydrate top-k món với nguyên liệu và benefit. Bản cũ mở rộng benefit cho mọi
+# món khớp (hai lần: nguyên liệu khớp và toàn bộ nguyên liệu) rồi mới LIMIT, nên
+# chi phí tăng theo kích thước catalog thay vì theo k.
+DISHES_BY_INGREDIENTS = """
+    MATCH (d:Dish)-[:CONTAINS]->(i:Ingredient)
+    WHERE toLower(i.name) IN $ingredient_names
+    WITH d, count(DISTINCT i) AS match_count
+    ORDER BY match_count DESC, d.calories ASC
+    LIMIT $limit
+    MATCH (d)-[rel:CONTAINS]->(i:Ingredient)
+    OPTIONAL MATCH (i)-[:PROVIDES_BENEFIT]->(ib:Benefit)
+    WITH d, match_count, rel, i, collect(DISTINCT ib.name) AS ingredient_benefits
+    WITH d,
+         match_count,
+         collect(
+             DISTINCT {
+                 name: i.name,
+                 quantity: rel.quantity_g,
+                 benefits: ingredient_benefits
+             }
+         ) AS ingredients
+    OPTIONAL MATCH (d)-[:HAS_BENEFIT]->(b:Benefit)
+    RETURN d.name AS dish_name,
+           d.calories AS calories,
+           d.protein_g AS protein,
+           d.carbs_g AS carbs,
+           d.fat_g AS fat,
+           [ing IN ingredients WHERE toLower(ing.name) IN $ingredient_names]
+               AS matched_ingredients,
+           ingredients,
+           collect(DISTINCT b.name) AS benefits,
+           match_count
+    ORDER BY match_count DESC, calories ASC
+"""
+
+DISHES_BY_CALORIES = """
+    MATCH (d:Dish)
+    WHERE d.calories <= $target_cal + 50 AND d.calories >= $target_cal - 50
+    OPTIONAL MATCH (d)-[:HAS_BENEFIT]->(b:Benefit)
+    RETURN d.name as dish_name, d.calories as calories, d.protein_g as protein,
+           d.carbs_g as carbs, d.fat_g as fat,
+           collect(DISTINCT b.name) as benefits
+    ORDER BY abs(d.calories - $target_cal)
+    LIMIT 5
+"""
+
+DISHES_BY_BENEFIT = """
+    MATCH (d:Dish)-[:HAS_BENEFIT]->(b:Benefit)
+    WHERE any(term IN $search_terms WHERE toLower(b.name) CONTAINS toLower(term))
+    RETURN d.name as dish_name, d.calories as calories,
+           d.protein_g as protein, d.carbs_g as carbs, d.fat_g as fat
+    LIMIT 5
+"""
+
+HIGH_PROTEIN_DISHES = """
+    MATCH (d:Dish)
+    WHERE d.protein_g >= 20
+    RETURN d.name as dish_name, d.calories as calories,
+           d.protein_g as protein, d.carbs_g as carbs, d.fat_g as fat
+    ORDER BY d.protein_g DESC
+    LIMIT 5
+"""
+
+LOW_CALORIE_DISHES = """
+    MATCH (d:Dish)
+    WHERE d.calories <= 250
+    RETURN d.name as dish_name, d.calories as calories,
+           d.protein_g as protein, d.carbs_g as carbs, d.fat_g as fat
+    ORDER BY d.calories ASC
+    LIMIT 5
+"""
+
+INGREDIENT_MACROS = """
+    MATCH (i:Ingredient)-[:HAS_MACRO]->(m:Macro)
+    WHERE toLower(i.name) CONTAINS toLower($search_term)
+    RETURN i.name as ingredient, m.calories_per_100g as calories,
+           m.protein_g_per_100g as protein, m.carbs_g_per_100g as carbs,
+           m.fat_g_per_100g as fat
+    LIMIT 5
+"""
+
+# Toàn bộ món ăn kèm nguyên liệu để lập thực đơn và lọc loại trừ
+DISH_CATALOG = """
+    MATCH (d:Dish)
+    OPTIONAL MATCH (d)-[:CONTAINS]->(i:Ingredient)
+    RETURN d.name AS name,
+           d.calories AS calories,
+           d.protein_g AS protein,
+           d.carbs_g AS carbs,
+           d.fat_g AS fat,
+           collect(DISTINCT toLower(i.name)) AS ingredients
+"""
+
+# Món theo tên đọc bản tóm tắt materialized (dish_summary): một node mỗi món
+DISH_SUMMARY_BY_NAME = """
+    MATCH (d:Dish)
+    WHERE toLower(d.name) CONTAINS toLower($keyword)
+    RETURN d.name AS dish_name,
+           d.calories AS calories,
+           d.protein_g AS protein,
+           d.carbs_g AS carbs,
+           d.fat_g AS fat,
+           d.summary AS summary
+    LIMIT 5
+"""
+
+# Nguồn để dựng Dish.summary ($names null là mọi món)
+DISH_SUMMARY_SOURCE = """
+    MATCH (d:Dish)
+    WHERE $names IS NULL OR d.name IN $names
+    OPTIONAL MATCH (d)-[:BELONGS_TO]->(c:Cuisine)
+    WITH d, head(collect(c.name)) AS cuisine
+    CALL {
+        WITH d
+        OPTIONAL MATCH (d)-[rel:CONTAINS]->(i:Ingredient)
+        OPTIONAL MATCH (i)-[:PROVIDES_BENEFIT]->(ib:Benefit)
+        WITH rel, i, collect(DISTINCT ib.name) AS ingredient_benefits
+        RETURN collect(
+                   DISTINCT {
+                       name: i.name,
+                       quantity: rel.quantity_g,
+                       benefits: ingredient_benefits
+                   }
+               ) AS ingredients
+    }
+    CALL {
+        WITH d
+        OPTIONAL MATCH (d)-[:HAS_BENEFIT]->(b:Benefit)
+        RETURN collect(DISTINCT b.name) AS benefits
+    }
+    RETURN d.name AS name,
+           d.summary AS summary,
+           d.summary_signature AS signature,
+           cuisine,
+           ingredients,
+           benefits
+"""
+
+WRITE_DISH_SUMMARIES = """
+    UNWIND $rows AS row
+    MATCH (d:Dish {name: row.name})
+    SET d.summary = row.summary, d.summary_signature = row.signature
+"""
+
+# Bỏ summary của các món vừa bị sửa: tra cứu quay về traversal tới lần refresh
+CLEAR_DISH_SUMMARIES = """
+    MATCH (d:Dish)
+    WHERE d.name IN $names
+    REMOVE d.summary, d.summary_signature
+"""
+
+# Trạng thái SIMILAR_TO đang lưu để refresh tăng dần (dish_similarity)
+SIMILARITY_STATE = """
+    MATCH (d:Dish)
+    OPTIONAL MATCH (d)-[s:SIMILAR_TO]->(o:Dish)
+    RETURN d.name AS name,
+           d.similarity_signature AS signature,
+           d.similar_count AS similar_count,
+           collect({name: o.name, score: s.score}) AS neighbors
+"""
+
+# Thay toàn bộ SIMILAR_TO đi ra của các món trong $rows
+WRITE_SIMILAR = """
+    UNWIND $rows AS row
+    MATCH (d:Dish {name: row.name})
+    CALL {
+        WITH d
+        MATCH (d)-[old:SIMILAR_TO]->()
+        DELETE old
+    }
+    SET d.similarity_signature = row.signature,
+        d.similar_count = size(row.neighbors)
+    WITH d, row
+    UNWIND row.neighbors AS neighbor
+    MATCH (o:Dish {name: neighbor.name})
+    CREATE (d)-[:SIMILAR_TO {
+        score: neighbor.score,
+        jaccard: neighbor.jaccard,
+        macro_distance: neighbor.macro_distance
+    }]->(o)
+"""
+
+# Món tương đồng đã tính trước: một bước SIMILAR_TO từ Dish tra theo index tên.
+# $goal: lower_calorie, higher_protein hoặc null (chỉ cần giống)
+SIMILAR_DISHES = """
+    MATCH (d:Dish {name: $dish_name})-[s:SIMILAR_TO]->(o:Dish)
+    WHERE ($goal IS NULL
+           OR ($goal = 'lower_calorie' AND o.calories < d.calories)
+           OR ($goal = 'higher_protein' AND o.protein_g > d.protein_g))
+    RETURN d.name AS source,
+           d.calories AS source_calories,
+           d.protein_g AS source_protein,
+           o.name AS dish_name,
+           o.calories AS calories,
+           o.protein_g AS protein,
+           o.carbs_g AS carbs,
+           o.fat_g AS fat,
+           s.score AS score,
+           s.jaccard AS jaccard
+    ORDER BY s.score DESC
+    LIMIT $limit
+"""
+
+QUERIES = {
+    "ping": "RETURN 1 as test",
+    **{
+        f"count_{label.lower()}": f"MATCH (n:{label}) RETURN count(n) as count"
+        for label in NODE_LABELS
+    },
+    "count_nodes": "MATCH (n) RETURN count(n) as total",
+    "count_relationships": "MATCH ()-[r]->() RETURN count(r) as total",
+    "ingredient_names": "MATCH (i:Ingredient) RETURN toLower(i.name) as name",
+    "sample_dishes": "MATCH (d:Dish) RETURN d.name as name LIMIT 5",
+    "clear_graph": "MATCH (n) DETACH DELETE n",
+    "dish_by_name": DISH_BY_NAME,
+    "dishes_by_ingredients": DISHES_BY_INGREDIENTS,
+    "dishes_by_calories": DISHES_BY_CALORIES,
+    "dishes_by_benefit": DISHES_BY_BENEFIT,
+    "high_protein_dishes": HIGH_PROTEIN_DISHES,
+    "low_calorie_dishes": LOW_CALORIE_DISHES,
+    "ingredient_macros": INGREDIENT_MACROS,
+    "dish_catalog": DISH_CATALOG,
+    "dish_summary_by_name": DISH_SUMMARY_BY_NAME,
+    "dish_summary_source": DISH_SUMMARY_SOURCE,
+    "write_dish_summaries": WRITE_DISH_SUMMARIES,
+    "clear_dish_summaries": CLEAR_DISH_SUMMARIES,
+    "dish_name_index": "CREATE INDEX dish_name IF NOT EXISTS FOR (d:Dish) ON (d.name)",
+    "similarity_state": SIMILARITY_STATE,
+    "write_similar": WRITE_SIMILAR,
+    "similar_dishes": SIMILAR_DISHES,
+}
+
+# Lệnh schema/ghi: không chạy kèm PROFILE (PROFILE không hợp lệ với CREATE INDEX,
+# còn với truy vấn ghi thì vẫn ghi thật và tốn thêm chi phí profile)
+WRITE_QUERIES = frozenset(
+    {
+        "clear_graph",
+        "clear_dish_summaries",
+        "dish_name_index",
+        "write_dish_summaries",
+        "write_similar",
+    }
+)
+
+# Tra ngược Cypher -> tên (fake graph nhận diện truy vấn được gửi tới)
+QUERY_NAMES = {cypher: name for name, cypher in QUERIES.items()}
+
+
+class QueryResult(list):
+    """Các record đã đọc hết của một truy vấn, kèm ResultSummary"""
+
+    summary = None
+
+    def single(self):
+        return self[0] if self else None
+
+
+def run_query(session, name: str, **params) -> QueryResult:
+    """Chạy truy vấn có tên trong QUERIES trên một session Neo4j
+
+    Đọc hết kết quả rồi consume() để có thời gian phía database cho tracing;
+    với CYPHER_PROFILE=1 truy vấn đọc chạy kèm PROFILE (xem query_profile).
+    """
+    with span("neo4j.query", query=name) as query_span:
+        start = time.perf_counter()
+        cypher = QUERIES[name]
+        if name not in WRITE_QUERIES:
+            cypher = profiled(cypher)
+        result = session.run(cypher, params)
+        records = QueryResult(result)
+        records.summary = result.consume()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        stats = profile_stats(getattr(records.summary, "profile", None))
+        query_span.set(
+            rows=len(records),
+            db_available_ms=records.summary.result_available_after,
+            db_consumed_ms=records.summary.result_consumed_after,
+        )
+        if stats:
+            query_span.set(db_hits=stats["db_hits"])
+    record_execution(name, params, elapsed_ms, len(records), records.summary, stats)
+    return records
@@ -0,0 +1,111 @@
+"""Lịch sử hội thoại dạng ring buffer (deque) kèm log JSONL append-only cho mỗi user"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from itertools import islice
+from pathlib import Path
+
+# Thư mục log mặc định; đặt CHAT_HISTORY_DIR="" để chỉ lưu trong bộ nhớ
+HISTORY_DIR = os.getenv("CHAT_HISTORY_DIR", ".chat_history")
+HISTORY_LIMIT = 30
+# Kích thước mỗi khối khi đọc ngược phần đuôi log
+TAIL_BLOCK_BYTES = 64 * 1024
+
+_UNSAFE_CHARS = re.compile(r"[^\w.-]")
+
+
+def history_path(user_id: str, log_dir=HISTORY_DIR):
+    """Đường dẫn file log của user (None nếu không lưu xuống đĩa)"""
+    if not log_dir:
+        return None
+    name = _UNSAFE_CHARS.sub("_", user_id)[:64]
+    if name != user_id:
+        # Tránh hai user id khác nhau trùng tên file sau khi thay ký tự
+        name += "-" + hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:10]
+    return Path(log_dir) / f"{name}.jsonl"
+
+
+def tail_lines(path: Path, n: int, block: int = TAIL_BLOCK_BYTES) -> list:
+    """n dòng cuối của file, đọc ngược từng khối từ cuối file (không đọc cả file)"""
+    if n <= 0:
+        return []
+    with path.open("rb") as f:
+        end = f.seek(0, os.SEEK_END)
+        data = b""
+        # Cần n + 1 ký tự xuống dòng để chắc chắn dòng đầu tiên lấy ra là trọn vẹn
+        while end > 0 and data.count(b"\n") <= n:
+            start = max(0, end - block)
+            f.seek(start)
+            data = f.read(end - start) + data
+            end = start
+    # Phần sau ký tự xuống dòng cuối là rỗng hoặc dòng đang ghi dở
+    lines = data.split(b"\n")[:-1]
+    if end > 0:
+        lines = lines[1:]
+    lines = [line for line in lines if line.strip()]
+    return [line.decode("utf-8", errors="replace") for line in lines[-n:]]
+
+
+class ConversationHistory:
+    """Giữ tối đa limit lượt gần nhất trong deque, ghi mỗi lượt vào log trên đĩa
+
+    Log chỉ được đọc lại (phần đuôi) ở lần truy cập đầu tiên sau khi khởi động.
+    """
+
+    def __init__(self, user_id: str, limit: int = HISTORY_LIMIT, log_dir=HISTORY_DIR):
+        self.user_id = user_id
+        self.path = history_path(user_id, log_dir)
+        self._turns = deque(maxlen=limit)
+        self._loaded = self.path is None
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if self.path.exists():
+                for line in tail_lines(self.path, self._turns.maxlen):
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Dòng ghi dở khi tiến trình bị dừng
+                    self._turns.append((record["user"], record["ai"]))
+            self._loaded = True
+
+    def append(self, user_msg: str, ai_msg: str):
+        """Thêm một lượt (O(1)); lượt cũ nhất tự bị loại khi đầy"""
+        self._ensure_loaded()
+        self._turns.append((user_msg, ai_msg))
+        if self.path is None:
+            return
+        record = {"ts": time.time(), "user": user_msg, "ai": ai_msg}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def last(self, n: int):
+        """n lượt gần nhất theo thứ tự thời gian (O(n))"""
+        self._ensure_loaded()
+        turns = list(islice(reversed(self._turns), n))
+        turns.reverse()
+        return turns
+
+    def clear(self):
+        """Xóa các lượt trong bộ nhớ (log trên đĩa giữ nguyên)"""
+        self._ensure_loaded()
+        self._turns.clear()
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._turns)
+
+    def __iter__(self):
+        self._ensure_loaded()
+        return iter(list(self._turns))
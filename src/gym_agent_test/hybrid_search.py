@@ -0,0 +1,141 @@
+"""Hybrid retrieval: BM25 (inverted index trong bộ nhớ) + vector store, gộp bằng RRF"""
+
+import math
+import re
+from collections import Counter, defaultdict
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Hằng số chuẩn của Reciprocal Rank Fusion
+RRF_K = 60
+# Số ứng viên lấy từ mỗi nhánh trước khi gộp
+CANDIDATES_PER_BRANCH = 10
+
+
+def tokenize(text: str):
+    """Tách từ đơn giản: lowercase + chuỗi ký tự chữ/số (giữ dấu tiếng Việt)"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """Inverted index BM25 cho một tập văn bản nhỏ, build một lần lúc khởi động"""
+
+    def __init__(self, texts, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)
+        self.doc_lengths = []
+
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text)
+            self.doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                self.postings[term].append((doc_id, tf))
+
+        n_docs = len(self.doc_lengths)
+        self.avg_length = sum(self.doc_lengths) / n_docs if n_docs else 0.0
+        self.idf = {
+            term: math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def search(self, query: str, k: int = CANDIDATES_PER_BRANCH, allowed=None):
+        """Trả về danh sách (doc_id, score) giảm dần theo điểm BM25
+
+        allowed: tập doc_id được phép (pre-filter theo metadata)
+        """
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                norm = self.k1 * (
+                    1 - self.b + self.b * self.doc_lengths[doc_id] / self.avg_length
+                )
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def matches_where(metadata: dict, where) -> bool:
+    """Đánh giá where-clause kiểu Chroma ($and, $or, $in, $eq, $ne) trên metadata"""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, c) for c in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, c) for c in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for op, expected in condition.items():
+                if op == "$in" and value not in expected:
+                    return False
+                if op == "$nin" and value in expected:
+                    return False
+                if op == "$eq" and value != expected:
+                    return False
+                if op == "$ne" and value == expected:
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+def reciprocal_rank_fusion(rankings, k: int = RRF_K):
+    """Gộp nhiều danh sách doc_id đã xếp hạng bằng RRF, trả về doc_id theo điểm"""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class HybridRetriever:
+    """Kết hợp BM25 (khớp từ khóa chính xác) và dense vector search"""
+
+    def __init__(self, documents, vectorstore=None):
+        self.documents = list(documents)
+        self.bm25 = BM25Index([doc.page_content for doc in self.documents])
+        self.vectorstore = vectorstore
+        self._doc_ids = {doc.page_content: i for i, doc in enumerate(self.documents)}
+
+    def allowed_ids(self, where):
+        """Tập doc_id thỏa where-clause (None nếu không lọc)"""
+        if not where:
+            return None
+        return {
+            i
+            for i, doc in enumerate(self.documents)
+            if matches_where(doc.metadata, where)
+        }
+
+    def sparse_ids(self, query: str, k: int = CANDIDATES_PER_BRANCH, where=None):
+        """Doc_id xếp hạng theo BM25"""
+        allowed = self.allowed_ids(where)
+        return [doc_id for doc_id, _ in self.bm25.search(query, k, allowed)]
+
+    def dense_ids(self, query: str, k: int = CANDIDATES_PER_BRANCH, where=None):
+        """Doc_id xếp hạng theo vector similarity (pre-filter bằng where của Chroma)"""
+        if not self.vectorstore:
+            return []
+        if where:
+            docs = self.vectorstore.similarity_search(query, k=k, filter=where)
+        else:
+            docs = self.vectorstore.similarity_search(query, k=k)
+        return [
+            self._doc_ids[doc.page_content]
+            for doc in docs
+            if doc.page_content in self._doc_ids
+        ]
+
+    def search(self, query: str, k: int = 4, where=None):
+        """Tìm top-k documents bằng RRF trên kết quả BM25 và dense"""
+        fused = reciprocal_rank_fusion(
+            [self.sparse_ids(query, where=where), self.dense_ids(query, where=where)]
+        )
+        return [self.documents[doc_id] for doc_id in fused[:k]]
@@ -0,0 +1,162 @@
+"""Bộ phân loại intent đa nhãn: một regex biên dịch sẵn, quét câu hỏi một lần
+
+Thay cho các chuỗi any(keyword in text ...) lặp lại ở nhiều entry point; trả về
+đồng thời intent (bmi, gym_advice) và các slot mục tiêu, chấn thương, benefit.
+"""
+
+import re
+
+INTENT_KEYWORDS = {
+    "bmi": ["bmi", "chỉ số", "cân nặng", "tính"],
+    "gym_advice": [
+        "gợi ý",
+        "bài tập",
+        "tập",
+        "gym",
+        "tăng cơ",
+        "giảm cân",
+        "dinh dưỡng",
+    ],
+}
+
+GOAL_KEYWORDS = {
+    "tăng cơ": ["tăng cơ", "build muscle", "muscle", "cơ bắp"],
+    "giảm cân": ["giảm cân", "lose weight", "weight loss", "gầy"],
+    "tăng sức mạnh": ["mạnh", "strength", "sức mạnh"],
+    "giữ dáng": ["giữ dáng", "maintain", "duy trì"],
+}
+
+INJURY_KEYWORDS = {
+    "vai": ["đau vai", "chấn thương vai", "vai bị", "shoulder pain"],
+    "tay": ["đau tay", "chấn thương tay", "tay bị", "arm pain"],
+    "lưng": ["đau lưng", "chấn thương lưng", "lưng bị", "back pain"],
+    "gối": ["đau gối", "chấn thương gối", "gối bị", "knee pain"],
+    "cổ tay": ["đau cổ tay", "chấn thương cổ tay", "wrist pain"],
+    "chân": ["đau chân", "chấn thương chân", "chân bị", "leg pain"],
+}
+
+# Benefit của món ăn -> các từ khóa dùng để match tên Benefit trong Neo4j
+BENEFIT_KEYWORDS = {
+    "tăng cơ": ["tăng cơ", "protein cao", "protein"],
+    "giảm cân": ["giảm cân", "ít calories", "rau xanh"],
+    "khớp": ["khớp", "collagen", "da"],
+    "tim mạch": ["tim mạch", "omega-3", "não bộ"],
+    "miễn dịch": ["miễn dịch", "vitamin c"],
+    "năng lượng": ["năng lượng", "pre-workout", "caffeine"],
+    "tiêu hóa": ["tiêu hóa", "dễ tiêu"],
+}
+
+SLOT_KEYWORDS = {
+    "goals": GOAL_KEYWORDS,
+    "injuries": INJURY_KEYWORDS,
+    "benefits": BENEFIT_KEYWORDS,
+}
+
+
+def _substrings(text: str):
+    return {text[i:j] for i in range(len(text)) for j in range(i + 1, len(text) + 1)}
+
+
+def _trie_regex(keywords) -> str:
+    """Regex alternation gộp tiền tố chung của các từ khóa (dạng trie)
+
+    Mỗi vị trí chỉ thử các nhánh theo ký tự kế tiếp thay vì lần lượt từng từ
+    khóa, nên chi phí match gần như không tăng theo số từ khóa; nhánh dài hơn
+    được thử trước nên vẫn match từ khóa dài nhất.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [
+            re.escape(char) + build(child) for char, child in node.items() if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if "" in node:
+            return f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+class IntentClassifier:
+    """Phân loại đa nhãn bằng một regex alternation của toàn bộ từ khóa
+
+    Lookahead cho phép match chồng lấn, nên kết quả giống hệt việc kiểm tra
+    `keyword in text` cho từng từ khóa nhưng chỉ quét câu một lần.
+    """
+
+    def __init__(self, label_keywords: dict):
+        keyword_labels = {}
+        for label, keywords in label_keywords.items():
+            for keyword in keywords:
+                keyword_labels.setdefault(keyword.lower(), set()).add(label)
+
+        # Từ khóa dài nhất thắng tại mỗi vị trí; các từ khóa nằm trong nó được
+        # cộng nhãn sẵn (VD: match "sức mạnh" cũng tính cho "mạnh")
+        self._labels = {
+            keyword: frozenset().union(
+                *(
+                    keyword_labels[part]
+                    for part in _substrings(keyword)
+                    if part in keyword_labels
+                )
+            )
+            for keyword in keyword_labels
+        }
+        self.keywords = sorted(keyword_labels, key=len, reverse=True)
+        self.alternation = _trie_regex(self.keywords)
+        self._pattern = re.compile(f"(?=({self.alternation}))")
+        self._order = {label: i for i, label in enumerate(label_keywords)}
+
+    def labels_for(self, keyword: str):
+        """Các nhãn ứng với một từ khóa đã match"""
+        return self._labels[keyword]
+
+    def matches(self, text_lower: str):
+        """Các cặp (vị trí, từ khóa dài nhất) match được trong câu đã lowercase"""
+        for match in self._pattern.finditer(text_lower):
+            yield match.start(), match.group(1)
+
+    def labels(self, text_lower: str):
+        """Danh sách nhãn xuất hiện trong câu (đã lowercase), theo thứ tự khai báo"""
+        found = set()
+        for _, keyword in self.matches(text_lower):
+            found |= self._labels[keyword]
+        return self.sorted_labels(found)
+
+    def sorted_labels(self, labels):
+        """Sắp xếp nhãn theo thứ tự khai báo"""
+        return sorted(labels, key=self._order.get)
+
+
+def _build_label_keywords():
+    label_keywords = dict(INTENT_KEYWORDS)
+    for slot, keywords in SLOT_KEYWORDS.items():
+        for value, terms in keywords.items():
+            label_keywords[f"{slot}:{value}"] = terms
+    return label_keywords
+
+
+_classifier = IntentClassifier(_build_label_keywords())
+
+
+def classify(text: str) -> dict:
+    """Intent và slot của câu trong một lần quét
+
+    Trả về dict {"intents": [...], "goals": [...], "injuries": [...], "benefits": [...]}
+    """
+    result = {"intents": [], **{slot: [] for slot in SLOT_KEYWORDS}}
+    for label in _classifier.labels(text.lower()):
+        slot, _, value = label.partition(":")
+        if value:
+            result[slot].append(value)
+        else:
+            result["intents"].append(label)
+    return result
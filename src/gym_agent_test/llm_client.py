@@ -0,0 +1,182 @@
+"""Client Gemini dùng chung cho mọi entry point
+
+Một instance cho mỗi cấu hình (tái sử dụng kết nối), timeout cho từng request,
+retry có jitter cho lỗi 429/503, token bucket theo quota, giới hạn số request đồng
+thời và hedged request (gửi thêm một bản khi request đầu chậm) cho độ trễ đuôi.
+Cấu hình qua biến môi trường LLM_*.
+"""
+
+import functools
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from google.api_core.exceptions import (
+    DeadlineExceeded,
+    ResourceExhausted,
+    ServiceUnavailable,
+)
+from langchain_core.rate_limiters import InMemoryRateLimiter
+from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+
+from gym_agent_test.metrics import record_cache
+from gym_agent_test.tracing import span
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+EMBEDDING_MODEL = "models/text-embedding-004"
+LLM_TEMPERATURE = 0.7
+
+# Timeout mỗi request và tổng thời gian tối đa cho một lượt gọi (kể cả retry)
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "90"))
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", "3"))
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 20.0
+# Quota: số request mỗi phút, cho phép burst tối đa LLM_BURST request
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+LLM_BURST = int(os.getenv("LLM_BURST", "5"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# Gửi request dự phòng nếu request đầu chưa xong sau số giây này (0 = tắt)
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "0"))
+
+# 429 (hết quota), 503 (quá tải), 504 (hết timeout của request)
+RETRYABLE_ERRORS = (ResourceExhausted, ServiceUnavailable, DeadlineExceeded)
+
+rate_limiter = InMemoryRateLimiter(
+    requests_per_second=LLM_REQUESTS_PER_MINUTE / 60, max_bucket_size=LLM_BURST
+)
+_concurrency = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+_hedge_executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY)
+
+
+def backoff_delay(attempt: int, base=RETRY_BASE_DELAY, cap=RETRY_MAX_DELAY) -> float:
+    """Full jitter: ngẫu nhiên trong [0, min(cap, base * 2^attempt)]"""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def call_with_retries(
+    call, attempts=LLM_RETRIES, deadline=LLM_DEADLINE, before_retry=None
+):
+    """Gọi call(), retry lỗi tạm thời với backoff có jitter trong giới hạn deadline"""
+    start = time.monotonic()
+    for attempt in range(attempts):
+        try:
+            return call()
+        except RETRYABLE_ERRORS:
+            delay = backoff_delay(attempt)
+            if attempt == attempts - 1 or time.monotonic() - start + delay > deadline:
+                raise
+            time.sleep(delay)
+            if before_retry:
+                before_retry()
+
+
+def hedged_call(call, hedge_after: float, before_hedge=None):
+    """Gửi thêm một bản của call() nếu bản đầu chưa xong sau hedge_after giây
+
+    Trả về kết quả thành công đầu tiên; bản còn lại chạy tiếp nhưng bị bỏ qua.
+    """
+    pending = {_hedge_executor.submit(call)}
+    done, _ = wait(pending, timeout=hedge_after)
+    if not done:
+        if before_hedge:
+            before_hedge()
+        pending.add(_hedge_executor.submit(call))
+
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+class GeminiChat(ChatGoogleGenerativeAI):
+    """ChatGoogleGenerativeAI với retry, hedging và giới hạn đồng thời dùng chung
+
+    Retry của thư viện được tắt (max_retries=1) vì nó retry mọi lỗi API, không
+    có jitter và có thể chờ tới hàng phút.
+    """
+
+    retry_attempts: int = LLM_RETRIES
+    deadline: float = LLM_DEADLINE
+    hedge_after: float = LLM_HEDGE_AFTER
+
+    def _acquire(self):
+        if self.rate_limiter:
+            self.rate_limiter.acquire(blocking=True)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        def attempt():
+            with _concurrency:
+                return ChatGoogleGenerativeAI._generate(
+                    self, messages, stop=stop, run_manager=run_manager, **kwargs
+                )
+
+        call = (
+            functools.partial(hedged_call, attempt, self.hedge_after, self._acquire)
+            if self.hedge_after > 0
+            else attempt
+        )
+
+        # Lần gọi đầu đã lấy token từ rate limiter trong BaseChatModel
+        return call_with_retries(
+            call, self.retry_attempts, self.deadline, before_retry=self._acquire
+        )
+
+
+class GeminiEmbeddings(GoogleGenerativeAIEmbeddings):
+    """GoogleGenerativeAIEmbeddings có span tracing cho mỗi lần gọi"""
+
+    def embed_documents(self, texts, **kwargs):
+        with span("embeddings", model=self.model, texts=len(texts)):
+            return super().embed_documents(texts, **kwargs)
+
+    def embed_query(self, text, **kwargs):
+        with span("embeddings", model=self.model, texts=1):
+            return super().embed_query(text, **kwargs)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm(
+    api_key=None, model=GEMINI_MODEL, temperature=LLM_TEMPERATURE
+) -> GeminiChat:
+    """Client chat dùng chung theo (api_key, model, temperature)"""
+    api_key = api_key or os.getenv("GOOGLE_API_KEY")
+    key = ("chat", api_key, model, temperature)
+    with _clients_lock:
+        record_cache("llm_clients", hit=key in _clients)
+        if key not in _clients:
+            _clients[key] = GeminiChat(
+                model=model,
+                api_key=api_key,
+                temperature=temperature,
+                timeout=LLM_TIMEOUT,
+                max_retries=1,
+                rate_limiter=rate_limiter,
+                # Agent gọi .stream(); tắt để mọi lượt đi qua _generate có retry
+                disable_streaming=True,
+            )
+        return _clients[key]
+
+
+def get_embeddings(api_key=None, model=EMBEDDING_MODEL) -> GeminiEmbeddings:
+    """Client embedding dùng chung, cùng timeout với client chat"""
+    api_key = api_key or os.getenv("GOOGLE_API_KEY")
+    key = ("embeddings", api_key, model)
+    with _clients_lock:
+        record_cache("llm_clients", hit=key in _clients)
+        if key not in _clients:
+            _clients[key] = GeminiEmbeddings(
+                model=model,
+                google_api_key=api_key,
+                request_options={"timeout": LLM_TIMEOUT},
+            )
+        return _clients[key]
@@ -1,7 +1,6 @@
 import os
 from dotenv import load_dotenv
 from langchain.tools import tool
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.agents import create_tool_calling_agent, AgentExecutor
 # Sẽ sử dụng conversation history đơn giản với tuple (user_input, ai_response)
@@ -13,6 +12,13 @@ from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.table import Table
 from rich import print as rich_print
 import time
+from concurrent.futures import ThreadPoolExecutor
+from gym_agent_test.advice import gym_advice
+from gym_agent_test.bmi import bmi_report
+from gym_agent_test.history_store import ConversationHistory
+from gym_agent_test.llm_client import get_llm
+from gym_agent_test.profile import PROFILE_PROMPT, format_user_profile
+from gym_agent_test.profile_extraction import update_profile
 
 # Load environment variables
 load_dotenv()
@@ -28,8 +34,8 @@ STYLE_WARNING = "bold yellow"
 STYLE_ERROR = "bold red"
 STYLE_INFO = "bold cyan"
 
-# Conversation history để duy trì ngữ cảnh
-conversation_history = []
+# Conversation history để duy trì ngữ cảnh (ring buffer 10 lượt gần nhất)
+conversation_history = ConversationHistory("cli", limit=10, log_dir=None)
 
 # User profile để lưu thông tin cá nhân
 user_profile = {
@@ -47,43 +53,13 @@ def calc_bmi(height_weight: str) -> str:
     """Tính chỉ số BMI cơ thể.
     Input: 'chiều_cao,cân_nặng' -> chiều cao (m), cân nặng (kg).
     Ví dụ: '1.70,65'"""
-    try:
-        h, w = map(float, height_weight.split(","))
-        bmi = w / (h * h)
-        if bmi < 18.5:
-            status = "Thiếu cân"
-        elif bmi < 24.9:
-            status = "Bình thường"
-        elif bmi < 29.9:
-            status = "Thừa cân"
-        else:
-            status = "Béo phì"
-        return f"BMI = {bmi:.2f} → {status}"
-    except Exception:
-        return "Sai input! Hãy nhập theo định dạng: chiều_cao,cân_nặng (VD: 1.70,65)"
+    return bmi_report(height_weight)
 
 
 @tool
 def gym_advice_tool(question: str) -> str:
     """Đưa ra lời khuyên về tập gym, bài tập, dinh dưỡng."""
-    advice_db = {
-        "tăng cơ": "💪 Gợi ý tăng cơ:\n- Tập trọng lượng nặng, ít rep (6-8 reps)\n- Nghỉ đủ giấc (7-9h/đêm)\n- Ăn nhiều protein (1.6-2.2g/kg cân nặng)",
-        "giảm cân": "🔥 Gợi ý giảm cân:\n- Cardio 30-45p/ngày\n- Deficit calories 300-500 cal\n- Tập circuit training\n- Uống đủ nước (2-3L/ngày)",
-        "tăng sức mạnh": "💪 Gợi ý tăng sức mạnh:\n- Compound exercises: squat, deadlift, bench press\n- Progressive overload\n- Nghỉ ngơi đủ giữa các set",
-        "bụng": "🏋️ Bài tập bụng:\n- Plank (30s-2p)\n- Crunches, bicycle crunches\n- Mountain climbers, russian twists",
-        "chân": "🦵 Bài tập chân:\n- Squats, lunges\n- Leg press, calf raises\n- Bulgarian split squats",
-        "tay": "💪 Bài tập tay:\n- Push-ups, pull-ups, dips\n- Bicep curls, tricep extensions\n- Overhead press",
-        "ngực": "🏋️ Bài tập ngực:\n- Bench press, push-ups\n- Dumbbell flyes, incline press",
-        "lưng": "🏋️ Bài tập lưng:\n- Pull-ups, rows\n- Lat pulldowns, deadlifts",
-        "dinh dưỡng": "🍗 Dinh dưỡng:\n- Protein: thịt, cá, trứng, sữa\n- Carbs: yến mạch, gạo lứt\n- Fats: nuts, olive oil",
-    }
-
-    question_lower = question.lower()
-    for key, advice in advice_db.items():
-        if key in question_lower:
-            return advice
-
-    return "🤔 Hỏi cụ thể hơn về: tăng cơ, giảm cân, tăng sức mạnh, bài tập bụng/chân/tay/ngực/lưng, dinh dưỡng"
+    return gym_advice(question)
 
 
 def create_agent(llm):
@@ -101,16 +77,10 @@ def create_agent(llm):
                 [
                     (
                         "system",
-                        f"""Bạn là Sgms AI - một huấn luyện viên gym chuyên nghiệp và thân thiện. 
+                        """Bạn là Sgms AI - một huấn luyện viên gym chuyên nghiệp và thân thiện. 
                 
                 QUAN TRỌNG: Bạn có thể nhớ toàn bộ cuộc trò chuyện và thông tin cá nhân để tạo cuộc hội thoại tự nhiên.
                 
-                THÔNG TIN USER HIỆN TẠI:
-                - Chiều cao: {user_profile.get('height', 'chưa có')} m
-                - Cân nặng: {user_profile.get('weight', 'chưa có')} kg  
-                - BMI: {user_profile.get('bmi', 'chưa tính')}
-                - Mục tiêu: {', '.join(user_profile.get('goals', [])) or 'chưa rõ'}
-                
                 Bạn có các tools để:
                 - Tính BMI: calc_bmi(height_weight) với format "chiều_cao,cân_nặng" VD: "1.70,65"
                 - Tư vấn gym: gym_advice_tool(question) cho câu hỏi về bài tập, dinh dưỡng
@@ -124,6 +94,7 @@ def create_agent(llm):
                 
                 Luôn trả lời bằng tiếng Việt, thân thiện và chuyên nghiệp!""",
                     ),
+                    ("system", PROFILE_PROMPT),
                     MessagesPlaceholder(variable_name="chat_history"),
                     ("human", "{input}"),
                     MessagesPlaceholder(variable_name="agent_scratchpad"),
@@ -161,7 +132,7 @@ def simple_chat(user_input: str, llm) -> str:
             context = ""
             if conversation_history:
                 context = "\n\nLịch sử cuộc trò chuyện:\n"
-                for i, (user_msg, ai_msg) in enumerate(conversation_history[-3:]):  # Chỉ lấy 3 tin nhắn gần nhất
+                for i, (user_msg, ai_msg) in enumerate(conversation_history.last(3)):  # Chỉ lấy 3 tin nhắn gần nhất
                     context += f"User: {user_msg}\nSgms AI: {ai_msg}\n\n"
             
             profile_info = f"""
@@ -232,9 +203,7 @@ def main():
             progress.add_task("[cyan]Đang kết nối Gemini API...", total=None)
             time.sleep(1)  # Hiệu ứng loading
             
-            llm = ChatGoogleGenerativeAI(
-                model="gemini-2.5-flash", api_key=api_key, temperature=0.7
-            )
+            llm = get_llm(api_key)
             
         console.print("✅ Kết nối Gemini API thành công!", style=STYLE_SUCCESS)
     except Exception as e:
@@ -257,67 +226,27 @@ def main():
 
 def extract_user_info(user_input: str):
     """Trích xuất thông tin cá nhân từ tin nhắn của user"""
-    global user_profile
-    
-    # Extract height (1.70, 1m70, 170cm, etc.)
-    import re
-    height_patterns = [
-        r'(\d+\.?\d*)\s*m(?:\s|$)',  # 1.70m, 1.7m  
-        r'(\d+)\s*cm',  # 170cm
-        r'cao\s+(\d+\.?\d*)',  # cao 1.70
-    ]
-    
-    for pattern in height_patterns:
-        match = re.search(pattern, user_input.lower())
-        if match:
-            height = float(match.group(1))
-            if height > 10:  # Likely in cm
-                height = height / 100
-            user_profile["height"] = height
-            break
-    
-    # Extract weight (70kg, 70 kg, nặng 70, etc.)
-    weight_patterns = [
-        r'(\d+\.?\d*)\s*kg',
-        r'nặng\s+(\d+\.?\d*)',
-        r'cân\s+(\d+\.?\d*)',
-    ]
-    
-    for pattern in weight_patterns:
-        match = re.search(pattern, user_input.lower())
-        if match:
-            user_profile["weight"] = float(match.group(1))
-            break
-    
-    # Extract goals
-    goal_keywords = {
-        "tăng cơ": ["tăng cơ", "build muscle", "muscle", "cơ bắp"],
-        "giảm cân": ["giảm cân", "lose weight", "weight loss", "gầy"],
-        "tăng sức mạnh": ["mạnh", "strength", "sức mạnh"],
-        "giữ dáng": ["giữ dáng", "maintain", "duy trì"]
-    }
-    
-    for goal, keywords in goal_keywords.items():
-        if any(keyword in user_input.lower() for keyword in keywords):
-            if goal not in user_profile["goals"]:
-                user_profile["goals"].append(goal)
+    update_profile(user_profile, user_input)
 
 def format_chat_history_for_agent():
     """Format conversation history for agent input"""
     chat_messages = []
-    for user_msg, ai_msg in conversation_history[-5:]:  # Lấy 5 tin nhắn gần nhất
+    for user_msg, ai_msg in conversation_history.last(5):  # Lấy 5 tin nhắn gần nhất
         chat_messages.append(("human", user_msg))
         chat_messages.append(("assistant", ai_msg))
     return chat_messages
 
+# Tính gợi ý câu hỏi trong nền trong lúc agent trả lời
+_suggestion_executor = ThreadPoolExecutor(max_workers=1)
+
+
 def get_contextual_suggestions():
     """Đưa ra gợi ý câu hỏi dựa trên user profile"""
     suggestions = []
     
-    if user_profile["height"] and user_profile["weight"]:
-        bmi = user_profile["weight"] / (user_profile["height"] ** 2)
-        user_profile["bmi"] = bmi
-        
+    # BMI được cập nhật sẵn mỗi khi profile đổi chiều cao/cân nặng
+    bmi = user_profile.get("bmi")
+    if bmi:
         if bmi < 18.5:
             suggestions.append("💡 Gợi ý: Bạn hơi gầy, muốn tăng cơ không?")
         elif bmi > 25:
@@ -335,7 +264,6 @@ def get_contextual_suggestions():
 
 def chat_loop(agent_executor, llm):
     """Main chat loop với Rich UI và conversation history"""
-    global conversation_history
     
     while True:
         try:
@@ -349,6 +277,11 @@ def chat_loop(agent_executor, llm):
                 console.print("\n🙋‍♂️ Cảm ơn bạn đã sử dụng! Hẹn gặp lại!", style=STYLE_SUCCESS)
                 break
 
+            # Profile cập nhật trước khi gọi agent; gợi ý tính trong nền song song
+            # với agent nên không nằm trên đường trả lời
+            extract_user_info(user_input)
+            suggestions = _suggestion_executor.submit(get_contextual_suggestions)
+
             # Sử dụng agent nếu có, không thì fallback
             if agent_executor:
                 try:
@@ -362,7 +295,8 @@ def chat_loop(agent_executor, llm):
                         # Tạo input với chat history
                         agent_input = {
                             "input": user_input,
-                            "chat_history": format_chat_history_for_agent()
+                            "chat_history": format_chat_history_for_agent(),
+                            "user_profile": format_user_profile(user_profile),
                         }
                         result = agent_executor.invoke(agent_input)
                     
@@ -373,15 +307,8 @@ def chat_loop(agent_executor, llm):
             else:
                 response = simple_chat(user_input, llm)
 
-            # Extract thông tin từ user input
-            extract_user_info(user_input)
-            
             # Lưu vào conversation history
-            conversation_history.append((user_input, response))
-            
-            # Giới hạn history tối đa 10 cuộc hội thoại
-            if len(conversation_history) > 10:
-                conversation_history = conversation_history[-10:]
+            conversation_history.append(user_input, response)
 
             # Hiển thị response trong panel đẹp
             response_panel = Panel(
@@ -394,10 +321,8 @@ def chat_loop(agent_executor, llm):
             console.print(response_panel)
             
             # Hiển thị gợi ý dựa trên context
-            suggestions = get_contextual_suggestions()
-            if suggestions:
-                for suggestion in suggestions[-2:]:  # Chỉ hiển thị 2 gợi ý gần nhất
-                    console.print(f"[dim blue]{suggestion}[/dim blue]")
+            for suggestion in suggestions.result()[-2:]:  # Chỉ hiển thị 2 gợi ý gần nhất
+                console.print(f"[dim blue]{suggestion}[/dim blue]")
             
             # Hiển thị số tin nhắn trong history
             if len(conversation_history) > 1:
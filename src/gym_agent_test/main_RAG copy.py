@@ -1,7 +1,6 @@
 import os
 from dotenv import load_dotenv
 from langchain.tools import tool
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.agents import create_tool_calling_agent, AgentExecutor
 from langchain_community.vectorstores import Chroma
@@ -15,6 +14,12 @@ from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.table import Table
 from rich import print as rich_print
 import time
+from concurrent.futures import ThreadPoolExecutor
+from gym_agent_test.advice import RAG_NO_MATCH, gym_advice
+from gym_agent_test.bmi import bmi_report
+from gym_agent_test.llm_client import get_embeddings, get_llm
+from gym_agent_test.profile import PROFILE_PROMPT, format_user_profile
+from gym_agent_test.profile_extraction import update_profile
 
 # Load environment variables
 load_dotenv()
@@ -63,9 +68,7 @@ def initialize_rag():
             progress.add_task("[cyan]Đang khởi tạo RAG system...", total=None)
 
             # Khởi tạo embeddings
-            embeddings = GoogleGenerativeAIEmbeddings(
-                model="models/text-embedding-004", google_api_key=api_key
-            )
+            embeddings = get_embeddings(api_key)
 
             # Dữ liệu dinh dưỡng món ăn Việt Nam
             nutrition_data = [
@@ -157,20 +160,7 @@ def calc_bmi(height_weight: str) -> str:
     """Tính chỉ số BMI cơ thể.
     Input: 'chiều_cao,cân_nặng' -> chiều cao (m), cân nặng (kg).
     Ví dụ: '1.70,65'"""
-    try:
-        h, w = map(float, height_weight.split(","))
-        bmi = w / (h * h)
-        if bmi < 18.5:
-            status = "Thiếu cân"
-        elif bmi < 24.9:
-            status = "Bình thường"
-        elif bmi < 29.9:
-            status = "Thừa cân"
-        else:
-            status = "Béo phì"
-        return f"BMI = {bmi:.2f} → {status}"
-    except Exception:
-        return "Sai input! Hãy nhập theo định dạng: chiều_cao,cân_nặng (VD: 1.70,65)"
+    return bmi_report(height_weight)
 
 
 @tool
@@ -226,18 +216,7 @@ def exercise_advisor_rag(query: str) -> str:
 @tool
 def gym_advice_tool(question: str) -> str:
     """Đưa ra lời khuyên gym tổng quát (backup cho RAG)."""
-    advice_db = {
-        "tăng cơ": "💪 Gợi ý tăng cơ:\n- Tập trọng lượng nặng, ít rep (6-8 reps)\n- Nghỉ đủ giấc (7-9h/đêm)\n- Ăn nhiều protein (1.6-2.2g/kg cân nặng)",
-        "giảm cân": "🔥 Gợi ý giảm cân:\n- Cardio 30-45p/ngày\n- Deficit calories 300-500 cal\n- Tập circuit training\n- Uống đủ nước (2-3L/ngày)",
-        "tăng sức mạnh": "💪 Gợi ý tăng sức mạnh:\n- Compound exercises: squat, deadlift, bench press\n- Progressive overload\n- Nghỉ ngơi đủ giữa các set",
-    }
-
-    question_lower = question.lower()
-    for key, advice in advice_db.items():
-        if key in question_lower:
-            return advice
-
-    return "🤔 Hỏi cụ thể hơn về: tăng cơ, giảm cân, tăng sức mạnh. Hoặc dùng RAG tools cho tư vấn chi tiết!"
+    return gym_advice(question, fallback=RAG_NO_MATCH)
 
 
 def create_agent(llm):
@@ -254,17 +233,10 @@ def create_agent(llm):
                 [
                     (
                         "system",
-                        f"""Bạn là Sgms AI - một huấn luyện viên gym chuyên nghiệp với hệ thống RAG tiên tiến.
+                        """Bạn là Sgms AI - một huấn luyện viên gym chuyên nghiệp với hệ thống RAG tiên tiến.
                 
                 QUAN TRỌNG: Bạn có thể nhớ toàn bộ cuộc trò chuyện và thông tin cá nhân để tạo cuộc hội thoại tự nhiên.
                 
-                THÔNG TIN USER HIỆN TẠI:
-                - Chiều cao: {user_profile.get('height', 'chưa có')} m
-                - Cân nặng: {user_profile.get('weight', 'chưa có')} kg  
-                - BMI: {user_profile.get('bmi', 'chưa tính')}
-                - Mục tiêu: {', '.join(user_profile.get('goals', [])) or 'chưa rõ'}
-                - Chấn thương: {', '.join(user_profile.get('injuries', [])) or 'không có'}
-                
                 TOOLS CÓ SẴN:
                 1. calc_bmi(height_weight) - Tính BMI với format "chiều_cao,cân_nặng" 
                 2. nutrition_advisor_rag(query) - RAG tư vấn dinh dưỡng món ăn Việt Nam
@@ -285,6 +257,7 @@ def create_agent(llm):
                 
                 Luôn trả lời bằng tiếng Việt, thân thiện và chuyên nghiệp!""",
                     ),
+                    ("system", PROFILE_PROMPT),
                     MessagesPlaceholder(variable_name="chat_history"),
                     ("human", "{input}"),
                     MessagesPlaceholder(variable_name="agent_scratchpad"),
@@ -402,66 +375,7 @@ def display_welcome():
 
 def extract_user_info(user_input: str):
     """Trích xuất thông tin cá nhân từ tin nhắn của user bao gồm chấn thương"""
-    global user_profile
-
-    # Extract height (1.70, 1m70, 170cm, etc.)
-    import re
-
-    height_patterns = [
-        r"(\d+\.?\d*)\s*m(?:\s|$)",
-        r"(\d+)\s*cm",
-        r"cao\s+(\d+\.?\d*)",
-    ]
-
-    for pattern in height_patterns:
-        match = re.search(pattern, user_input.lower())
-        if match:
-            height = float(match.group(1))
-            if height > 10:
-                height = height / 100
-            user_profile["height"] = height
-            break
-
-    # Extract weight
-    weight_patterns = [
-        r"(\d+\.?\d*)\s*kg",
-        r"nặng\s+(\d+\.?\d*)",
-        r"cân\s+(\d+\.?\d*)",
-    ]
-
-    for pattern in weight_patterns:
-        match = re.search(pattern, user_input.lower())
-        if match:
-            user_profile["weight"] = float(match.group(1))
-            break
-
-    # Extract goals
-    goal_keywords = {
-        "tăng cơ": ["tăng cơ", "build muscle", "muscle", "cơ bắp"],
-        "giảm cân": ["giảm cân", "lose weight", "weight loss", "gầy"],
-        "tăng sức mạnh": ["mạnh", "strength", "sức mạnh"],
-        "giữ dáng": ["giữ dáng", "maintain", "duy trì"],
-    }
-
-    for goal, keywords in goal_keywords.items():
-        if any(keyword in user_input.lower() for keyword in keywords):
-            if goal not in user_profile["goals"]:
-                user_profile["goals"].append(goal)
-
-    # Extract injuries - NEW FEATURE
-    injury_keywords = {
-        "vai": ["đau vai", "chấn thương vai", "vai bị", "shoulder pain"],
-        "tay": ["đau tay", "chấn thương tay", "tay bị", "arm pain"],
-        "lưng": ["đau lưng", "chấn thương lưng", "lưng bị", "back pain"],
-        "gối": ["đau gối", "chấn thương gối", "gối bị", "knee pain"],
-        "cổ tay": ["đau cổ tay", "chấn thương cổ tay", "wrist pain"],
-        "chân": ["đau chân", "chấn thương chân", "chân bị", "leg pain"],
-    }
-
-    for injury, keywords in injury_keywords.items():
-        if any(keyword in user_input.lower() for keyword in keywords):
-            if injury not in user_profile["injuries"]:
-                user_profile["injuries"].append(injury)
+    update_profile(user_profile, user_input)
 
 
 def format_chat_history_for_agent():
@@ -473,14 +387,17 @@ def format_chat_history_for_agent():
     return chat_messages
 
 
+# Tính gợi ý câu hỏi trong nền trong lúc agent trả lời
+_suggestion_executor = ThreadPoolExecutor(max_workers=1)
+
+
 def get_contextual_suggestions():
     """Đưa ra gợi ý câu hỏi dựa trên user profile và RAG capabilities"""
     suggestions = []
 
-    if user_profile["height"] and user_profile["weight"]:
-        bmi = user_profile["weight"] / (user_profile["height"] ** 2)
-        user_profile["bmi"] = bmi
-
+    # BMI được cập nhật sẵn mỗi khi profile đổi chiều cao/cân nặng
+    bmi = user_profile.get("bmi")
+    if bmi:
         if bmi < 18.5:
             suggestions.append(
                 "💡 RAG: Hỏi về 'món ăn tăng cân Việt Nam' hoặc 'bài tập tăng cơ'"
@@ -530,6 +447,11 @@ def chat_loop(agent_executor, llm):
                 )
                 break
 
+            # Profile cập nhật trước khi gọi agent; gợi ý tính trong nền song song
+            # với agent nên không nằm trên đường trả lời
+            extract_user_info(user_input)
+            suggestions = _suggestion_executor.submit(get_contextual_suggestions)
+
             # Sử dụng agent với RAG nếu có
             if agent_executor:
                 try:
@@ -544,6 +466,7 @@ def chat_loop(agent_executor, llm):
                         agent_input = {
                             "input": user_input,
                             "chat_history": format_chat_history_for_agent(),
+                            "user_profile": format_user_profile(user_profile),
                         }
                         result = agent_executor.invoke(agent_input)
 
@@ -554,9 +477,6 @@ def chat_loop(agent_executor, llm):
             else:
                 response = simple_chat(user_input, llm)
 
-            # Extract thông tin từ user input (bao gồm chấn thương)
-            extract_user_info(user_input)
-
             # Lưu vào conversation history
             conversation_history.append((user_input, response))
 
@@ -574,10 +494,8 @@ def chat_loop(agent_executor, llm):
             console.print(response_panel)
 
             # Hiển thị gợi ý RAG dựa trên context
-            suggestions = get_contextual_suggestions()
-            if suggestions:
-                for suggestion in suggestions[-2:]:
-                    console.print(f"[dim blue]{suggestion}[/dim blue]")
+            for suggestion in suggestions.result()[-2:]:
+                console.print(f"[dim blue]{suggestion}[/dim blue]")
 
             # Hiển thị profile info với chấn thương
             if len(conversation_history) > 1:
@@ -613,9 +531,7 @@ def main():
             progress.add_task("[cyan]Đang kết nối Gemini API...", total=None)
             time.sleep(1)
 
-            llm = ChatGoogleGenerativeAI(
-                model="gemini-2.5-flash", api_key=api_key, temperature=0.7
-            )
+            llm = get_llm(api_key)
 
         console.print("✅ Kết nối Gemini API thành công!", style=STYLE_SUCCESS)
     except Exception as e:
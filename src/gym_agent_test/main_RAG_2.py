@@ -1,7 +1,6 @@
 import os
 from dotenv import load_dotenv # pyright: ignore[reportMissingImports]
 from langchain.tools import tool # pyright: ignore[reportMissingImports]
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings  # pyright: ignore[reportMissingImports]
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder # pyright: ignore[reportMissingImports]
 from langchain.agents import create_tool_calling_agent, AgentExecutor # pyright: ignore[reportMissingImports]
 from langchain_community.vectorstores import Chroma # pyright: ignore[reportMissingImports]
@@ -15,6 +14,20 @@ from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.table import Table
 from rich import print as rich_print
 import time
+from concurrent.futures import ThreadPoolExecutor
+from gym_agent_test.advice import RAG_NO_MATCH, gym_advice
+from gym_agent_test.bmi import bmi_report
+from gym_agent_test.exercise_catalog import (
+    EXERCISE_DATA,
+    build_exercise_filter,
+    exercise_metadata,
+)
+from gym_agent_test.fast_path import is_confident, render_bmi, route_query
+from gym_agent_test.history_store import ConversationHistory
+from gym_agent_test.hybrid_search import HybridRetriever
+from gym_agent_test.llm_client import get_embeddings, get_llm
+from gym_agent_test.profile import PROFILE_PROMPT, format_user_profile
+from gym_agent_test.profile_extraction import update_profile
 
 # Load environment variables
 load_dotenv()
@@ -30,8 +43,8 @@ STYLE_WARNING = "bold yellow"
 STYLE_ERROR = "bold red"
 STYLE_INFO = "bold cyan"
 
-# Conversation history để duy trì ngữ cảnh
-conversation_history = []
+# Conversation history để duy trì ngữ cảnh (ring buffer 10 lượt gần nhất)
+conversation_history = ConversationHistory("cli", limit=10, log_dir=None)
 
 # User profile để lưu thông tin cá nhân
 user_profile = {
@@ -48,11 +61,15 @@ user_profile = {
 embeddings = None
 nutrition_vectorstore = None
 exercise_vectorstore = None
+exercise_retriever = None
+# Tên món (lowercase) -> dòng dữ liệu dinh dưỡng, dùng cho fast path
+nutrition_facts = {}
 
 
 def initialize_rag():
     """Khởi tạo RAG với dữ liệu dinh dưỡng và bài tập"""
-    global embeddings, nutrition_vectorstore, exercise_vectorstore
+    global embeddings, nutrition_vectorstore, exercise_vectorstore, exercise_retriever
+    global nutrition_facts
 
     try:
         with Progress(
@@ -63,9 +80,7 @@ def initialize_rag():
             progress.add_task("[cyan]Đang khởi tạo RAG system...", total=None)
 
             # Khởi tạo embeddings
-            embeddings = GoogleGenerativeAIEmbeddings(
-                model="models/text-embedding-004", google_api_key=api_key
-            )
+            embeddings = get_embeddings(api_key)
 
             # Dữ liệu dinh dưỡng món ăn Việt Nam
             nutrition_data = [
@@ -91,43 +106,16 @@ def initialize_rag():
                 "Tôm rang me: 260 calories, 22g protein, 18g carbs, 12g fat. Protein từ tôm + vitamin A từ me. Thành phần chính: tôm tươi, me chua, đường, nước mắm, tỏi, ớt, hành lá.",
             ]
 
-            # Dữ liệu bài tập theo nhóm cơ và chấn thương
-            exercise_data = [
-                "NGỰC - Bench Press: Tập ngực, vai trước, tay sau. 3 sets x 8-12 reps. Chú ý: giữ vai ổn định, hạ bar chạm ngực.",
-                "NGỰC - Push-ups: Bodyweight, tập ngực toàn diện. 3 sets x 15-20 reps. Biến thể: incline, decline, diamond.",
-                "NGỰC - Dumbbell Flyes: Tập ngực giữa. 3 sets x 10-15 reps. Chú ý: không hạ quá thấp, tránh chấn thương vai.",
-                "LƯNG - Pull-ups: Tập lưng xô, tay trước. 3 sets x 5-12 reps. Biến thể: wide grip, chin-ups.",
-                "LƯNG - Bent-over Rows: Tập lưng giữa, sau vai. 3 sets x 8-12 reps. Chú ý: giữ lưng thẳng.",
-                "LƯNG - Lat Pulldowns: Máy tập lưng xô. 3 sets x 10-15 reps. Tập trung vào kéo bằng lưng.",
-                "VAI - Overhead Press: Tập vai toàn diện. 3 sets x 8-12 reps. Chú ý: core chặt, không lắc lưng.",
-                "VAI - Lateral Raises: Tập vai giữa. 3 sets x 12-15 reps. Tạ nhẹ, động tác chậm và kiểm soát.",
-                "VAI - Rear Delt Flyes: Tập vai sau. 3 sets x 15-20 reps. Quan trọng để cân bằng tư thế.",
-                "TAY TRƯỚC - Bicep Curls: Tập tay trước. 3 sets x 10-15 reps. Chú ý: không swing, kiểm soát âm tính.",
-                "TAY TRƯỚC - Hammer Curls: Tập tay trước + cẳng tay. 3 sets x 10-15 reps. Grip ngang, tạ dumbbell.",
-                "TAY SAU - Tricep Dips: Tập tay sau. 3 sets x 10-15 reps. Có thể dùng ghế hoặc parallel bars.",
-                "TAY SAU - Overhead Tricep Extension: Tập tay sau. 3 sets x 10-15 reps. Chú ý: giữ khuỷu tay ổn định.",
-                "CHÂN - Squats: Tập đùi, mông toàn diện. 3 sets x 10-15 reps. Chú ý: gót chân không rời đất.",
-                "CHÂN - Deadlifts: Tập đùi sau, mông, lưng dưới. 3 sets x 5-8 reps. Kỹ thuật quan trọng nhất.",
-                "CHÂN - Lunges: Tập đùi, mông đơn bên. 3 sets x 12/leg. Tốt cho cân bằng và stability.",
-                "BỤ NG - Plank: Tập core tĩnh. 3 sets x 30-60s. Foundation cho mọi bài tập khác.",
-                "BỤNG - Crunches: Tập bụng trên. 3 sets x 15-25 reps. Chú ý: không kéo cổ.",
-                "BỤNG - Russian Twists: Tập bụng chéo. 3 sets x 20 total. Có thể thêm tạ để tăng khó.",
-                "CHẤN THƯƠNG TAY - Wrist Curls: Phục hồi cổ tay. 2 sets x 15-20 reps với tạ nhẹ.",
-                "CHẤN THƯƠNG TAY - Resistance Band Exercises: An toàn cho vai, khuỷu tay. Elastic band với các hướng khác nhau.",
-                "CHẤN THƯƠNG LƯNG - Cat-Cow Stretch: Mobility lưng. 2 sets x 10 reps. Làm ấm trước tập.",
-                "CHẤN THƯƠNG LƯNG - Bird Dog: Stability core và lưng. 3 sets x 10/side. Tăng dần độ khó.",
-                "CHẤN THƯƠNG GỐI - Wall Sits: Tập đùi không impact. 3 sets x 20-45s. An toàn cho gối.",
-                "CHẤN THƯƠNG GỐI - Glute Bridges: Tập mông, ít stress gối. 3 sets x 15-20 reps.",
-                "CARDIO NHẸ - Walking: 30-45 phút, an toàn cho mọi chấn thương. Tốt cho recovery.",
-                "CARDIO NHẸ - Swimming: Toàn thân, ít impact. 20-30 phút, tốt cho chấn thương khớp.",
-                "STRETCHING - Hip Flexor Stretch: Giãn cơ hông. 30s/side. Quan trọng cho người ngồi nhiều.",
-                "STRETCHING - Chest Stretch: Giãn ngực. 30s. Cân bằng với bài tập push.",
-                "RECOVERY - Foam Rolling: Self-massage. 5-10 phút/nhóm cơ. Tốt cho recovery.",
-            ]
-
             # Tạo documents cho RAG
             nutrition_docs = [Document(page_content=text) for text in nutrition_data]
-            exercise_docs = [Document(page_content=text) for text in exercise_data]
+            nutrition_facts = {
+                text.split(":", 1)[0].strip().lower(): text for text in nutrition_data
+            }
+            # Nhóm cơ và chống chỉ định được lưu vào metadata để pre-filter
+            exercise_docs = [
+                Document(page_content=text, metadata=exercise_metadata(text))
+                for text in EXERCISE_DATA
+            ]
 
             # Tạo vector stores
             nutrition_vectorstore = Chroma.from_documents(
@@ -142,6 +130,9 @@ def initialize_rag():
                 collection_name="exercises",
             )
 
+            # Precompute BM25 index cho hybrid retrieval bài tập
+            exercise_retriever = HybridRetriever(exercise_docs, exercise_vectorstore)
+
             progress.stop()
 
         console.print("✅ RAG system đã được khởi tạo!", style=STYLE_SUCCESS)
@@ -157,20 +148,7 @@ def calc_bmi(height_weight: str) -> str:
     """Tính chỉ số BMI cơ thể.
     Input: 'chiều_cao,cân_nặng' -> chiều cao (m), cân nặng (kg).
     Ví dụ: '1.70,65'"""
-    try:
-        h, w = map(float, height_weight.split(","))
-        bmi = w / (h * h)
-        if bmi < 18.5:
-            status = "Thiếu cân"
-        elif bmi < 24.9:
-            status = "Bình thường"
-        elif bmi < 29.9:
-            status = "Thừa cân"
-        else:
-            status = "Béo phì"
-        return f"BMI = {bmi:.2f} → {status}"
-    except Exception:
-        return "Sai input! Hãy nhập theo định dạng: chiều_cao,cân_nặng (VD: 1.70,65)"
+    return bmi_report(height_weight)
 
 
 @tool
@@ -203,11 +181,22 @@ def exercise_advisor_rag(query: str) -> str:
     """Tư vấn bài tập dựa theo nhóm cơ hoặc chấn thương sử dụng RAG.
     Input: Câu hỏi về bài tập, nhóm cơ, chấn thương, etc."""
     try:
-        if not exercise_vectorstore:
+        if not exercise_retriever:
             return "❌ RAG chưa được khởi tạo. Hãy khởi động lại ứng dụng."
 
-        # Tìm kiếm relevant documents
-        relevant_docs = exercise_vectorstore.similarity_search(query, k=4)
+        # Pre-filter theo nhóm cơ trong câu hỏi và chấn thương trong profile
+        injuries = user_profile.get("injuries", [])
+        where = build_exercise_filter(query, injuries)
+
+        # Hybrid search: BM25 cho từ khóa ngắn (VD: "NGỰC", "gối") + dense vector
+        relevant_docs = exercise_retriever.search(query, k=4, where=where)
+
+        # Không đủ kết quả trong nhóm cơ thì mở rộng, vẫn giữ điều kiện an toàn
+        if len(relevant_docs) < 4:
+            safe_where = build_exercise_filter(query, injuries, by_category=False)
+            for doc in exercise_retriever.search(query, k=4, where=safe_where):
+                if doc not in relevant_docs and len(relevant_docs) < 4:
+                    relevant_docs.append(doc)
 
         # Tạo context từ documents
         context = "\n".join([doc.page_content for doc in relevant_docs])
@@ -226,18 +215,7 @@ def exercise_advisor_rag(query: str) -> str:
 @tool
 def gym_advice_tool(question: str) -> str:
     """Đưa ra lời khuyên gym tổng quát (backup cho RAG)."""
-    advice_db = {
-        "tăng cơ": "💪 Gợi ý tăng cơ:\n- Tập trọng lượng nặng, ít rep (6-8 reps)\n- Nghỉ đủ giấc (7-9h/đêm)\n- Ăn nhiều protein (1.6-2.2g/kg cân nặng)",
-        "giảm cân": "🔥 Gợi ý giảm cân:\n- Cardio 30-45p/ngày\n- Deficit calories 300-500 cal\n- Tập circuit training\n- Uống đủ nước (2-3L/ngày)",
-        "tăng sức mạnh": "💪 Gợi ý tăng sức mạnh:\n- Compound exercises: squat, deadlift, bench press\n- Progressive overload\n- Nghỉ ngơi đủ giữa các set",
-    }
-
-    question_lower = question.lower()
-    for key, advice in advice_db.items():
-        if key in question_lower:
-            return advice
-
-    return "🤔 Hỏi cụ thể hơn về: tăng cơ, giảm cân, tăng sức mạnh. Hoặc dùng RAG tools cho tư vấn chi tiết!"
+    return gym_advice(question, fallback=RAG_NO_MATCH)
 
 
 def create_agent(llm):
@@ -254,17 +232,10 @@ def create_agent(llm):
                 [
                     (
                         "system",
-                        f"""Bạn là Sgms AI - một huấn luyện viên gym chuyên nghiệp với hệ thống RAG tiên tiến.
+                        """Bạn là Sgms AI - một huấn luyện viên gym chuyên nghiệp với hệ thống RAG tiên tiến.
                 
                 QUAN TRỌNG: Bạn có thể nhớ toàn bộ cuộc trò chuyện và thông tin cá nhân để tạo cuộc hội thoại tự nhiên.
                 
-                THÔNG TIN USER HIỆN TẠI:
-                - Chiều cao: {user_profile.get('height', 'chưa có')} m
-                - Cân nặng: {user_profile.get('weight', 'chưa có')} kg  
-                - BMI: {user_profile.get('bmi', 'chưa tính')}
-                - Mục tiêu: {', '.join(user_profile.get('goals', [])) or 'chưa rõ'}
-                - Chấn thương: {', '.join(user_profile.get('injuries', [])) or 'không có'}
-                
                 TOOLS CÓ SẴN:
                 1. calc_bmi(height_weight) - Tính BMI với format "chiều_cao,cân_nặng" 
                 2. nutrition_advisor_rag(query) - RAG tư vấn dinh dưỡng món ăn Việt Nam
@@ -285,6 +256,7 @@ def create_agent(llm):
                 
                 Luôn trả lời bằng tiếng Việt, thân thiện và chuyên nghiệp!""",
                     ),
+                    ("system", PROFILE_PROMPT),
                     MessagesPlaceholder(variable_name="chat_history"),
                     ("human", "{input}"),
                     MessagesPlaceholder(variable_name="agent_scratchpad"),
@@ -327,7 +299,7 @@ def simple_chat(user_input: str, llm) -> str:
             context = ""
             if conversation_history:
                 context = "\n\nLịch sử cuộc trò chuyện:\n"
-                for i, (user_msg, ai_msg) in enumerate(conversation_history[-3:]):
+                for i, (user_msg, ai_msg) in enumerate(conversation_history.last(3)):
                     context += f"User: {user_msg}\nSgms AI: {ai_msg}\n\n"
 
             profile_info = f"""
@@ -402,85 +374,29 @@ def display_welcome():
 
 def extract_user_info(user_input: str):
     """Trích xuất thông tin cá nhân từ tin nhắn của user bao gồm chấn thương"""
-    global user_profile
-
-    # Extract height (1.70, 1m70, 170cm, etc.)
-    import re
-
-    height_patterns = [
-        r"(\d+\.?\d*)\s*m(?:\s|$)",
-        r"(\d+)\s*cm",
-        r"cao\s+(\d+\.?\d*)",
-    ]
-
-    for pattern in height_patterns:
-        match = re.search(pattern, user_input.lower())
-        if match:
-            height = float(match.group(1))
-            if height > 10:
-                height = height / 100
-            user_profile["height"] = height
-            break
-
-    # Extract weight
-    weight_patterns = [
-        r"(\d+\.?\d*)\s*kg",
-        r"nặng\s+(\d+\.?\d*)",
-        r"cân\s+(\d+\.?\d*)",
-    ]
-
-    for pattern in weight_patterns:
-        match = re.search(pattern, user_input.lower())
-        if match:
-            user_profile["weight"] = float(match.group(1))
-            break
-
-    # Extract goals
-    goal_keywords = {
-        "tăng cơ": ["tăng cơ", "build muscle", "muscle", "cơ bắp"],
-        "giảm cân": ["giảm cân", "lose weight", "weight loss", "gầy"],
-        "tăng sức mạnh": ["mạnh", "strength", "sức mạnh"],
-        "giữ dáng": ["giữ dáng", "maintain", "duy trì"],
-    }
-
-    for goal, keywords in goal_keywords.items():
-        if any(keyword in user_input.lower() for keyword in keywords):
-            if goal not in user_profile["goals"]:
-                user_profile["goals"].append(goal)
-
-    # Extract injuries - NEW FEATURE
-    injury_keywords = {
-        "vai": ["đau vai", "chấn thương vai", "vai bị", "shoulder pain"],
-        "tay": ["đau tay", "chấn thương tay", "tay bị", "arm pain"],
-        "lưng": ["đau lưng", "chấn thương lưng", "lưng bị", "back pain"],
-        "gối": ["đau gối", "chấn thương gối", "gối bị", "knee pain"],
-        "cổ tay": ["đau cổ tay", "chấn thương cổ tay", "wrist pain"],
-        "chân": ["đau chân", "chấn thương chân", "chân bị", "leg pain"],
-    }
-
-    for injury, keywords in injury_keywords.items():
-        if any(keyword in user_input.lower() for keyword in keywords):
-            if injury not in user_profile["injuries"]:
-                user_profile["injuries"].append(injury)
+    update_profile(user_profile, user_input)
 
 
 def format_chat_history_for_agent():
     """Format conversation history for agent input"""
     chat_messages = []
-    for user_msg, ai_msg in conversation_history[-5:]:
+    for user_msg, ai_msg in conversation_history.last(5):
         chat_messages.append(("human", user_msg))
         chat_messages.append(("assistant", ai_msg))
     return chat_messages
 
 
+# Tính gợi ý câu hỏi trong nền trong lúc agent trả lời
+_suggestion_executor = ThreadPoolExecutor(max_workers=1)
+
+
 def get_contextual_suggestions():
     """Đưa ra gợi ý câu hỏi dựa trên user profile và RAG capabilities"""
     suggestions = []
 
-    if user_profile["height"] and user_profile["weight"]:
-        bmi = user_profile["weight"] / (user_profile["height"] ** 2)
-        user_profile["bmi"] = bmi
-
+    # BMI được cập nhật sẵn mỗi khi profile đổi chiều cao/cân nặng
+    bmi = user_profile.get("bmi")
+    if bmi:
         if bmi < 18.5:
             suggestions.append(
                 "💡 RAG: Hỏi về 'món ăn tăng cân Việt Nam' hoặc 'bài tập tăng cơ'"
@@ -512,10 +428,21 @@ def get_contextual_suggestions():
     return suggestions
 
 
+def fast_path_answer(user_input: str):
+    """Trả lời trực tiếp câu hỏi BMI / dinh dưỡng một món khi độ tin cậy cao"""
+    decision = route_query(user_input, nutrition_facts.keys())
+    if not is_confident(decision):
+        return None
+
+    slots = decision["slots"]
+    if decision["intent"] == "bmi":
+        result = calc_bmi.func(f"{slots['height']},{slots['weight']}")
+        return render_bmi(slots["height"], slots["weight"], result)
+    return f"🍜 {nutrition_facts[slots['dish']]}"
+
+
 def chat_loop(agent_executor, llm):
     """Main chat loop với Rich UI, conversation history và RAG"""
-    global conversation_history
-
     while True:
         try:
             user_input = Prompt.ask("\n[bold cyan]👤 Bạn[/bold cyan]").strip()
@@ -530,8 +457,17 @@ def chat_loop(agent_executor, llm):
                 )
                 break
 
+            # Profile cập nhật trước khi gọi agent; gợi ý tính trong nền song song
+            # với agent nên không nằm trên đường trả lời
+            extract_user_info(user_input)
+            suggestions = _suggestion_executor.submit(get_contextual_suggestions)
+
+            # Câu hỏi xác định (BMI, calories của một món) không cần gọi agent
+            response = fast_path_answer(user_input)
+            if response is not None:
+                console.print("[dim]⚡ Trả lời nhanh không qua agent[/dim]")
             # Sử dụng agent với RAG nếu có
-            if agent_executor:
+            elif agent_executor:
                 try:
                     with Progress(
                         SpinnerColumn(),
@@ -544,6 +480,7 @@ def chat_loop(agent_executor, llm):
                         agent_input = {
                             "input": user_input,
                             "chat_history": format_chat_history_for_agent(),
+                            "user_profile": format_user_profile(user_profile),
                         }
                         result = agent_executor.invoke(agent_input)
 
@@ -554,14 +491,8 @@ def chat_loop(agent_executor, llm):
             else:
                 response = simple_chat(user_input, llm)
 
-            # Extract thông tin từ user input (bao gồm chấn thương)
-            extract_user_info(user_input)
-
             # Lưu vào conversation history
-            conversation_history.append((user_input, response))
-
-            if len(conversation_history) > 10:
-                conversation_history = conversation_history[-10:]
+            conversation_history.append(user_input, response)
 
             # Hiển thị response trong panel đẹp
             response_panel = Panel(
@@ -574,10 +505,8 @@ def chat_loop(agent_executor, llm):
             console.print(response_panel)
 
             # Hiển thị gợi ý RAG dựa trên context
-            suggestions = get_contextual_suggestions()
-            if suggestions:
-                for suggestion in suggestions[-2:]:
-                    console.print(f"[dim blue]{suggestion}[/dim blue]")
+            for suggestion in suggestions.result()[-2:]:
+                console.print(f"[dim blue]{suggestion}[/dim blue]")
 
             # Hiển thị profile info với chấn thương
             if len(conversation_history) > 1:
@@ -613,9 +542,7 @@ def main():
             progress.add_task("[cyan]Đang kết nối Gemini API...", total=None)
             time.sleep(1)
 
-            llm = ChatGoogleGenerativeAI(
-                model="gemini-2.5-flash", api_key=api_key, temperature=0.7
-            )
+            llm = get_llm(api_key)
 
         console.print("✅ Kết nối Gemini API thành công!", style=STYLE_SUCCESS)
     except Exception as e:
@@ -2,7 +2,6 @@ import os
 import re
 from dotenv import load_dotenv
 from langchain.tools import tool
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.agents import create_tool_calling_agent, AgentExecutor
 from rich.console import Console
@@ -13,7 +12,38 @@ from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.table import Table
 from rich import print as rich_print
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from neo4j import GraphDatabase
+from gym_agent_test import metrics
+from gym_agent_test.advice import RAG_NO_MATCH, gym_advice
+from gym_agent_test.bmi import bmi_report
+from gym_agent_test.fast_path import (
+    is_confident,
+    render_bmi,
+    render_dish,
+    route_query,
+)
+from gym_agent_test.graph_queries import (
+    INGREDIENT_MATCH_LIMIT,
+    NODE_LABELS,
+    run_query,
+)
+from gym_agent_test.intents import BENEFIT_KEYWORDS, classify
+from gym_agent_test.llm_client import get_llm
+from gym_agent_test.meal_plan import (
+    CALORIE_TOLERANCE,
+    load_dish_catalog,
+    plan_day,
+    plan_week,
+)
+from gym_agent_test.memory import llm_summarizer
+from gym_agent_test.profile import PROFILE_PROMPT, format_user_profile
+from gym_agent_test.profile_extraction import update_profile
+from gym_agent_test.ranking import MEALS_PER_DAY, merge_ranked, target_macros
+from gym_agent_test.result_rows import fetch_rows
+from gym_agent_test.session import ChatSession, get_current_session
+from gym_agent_test.tracing import span, trace_config
 
 # Load environment variables
 load_dotenv()
@@ -33,38 +63,42 @@ STYLE_WARNING = "bold yellow"
 STYLE_ERROR = "bold red"
 STYLE_INFO = "bold cyan"
 
+# Phiên hội thoại của CLI; server tạo một ChatSession riêng cho mỗi user
+cli_session = ChatSession("cli")
+
 # Conversation history để duy trì ngữ cảnh
-conversation_history = []
+conversation_history = cli_session.history
 
 # User profile để lưu thông tin cá nhân
-user_profile = {
-    "height": None,
-    "weight": None,
-    "bmi": None,
-    "goals": [],
-    "preferences": [],
-    "name": None,
-    "injuries": [],  # Thêm thông tin về chấn thương
-}
+user_profile = cli_session.profile
 
 # Khởi tạo GraphRAG components
 graph_driver = None
 ingredient_names_cache = []
+dish_catalog = None
+
+# Truy vấn đã ORDER BY theo điều kiện user hỏi: giữ nguyên thứ tự khi trả lời
+ORDERED_RESULT_TYPES = {
+    "dish_by_ingredient",
+    "dish_by_cal",
+    "dish_by_protein",
+    "dish_low_cal",
+}
 
 
-def connect_neo4j():
-    """Kết nối với Neo4j database"""
+def connect_neo4j(driver=None):
+    """Kết nối với Neo4j database (hoặc driver truyền vào, vd. fake khi benchmark)"""
     global graph_driver
     try:
         console.print("\n🔌 Đang kết nối với Neo4j...", style=STYLE_INFO)
 
-        graph_driver = GraphDatabase.driver(
+        graph_driver = driver or GraphDatabase.driver(
             neo4j_uri, auth=(neo4j_user, neo4j_password)
         )
 
         # Test connection
         with graph_driver.session(database=neo4j_database) as session:
-            result = session.run("RETURN 1 as test")
+            result = run_query(session, "ping")
             result.single()
 
         # Lấy thống kê graph database
@@ -142,19 +176,18 @@ def get_graph_statistics():
             stats = {}
 
             # Đếm các loại nodes
-            node_labels = ["Dish", "Cuisine", "Tag", "Ingredient", "Macro", "Benefit"]
-            for label in node_labels:
-                result = session.run(f"MATCH (n:{label}) RETURN count(n) as count")
+            for label in NODE_LABELS:
+                result = run_query(session, f"count_{label.lower()}")
                 count = result.single()["count"]
                 if count > 0:
                     stats[label] = count
 
             # Đếm tổng số nodes
-            total_nodes_result = session.run("MATCH (n) RETURN count(n) as total")
+            total_nodes_result = run_query(session, "count_nodes")
             stats["Total Nodes"] = total_nodes_result.single()["total"]
 
             # Đếm tổng số relationships
-            total_rel_result = session.run("MATCH ()-[r]->() RETURN count(r) as total")
+            total_rel_result = run_query(session, "count_relationships")
             stats["Total Relationships"] = total_rel_result.single()["total"]
 
             # Đếm số món ăn (Dish)
@@ -171,14 +204,17 @@ def get_all_ingredient_names(force_refresh: bool = False):
     global ingredient_names_cache
 
     if ingredient_names_cache and not force_refresh:
+        metrics.record_cache("ingredient_names", hit=True)
         return ingredient_names_cache
 
     if not graph_driver:
         return []
 
+    metrics.record_cache("ingredient_names", hit=False)
+
     try:
         with graph_driver.session(database=neo4j_database) as session:
-            result = session.run("MATCH (i:Ingredient) RETURN toLower(i.name) as name")
+            result = run_query(session, "ingredient_names")
             ingredient_names_cache = [
                 record["name"] for record in result if record.get("name")
             ]
@@ -188,24 +224,54 @@ def get_all_ingredient_names(force_refresh: bool = False):
     return ingredient_names_cache
 
 
+def get_dish_catalog(force_refresh: bool = False):
+    """Nạp ma trận macro của toàn bộ món ăn (cache trong bộ nhớ)"""
+    global dish_catalog
+
+    if dish_catalog is not None and not force_refresh:
+        metrics.record_cache("dish_catalog", hit=True)
+        return dish_catalog
+
+    if not graph_driver:
+        return None
+
+    metrics.record_cache("dish_catalog", hit=False)
+
+    try:
+        dish_catalog = load_dish_catalog(graph_driver, neo4j_database)
+    except Exception as e:
+        console.print(f"⚠️ Lỗi nạp catalog món ăn: {e}", style=STYLE_WARNING)
+
+    return dish_catalog
+
+
+# Tính gợi ý câu hỏi trong nền trong lúc agent trả lời
+_suggestion_executor = ThreadPoolExecutor(max_workers=1)
+
+
+def active_session() -> ChatSession:
+    """Phiên đang xử lý: phiên của request trên server, mặc định là phiên CLI"""
+    return get_current_session() or cli_session
+
+
 def clear_neo4j():
     """Xóa toàn bộ dữ liệu trong Neo4j (optional, để reset)"""
     try:
         with graph_driver.session(database=neo4j_database) as session:
-            session.run("MATCH (n) DETACH DELETE n")
+            run_query(session, "clear_graph")
         return True
     except Exception as e:
         console.print(f"⚠️ Lỗi xóa dữ liệu: {e}", style=STYLE_WARNING)
         return False
 
 
-def initialize_rag():
+def initialize_rag(driver=None):
     """Khởi tạo GraphRAG với Neo4j - chỉ kết nối, không populate data"""
     global graph_driver
 
     try:
         # Kết nối Neo4j (thông báo sẽ hiển thị trong connect_neo4j)
-        if not connect_neo4j():
+        if not connect_neo4j(driver):
             return False
 
         # Lấy thống kê để hiển thị
@@ -231,25 +297,20 @@ def initialize_rag():
         return False
 
 
+def find_dishes(session, keyword: str) -> list:
+    """Món theo tên: đọc Dish.summary, có món chưa materialize thì traverse như cũ"""
+    rows = fetch_rows(session, "dish_summary_by_name", keyword=keyword)
+    if any(row.get("ingredients") is None for row in rows):
+        rows = fetch_rows(session, "dish_by_name", keyword=keyword)
+    return rows
+
+
 @tool
 def calc_bmi(height_weight: str) -> str:
     """Tính chỉ số BMI cơ thể.
     Input: 'chiều_cao,cân_nặng' -> chiều cao (m), cân nặng (kg).
     Ví dụ: '1.70,65'"""
-    try:
-        h, w = map(float, height_weight.split(","))
-        bmi = w / (h * h)
-        if bmi < 18.5:
-            status = "Thiếu cân"
-        elif bmi < 24.9:
-            status = "Bình thường"
-        elif bmi < 29.9:
-            status = "Thừa cân"
-        else:
-            status = "Béo phì"
-        return f"BMI = {bmi:.2f} → {status}"
-    except Exception:
-        return "Sai input! Hãy nhập theo định dạng: chiều_cao,cân_nặng (VD: 1.70,65)"
+    return bmi_report(height_weight)
 
 
 @tool
@@ -324,81 +385,9 @@ def nutrition_advisor_rag(query: str) -> str:
                     console.print(
                         f"[dim]🔍 GraphRAG: Tìm kiếm với keyword: '{dish_keyword}'[/dim]"
                     )
-                    # Query với các relationships theo schema - Match Dish trước, sau đó optional relationships
-                    dish_query = """
-                        MATCH (d:Dish)
-                        WHERE toLower(d.name) CONTAINS toLower($dish_keyword)
-                        OPTIONAL MATCH (d)-[:BELONGS_TO]->(c:Cuisine)
-                        OPTIONAL MATCH (d)-[rel:CONTAINS]->(i:Ingredient)
-                        OPTIONAL MATCH (i)-[:PROVIDES_BENEFIT]->(ib:Benefit)
-                        WITH d, c, rel, i, collect(DISTINCT ib.name) AS ingredient_benefits
-                        WITH d,
-                             c,
-                             collect(
-                                 DISTINCT {
-                                     name: i.name,
-                                     quantity: rel.quantity_g,
-                                     benefits: ingredient_benefits
-                                 }
-                             ) AS ingredients
-                        OPTIONAL MATCH (d)-[:HAS_BENEFIT]->(b:Benefit)
-                        RETURN d.name as dish_name, 
-                               d.calories as calories,
-                               d.protein_g as protein,
-                               d.carbs_g as carbs,
-                               d.fat_g as fat,
-                               c.name as cuisine,
-                               ingredients,
-                               collect(DISTINCT b.name) as benefits
-                        LIMIT 5
-                    """
-                    dish_results = session.run(dish_query, dish_keyword=dish_keyword)
-                    record_count = 0
-                    for record in dish_results:
-                        record_count += 1
-                        # Xử lý None values
-                        ingredients_raw = record.get("ingredients") or []
-                        ingredients = []
-                        for ing in ingredients_raw:
-                            if not ing:
-                                continue
-                            if isinstance(ing, dict):
-                                name = ing.get("name")
-                                quantity = ing.get("quantity")
-                                ing_benefits = [
-                                    b for b in (ing.get("benefits") or []) if b
-                                ]
-                            else:
-                                name = ing
-                                quantity = None
-                                ing_benefits = []
-                            if name:
-                                ingredients.append(
-                                    {
-                                        "name": name,
-                                        "quantity": quantity,
-                                        "benefits": ing_benefits,
-                                    }
-                                )
-
-                        benefits = record.get("benefits") or []
-
-                        # Filter None values từ collections
-                        benefits = [b for b in benefits if b is not None]
-
-                        results.append(
-                            {
-                                "type": "dish",
-                                "name": record.get("dish_name"),
-                                "calories": record.get("calories"),
-                                "protein": record.get("protein_g"),
-                                "carbs": record.get("carbs_g"),
-                                "fat": record.get("fat_g"),
-                                "cuisine": record.get("cuisine"),
-                                "benefits": benefits,
-                                "ingredients": ingredients,
-                            }
-                        )
+                    dish_results = find_dishes(session, dish_keyword)
+                    record_count = len(dish_results)
+                    results.extend(dish_results)
 
                     if record_count == 0:
                         console.print(
@@ -481,84 +470,13 @@ def nutrition_advisor_rag(query: str) -> str:
                             break
 
                     if search_keyword:
+                        dish_keyword = search_keyword
                         console.print(
                             f"[dim]🔄 GraphRAG: Fallback query với keyword: '{search_keyword}'[/dim]"
                         )
-                        fallback_query = """
-                            MATCH (d:Dish)
-                            WHERE toLower(d.name) CONTAINS toLower($search_keyword)
-                            OPTIONAL MATCH (d)-[:BELONGS_TO]->(c:Cuisine)
-                            OPTIONAL MATCH (d)-[rel:CONTAINS]->(i:Ingredient)
-                            OPTIONAL MATCH (i)-[:PROVIDES_BENEFIT]->(ib:Benefit)
-                            WITH d, c, rel, i, collect(DISTINCT ib.name) AS ingredient_benefits
-                            WITH d,
-                                 c,
-                                 collect(
-                                     DISTINCT {
-                                         name: i.name,
-                                         quantity: rel.quantity_g,
-                                         benefits: ingredient_benefits
-                                     }
-                                 ) AS ingredients
-                            OPTIONAL MATCH (d)-[:HAS_BENEFIT]->(b:Benefit)
-                            RETURN d.name as dish_name, 
-                                   d.calories as calories,
-                                   d.protein_g as protein,
-                                   d.carbs_g as carbs,
-                                   d.fat_g as fat,
-                                   c.name as cuisine,
-                                   ingredients,
-                                   collect(DISTINCT b.name) as benefits
-                            LIMIT 5
-                        """
-                        fallback_results = session.run(
-                            fallback_query, search_keyword=search_keyword
-                        )
-                        fallback_count = 0
-                        for record in fallback_results:
-                            fallback_count += 1
-                            ingredients_raw = record.get("ingredients") or []
-                            ingredients = []
-                            for ing in ingredients_raw:
-                                if not ing:
-                                    continue
-                                if isinstance(ing, dict):
-                                    name = ing.get("name")
-                                    quantity = ing.get("quantity")
-                                    ing_benefits = [
-                                        b for b in (ing.get("benefits") or []) if b
-                                    ]
-                                else:
-                                    name = ing
-                                    quantity = None
-                                    ing_benefits = []
-                                if name:
-                                    ingredients.append(
-                                        {
-                                            "name": name,
-                                            "quantity": quantity,
-                                            "benefits": ing_benefits,
-                                        }
-                                    )
-                            benefits = [
-                                b
-                                for b in (record.get("benefits") or [])
-                                if b is not None
-                            ]
-
-                            results.append(
-                                {
-                                    "type": "dish",
-                                    "name": record.get("dish_name"),
-                                    "calories": record.get("calories"),
-                                    "protein": record.get("protein_g"),
-                                    "carbs": record.get("carbs_g"),
-                                    "fat": record.get("fat_g"),
-                                    "cuisine": record.get("cuisine"),
-                                    "benefits": benefits,
-                                    "ingredients": ingredients,
-                                }
-                            )
+                        fallback_results = find_dishes(session, search_keyword)
+                        fallback_count = len(fallback_results)
+                        results.extend(fallback_results)
 
                         if fallback_count > 0:
                             console.print(
@@ -571,10 +489,7 @@ def nutrition_advisor_rag(query: str) -> str:
 
                             # Debug: Thử query tất cả dishes để xem có data không
                             try:
-                                debug_query = (
-                                    "MATCH (d:Dish) RETURN d.name as name LIMIT 5"
-                                )
-                                debug_results = session.run(debug_query)
+                                debug_results = run_query(session, "sample_dishes")
                                 debug_dishes = [r["name"] for r in debug_results]
                                 if debug_dishes:
                                     console.print(
@@ -613,127 +528,14 @@ def nutrition_advisor_rag(query: str) -> str:
                         console.print(
                             f"[dim]🧾 GraphRAG: Gợi ý món từ nguyên liệu {', '.join(ingredient_matches)}[/dim]"
                         )
-                        ingredient_query = """
-                            MATCH (d:Dish)-[rel:CONTAINS]->(i:Ingredient)
-                            WHERE toLower(i.name) IN $ingredient_names
-                            OPTIONAL MATCH (i)-[:PROVIDES_BENEFIT]->(ib:Benefit)
-                            WITH d,
-                                 rel,
-                                 i,
-                                 collect(DISTINCT ib.name) AS ingredient_benefits
-                            WITH d,
-                                 collect(
-                                     DISTINCT {
-                                         name: i.name,
-                                         quantity: rel.quantity_g,
-                                         benefits: ingredient_benefits
-                                     }
-                                 ) AS matched_ingredients,
-                                 count(DISTINCT i) AS match_count
-                            OPTIONAL MATCH (d)-[rel_all:CONTAINS]->(all_i:Ingredient)
-                            OPTIONAL MATCH (all_i)-[:PROVIDES_BENEFIT]->(all_ib:Benefit)
-                            WITH d,
-                                 matched_ingredients,
-                                 match_count,
-                                 rel_all,
-                                 all_i,
-                                 collect(DISTINCT all_ib.name) AS all_ingredient_benefits
-                            WITH d,
-                                 matched_ingredients,
-                                 match_count,
-                                 collect(
-                                     DISTINCT {
-                                         name: all_i.name,
-                                         quantity: rel_all.quantity_g,
-                                         benefits: all_ingredient_benefits
-                                     }
-                                 ) AS ingredients
-                            OPTIONAL MATCH (d)-[:HAS_BENEFIT]->(b:Benefit)
-                            RETURN d.name AS dish_name,
-                                   d.calories AS calories,
-                                   d.protein_g AS protein,
-                                   d.carbs_g AS carbs,
-                                   d.fat_g AS fat,
-                                   matched_ingredients,
-                                   ingredients,
-                                   collect(DISTINCT b.name) AS benefits,
-                                   match_count
-                            ORDER BY match_count DESC, d.calories ASC
-                            LIMIT 5
-                        """
-                        ingredient_results = session.run(
-                            ingredient_query, ingredient_names=ingredient_matches
-                        )
-
-                        for record in ingredient_results:
-                            matched_ing_raw = record.get("matched_ingredients") or []
-                            matched_ing = []
-                            for ing in matched_ing_raw:
-                                if not ing:
-                                    continue
-                                if isinstance(ing, dict):
-                                    name = ing.get("name")
-                                    quantity = ing.get("quantity")
-                                    ing_benefits = [
-                                        b for b in (ing.get("benefits") or []) if b
-                                    ]
-                                else:
-                                    name = ing
-                                    quantity = None
-                                    ing_benefits = []
-                                if name:
-                                    matched_ing.append(
-                                        {
-                                            "name": name,
-                                            "quantity": quantity,
-                                            "benefits": ing_benefits,
-                                        }
-                                    )
-
-                            all_ingredients_raw = record.get("ingredients") or []
-                            all_ingredients = []
-                            for ing in all_ingredients_raw:
-                                if not ing:
-                                    continue
-                                if isinstance(ing, dict):
-                                    name = ing.get("name")
-                                    quantity = ing.get("quantity")
-                                    ing_benefits = [
-                                        b for b in (ing.get("benefits") or []) if b
-                                    ]
-                                else:
-                                    name = ing
-                                    quantity = None
-                                    ing_benefits = []
-                                if name:
-                                    all_ingredients.append(
-                                        {
-                                            "name": name,
-                                            "quantity": quantity,
-                                            "benefits": ing_benefits,
-                                        }
-                                    )
-                            benefits = [
-                                b
-                                for b in (record.get("benefits") or [])
-                                if b is not None
-                            ]
-                            results.append(
-                                {
-                                    "type": "dish_by_ingredient",
-                                    "name": record.get("dish_name"),
-                                    "calories": record.get("calories"),
-                                    "protein": record.get("protein"),
-                                    "carbs": record.get("carbs"),
-                                    "fat": record.get("fat"),
-                                    "ingredients": all_ingredients,
-                                    "matched_ingredients": matched_ing,
-                                    "match_count": record.get(
-                                        "match_count", len(matched_ing)
-                                    ),
-                                    "benefits": benefits,
-                                }
+                        results.extend(
+                            fetch_rows(
+                                session,
+                                "dishes_by_ingredients",
+                                ingredient_names=ingredient_matches,
+                                limit=INGREDIENT_MATCH_LIMIT,
                             )
+                        )
                     except Exception as e:
                         console.print(
                             f"[dim]❌ GraphRAG: Lỗi query món theo nguyên liệu: {str(e)}[/dim]"
@@ -744,65 +546,16 @@ def nutrition_advisor_rag(query: str) -> str:
                 cal_match = re.search(r"(\d+)\s*cal", query_lower)
                 if cal_match:
                     target_cal = int(cal_match.group(1))
-                    cal_query = """
-                        MATCH (d:Dish)
-                        WHERE d.calories <= $target_cal + 50 AND d.calories >= $target_cal - 50
-                        OPTIONAL MATCH (d)-[:HAS_BENEFIT]->(b:Benefit)
-                        RETURN d.name as dish_name, d.calories as calories, d.protein_g as protein,
-                               d.carbs_g as carbs, d.fat_g as fat,
-                               collect(DISTINCT b.name) as benefits
-                        ORDER BY abs(d.calories - $target_cal)
-                        LIMIT 5
-                    """
-                    cal_results = session.run(cal_query, target_cal=target_cal)
-                    for record in cal_results:
-                        results.append(
-                            {
-                                "type": "dish_by_cal",
-                                "name": record["dish_name"],
-                                "calories": record["calories"],
-                                "protein": record["protein_g"],
-                                "carbs": record["carbs_g"],
-                                "fat": record["fat_g"],
-                                "benefits": record["benefits"],
-                            }
-                        )
+                    results.extend(
+                        fetch_rows(session, "dishes_by_calories", target_cal=target_cal)
+                    )
 
             # Query 3: Tìm món ăn theo benefit (match với benefit names trong database)
-            benefit_keywords = {
-                "tăng cơ": ["tăng cơ", "protein cao", "protein"],
-                "giảm cân": ["giảm cân", "ít calories", "rau xanh"],
-                "khớp": ["khớp", "collagen", "da"],
-                "tim mạch": ["tim mạch", "omega-3", "não bộ"],
-                "miễn dịch": ["miễn dịch", "vitamin c"],
-                "năng lượng": ["năng lượng", "pre-workout", "caffeine"],
-                "tiêu hóa": ["tiêu hóa", "dễ tiêu"],
-            }
-
-            for keyword, search_terms in benefit_keywords.items():
-                if any(term in query_lower for term in search_terms):
-                    # Query với LIKE pattern để match benefit names
-                    benefit_query = """
-                        MATCH (d:Dish)-[:HAS_BENEFIT]->(b:Benefit)
-                        WHERE any(term IN $search_terms WHERE toLower(b.name) CONTAINS toLower(term))
-                        RETURN d.name as dish_name, d.calories as calories, 
-                               d.protein_g as protein, d.carbs_g as carbs, d.fat_g as fat
-                        LIMIT 5
-                    """
-                    benefit_results = session.run(
-                        benefit_query, search_terms=search_terms
-                    )
-                    for record in benefit_results:
-                        results.append(
-                            {
-                                "type": "dish_by_benefit",
-                                "name": record["dish_name"],
-                                "calories": record["calories"],
-                                "protein": record["protein_g"],
-                                "carbs": record["carbs_g"],
-                                "fat": record["fat_g"],
-                            }
-                        )
+            for benefit in classify(query_lower)["benefits"]:
+                search_terms = BENEFIT_KEYWORDS[benefit]
+                results.extend(
+                    fetch_rows(session, "dishes_by_benefit", search_terms=search_terms)
+                )
 
             # Query 4: Tìm món ăn theo tag (nếu HAS_TAG relationship tồn tại)
             # Lưu ý: HAS_TAG có thể không tồn tại trong database, nên bỏ qua query này
@@ -815,26 +568,7 @@ def nutrition_advisor_rag(query: str) -> str:
             if "protein" in query_lower and (
                 "cao" in query_lower or "nhiều" in query_lower
             ):
-                protein_query = """
-                    MATCH (d:Dish)
-                    WHERE d.protein_g >= 20
-                    RETURN d.name as dish_name, d.calories as calories,
-                           d.protein_g as protein, d.carbs_g as carbs, d.fat_g as fat
-                    ORDER BY d.protein_g DESC
-                    LIMIT 5
-                """
-                protein_results = session.run(protein_query)
-                for record in protein_results:
-                    results.append(
-                        {
-                            "type": "dish_by_protein",
-                            "name": record["dish_name"],
-                            "calories": record["calories"],
-                            "protein": record["protein_g"],
-                            "carbs": record["carbs_g"],
-                            "fat": record["fat_g"],
-                        }
-                    )
+                results.extend(fetch_rows(session, "high_protein_dishes"))
 
             # Query 6: Tìm món ăn ít calories
             if (
@@ -842,26 +576,7 @@ def nutrition_advisor_rag(query: str) -> str:
                 or "low calorie" in query_lower
                 or "giảm cân" in query_lower
             ):
-                lowcal_query = """
-                    MATCH (d:Dish)
-                    WHERE d.calories <= 250
-                    RETURN d.name as dish_name, d.calories as calories,
-                           d.protein_g as protein, d.carbs_g as carbs, d.fat_g as fat
-                    ORDER BY d.calories ASC
-                    LIMIT 5
-                """
-                lowcal_results = session.run(lowcal_query)
-                for record in lowcal_results:
-                    results.append(
-                        {
-                            "type": "dish_low_cal",
-                            "name": record["dish_name"],
-                            "calories": record["calories"],
-                            "protein": record["protein_g"],
-                            "carbs": record["carbs_g"],
-                            "fat": record["fat_g"],
-                        }
-                    )
+                results.extend(fetch_rows(session, "low_calorie_dishes"))
 
             # Query 7: Tìm ingredient và macro
             if (
@@ -869,27 +584,9 @@ def nutrition_advisor_rag(query: str) -> str:
                 or "nguyên liệu" in query_lower
                 or "thành phần" in query_lower
             ):
-                # Sử dụng search_term để tránh conflict với parameter name 'query'
-                ing_query = """
-                    MATCH (i:Ingredient)-[:HAS_MACRO]->(m:Macro)
-                    WHERE toLower(i.name) CONTAINS toLower($search_term)
-                    RETURN i.name as ingredient, m.calories_per_100g as calories,
-                           m.protein_g_per_100g as protein, m.carbs_g_per_100g as carbs,
-                           m.fat_g_per_100g as fat
-                    LIMIT 5
-                """
-                ing_results = session.run(ing_query, search_term=query)
-                for record in ing_results:
-                    results.append(
-                        {
-                            "type": "ingredient",
-                            "name": record["ingredient"],
-                            "calories": record["calories"],
-                            "protein": record["protein"],
-                            "carbs": record["carbs"],
-                            "fat": record["fat"],
-                        }
-                    )
+                results.extend(
+                    fetch_rows(session, "ingredient_macros", search_term=query)
+                )
 
         # Format response
         if not results:
@@ -906,6 +603,20 @@ def nutrition_advisor_rag(query: str) -> str:
 
         response = "🍜 **TƯ VẤN DINH DƯỠNG MÓN ĂN VIỆT NAM (GraphRAG):**\n\n"
 
+        # Thứ tự nhóm: món khớp tên, truy vấn có điều kiện (calories, protein,
+        # nguyên liệu...), rồi theo benefit. Từ khóa tên món nằm trong nguyên liệu
+        # user liệt kê (VD: "thịt" trong "thịt gà") thì món khớp tên xếp cuối
+        name_is_ingredient = bool(dish_keyword) and any(
+            dish_keyword in name for name in ingredient_matches
+        )
+        results.sort(
+            key=lambda r: (
+                (3 if name_is_ingredient else 0)
+                if r["type"] == "dish"
+                else 1 if r["type"] in ORDERED_RESULT_TYPES else 2
+            )
+        )
+
         # Remove duplicates based on dish name
         seen_dishes = set()
         unique_results = []
@@ -914,14 +625,26 @@ def nutrition_advisor_rag(query: str) -> str:
                 seen_dishes.add(r["name"])
                 unique_results.append(r)
 
-        for i, result in enumerate(unique_results[:5], 1):
+        # Gom món theo truy vấn (type), giữ thứ tự nhóm như trên
+        groups = {}
+        for r in unique_results:
+            if r["type"].startswith("dish"):
+                groups.setdefault(r["type"], []).append(r)
+        other_results = [r for r in unique_results if not r["type"].startswith("dish")]
+        ranked_results = merge_ranked(
+            [(group, t in ORDERED_RESULT_TYPES) for t, group in groups.items()],
+            active_session().profile,
+            k=5,
+        )
+
+        for i, result in enumerate((ranked_results + other_results)[:5], 1):
             if result["type"] == "dish" or result["type"].startswith("dish"):
                 response += f"**{i}. {result['name']}**\n"
                 response += f"   📊 Calories: {result['calories']} | Protein: {result['protein']}g | Carbs: {result['carbs']}g | Fat: {result['fat']}g\n"
                 if result.get("cuisine"):
                     response += f"   🗺️ Cuisine: {result['cuisine']}\n"
                 if result.get("benefits"):
-                    response += f"   ✨ Benefits: {', '.join(result['benefits'])}\n"
+                    response += f"   ✨ Benefits: {', '.join(map(str, result['benefits']))}\n"
                 matched_text = format_ingredient_list(
                     result.get("matched_ingredients") or []
                 )
@@ -948,21 +671,196 @@ def nutrition_advisor_rag(query: str) -> str:
         return f"❌ Xin lỗi, có lỗi khi truy vấn GraphRAG database. Lỗi: {error_msg[:100]}. Hãy thử lại với câu hỏi khác hoặc kiểm tra kết nối Neo4j."
 
 
-@tool
-def gym_advice_tool(question: str) -> str:
-    """Đưa ra lời khuyên gym tổng quát (backup cho RAG)."""
-    advice_db = {
-        "tăng cơ": "💪 Gợi ý tăng cơ:\n- Tập trọng lượng nặng, ít rep (6-8 reps)\n- Nghỉ đủ giấc (7-9h/đêm)\n- Ăn nhiều protein (1.6-2.2g/kg cân nặng)",
-        "giảm cân": "🔥 Gợi ý giảm cân:\n- Cardio 30-45p/ngày\n- Deficit calories 300-500 cal\n- Tập circuit training\n- Uống đủ nước (2-3L/ngày)",
-        "tăng sức mạnh": "💪 Gợi ý tăng sức mạnh:\n- Compound exercises: squat, deadlift, bench press\n- Progressive overload\n- Nghỉ ngơi đủ giữa các set",
+def parse_meal_plan_request(request: str):
+    """Trích xuất calories, protein, số ngày và món cần loại trừ từ yêu cầu"""
+    request_lower = request.lower()
+
+    cal_match = re.search(r"(\d{3,5})\s*(?:kcal|calo|cal)", request_lower)
+    protein_match = re.search(
+        r"(\d{2,3})\s*g?\s*(?:protein|đạm)|(?:protein|đạm)\s*(\d{2,3})",
+        request_lower,
+    )
+    exclude = []
+    for match in re.finditer(
+        r"(?:không ăn|kiêng|loại bỏ|trừ)\s+([^.;!?]+)", request_lower
+    ):
+        exclude += [
+            term.strip() for term in re.split(r",| và ", match.group(1)) if term.strip()
+        ]
+
+    weekly = any(keyword in request_lower for keyword in ["tuần", "week", "7 ngày"])
+    return {
+        "calories": int(cal_match.group(1)) if cal_match else None,
+        "protein": (
+            int(protein_match.group(1) or protein_match.group(2))
+            if protein_match
+            else None
+        ),
+        "days": 7 if weekly else 1,
+        "exclude": exclude,
     }
 
-    question_lower = question.lower()
-    for key, advice in advice_db.items():
-        if key in question_lower:
-            return advice
 
-    return "🤔 Hỏi cụ thể hơn về: tăng cơ, giảm cân, tăng sức mạnh. Hoặc dùng RAG tools cho tư vấn chi tiết!"
+@tool
+def meal_plan_tool(request: str) -> str:
+    """Lập thực đơn cả ngày hoặc cả tuần từ các món ăn trong GraphRAG.
+    Input: yêu cầu thực đơn, VD: 'thực đơn 1 ngày 2200 kcal 150g protein, không ăn tôm'
+    hoặc 'thực đơn 1 tuần 1800 calo'. Không nêu calories thì dùng profile user."""
+    try:
+        catalog = get_dish_catalog()
+        if not catalog:
+            return "❌ GraphRAG chưa được khởi tạo hoặc chưa có món ăn trong database."
+
+        params = parse_meal_plan_request(request)
+        default_target = target_macros(active_session().profile) * MEALS_PER_DAY
+        calories = params["calories"] or round(float(default_target[0]))
+        protein = params["protein"] or round(float(default_target[1]))
+
+        console.print(
+            f"[dim]🍱 Meal plan: {calories} kcal, {protein}g protein, "
+            f"{params['days']} ngày, loại trừ: {params['exclude'] or 'không'}[/dim]"
+        )
+        if params["days"] > 1:
+            plans = plan_week(
+                catalog,
+                calories,
+                days=params["days"],
+                protein=protein,
+                exclude=params["exclude"],
+            )
+        else:
+            plans = [
+                plan_day(catalog, calories, protein=protein, exclude=params["exclude"])
+            ]
+
+        response = (
+            f"🍱 **THỰC ĐƠN GỢI Ý ({calories} kcal, {protein}g protein/ngày):**\n\n"
+        )
+        for day, plan in enumerate(plans, 1):
+            if len(plans) > 1:
+                response += f"**Ngày {day}:** "
+            if not plan["dishes"]:
+                response += "⚠️ Không đủ món phù hợp (đã loại trừ hoặc dùng lặp lại)\n"
+                continue
+            totals = plan["totals"]
+            response += f"{', '.join(plan['dishes'])}\n"
+            response += (
+                f"   📊 Tổng: {totals['calories']} kcal | Protein: {totals['protein']}g"
+                f" | Carbs: {totals['carbs']}g | Fat: {totals['fat']}g\n"
+            )
+            if not plan["on_target"]:
+                response += (
+                    f"   ⚠️ Lệch mục tiêu {calories} kcal quá "
+                    f"{CALORIE_TOLERANCE:.0%} (không đủ món phù hợp)\n"
+                )
+        return response
+
+    except Exception as e:
+        return f"❌ Lỗi lập thực đơn: {str(e)[:100]}"
+
+
+# Từ khóa mục tiêu khi tìm món tương đồng (SIMILAR_DISHES.$goal)
+SIMILAR_GOALS = {
+    "lower_calorie": ("ít calo", "ít cal", "ít kcal", "ít năng lượng", "nhẹ hơn"),
+    "higher_protein": ("nhiều protein", "protein cao", "nhiều đạm", "giàu đạm"),
+}
+SIMILAR_LIMIT = 5
+
+
+def parse_similar_request(request: str):
+    """Trích (món gốc, mục tiêu) từ câu kiểu 'món nào giống phở nhưng ít calo hơn'"""
+    request_lower = request.lower()
+    goal = next(
+        (
+            name
+            for name, keywords in SIMILAR_GOALS.items()
+            if any(keyword in request_lower for keyword in keywords)
+        ),
+        None,
+    )
+    match = re.search(
+        r"(?:giống|tương tự|như|thay cho|thay thế)\s+(?:món\s+)?(.+?)"
+        r"(?:\s+(?:nhưng|mà|và|ít|nhiều|hơn|có)\b|[,.?!]|$)",
+        request_lower,
+    )
+    keyword = match.group(1).strip() if match else request_lower.strip()
+    return keyword, goal
+
+
+def resolve_dish_name(keyword: str):
+    """Tên món trong catalog khớp từ khóa: trùng tên, chứa trong câu, rồi chứa từ khóa"""
+    catalog = get_dish_catalog()
+    if not catalog or not keyword:
+        return None
+    names = catalog.names
+    lowered = [name.lower() for name in names]
+    if keyword in lowered:
+        return names[lowered.index(keyword)]
+    mentioned = [n for n, low in zip(names, lowered) if low in keyword]
+    if mentioned:
+        return max(mentioned, key=len)
+    # "phở" -> món ngắn nhất chứa từ khóa ("Phở bò" thay vì "Phở bò tái nạm")
+    containing = [n for n, low in zip(names, lowered) if keyword in low]
+    return min(containing, key=len) if containing else None
+
+
+@tool
+def similar_dish_tool(request: str) -> str:
+    """Tìm món tương tự một món cho trước (nguyên liệu và macro gần giống), có thể
+    kèm điều kiện ít calo hơn hoặc nhiều protein hơn.
+    Input: VD 'món giống phở bò nhưng ít calo hơn' hoặc
+    'món tương tự cơm tấm nhiều protein hơn'"""
+    try:
+        if not graph_driver:
+            return "❌ GraphRAG chưa được khởi tạo."
+
+        keyword, goal = parse_similar_request(request)
+        name = resolve_dish_name(keyword)
+        if not name:
+            return f"❌ Không tìm thấy món '{keyword}' trong database."
+
+        with graph_driver.session(database=neo4j_database) as session:
+            records = fetch_rows(
+                session,
+                "similar_dishes",
+                dish_name=name,
+                goal=goal,
+                limit=SIMILAR_LIMIT,
+            )
+
+        goal_text = {
+            "lower_calorie": " nhưng ít calo hơn",
+            "higher_protein": " nhưng nhiều protein hơn",
+        }.get(goal, "")
+        if not records:
+            return (
+                f"❌ Chưa có món tương tự '{name}'{goal_text}. "
+                "Nếu chưa tính độ tương đồng, chạy: "
+                "python -m gym_agent_test.dish_similarity"
+            )
+
+        first = records[0]
+        response = (
+            f"🔁 **MÓN TƯƠNG TỰ {name.upper()}{goal_text.upper()}** "
+            f"({first['source_calories']} kcal, {first['source_protein']}g protein):\n\n"
+        )
+        for record in records:
+            response += (
+                f"• **{record.name}** (giống {record.score:.0%}): "
+                f"{record['calories']} kcal ({record['calories'] - first['source_calories']:+}), "
+                f"Protein {record['protein']}g ({record['protein'] - first['source_protein']:+}), "
+                f"Carbs {record['carbs']}g, Fat {record['fat']}g\n"
+            )
+        return response
+
+    except Exception as e:
+        return f"❌ Lỗi tìm món tương tự: {str(e)[:100]}"
+
+
+@tool
+def gym_advice_tool(question: str) -> str:
+    """Đưa ra lời khuyên gym tổng quát (backup cho RAG)."""
+    return gym_advice(question, fallback=RAG_NO_MATCH)
 
 
 def create_agent(llm):
@@ -979,24 +877,21 @@ def create_agent(llm):
                 [
                     (
                         "system",
-                        f"""Bạn là Sgms AI - một huấn luyện viên gym chuyên nghiệp với hệ thống GraphRAG tiên tiến sử dụng Neo4j.
+                        """Bạn là Sgms AI - một huấn luyện viên gym chuyên nghiệp với hệ thống GraphRAG tiên tiến sử dụng Neo4j.
                 
                 QUAN TRỌNG: Bạn có thể nhớ toàn bộ cuộc trò chuyện và thông tin cá nhân để tạo cuộc hội thoại tự nhiên.
                 
-                THÔNG TIN USER HIỆN TẠI:
-                - Chiều cao: {user_profile.get('height', 'chưa có')} m
-                - Cân nặng: {user_profile.get('weight', 'chưa có')} kg  
-                - BMI: {user_profile.get('bmi', 'chưa tính')}
-                - Mục tiêu: {', '.join(user_profile.get('goals', [])) or 'chưa rõ'}
-                - Chấn thương: {', '.join(user_profile.get('injuries', [])) or 'không có'}
-                
                 TOOLS CÓ SẴN:
                 1. calc_bmi(height_weight) - Tính BMI với format "chiều_cao,cân_nặng" 
                 2. nutrition_advisor_rag(query) - GraphRAG tư vấn dinh dưỡng món ăn Việt Nam từ Neo4j
-                3. gym_advice_tool(question) - Tư vấn gym tổng quát (backup)
+                3. meal_plan_tool(request) - Lập thực đơn ngày/tuần theo calories, protein và món cần loại trừ
+                4. similar_dish_tool(request) - Món tương tự một món, có thể ít calo hơn/nhiều protein hơn
+                5. gym_advice_tool(question) - Tư vấn gym tổng quát (backup)
                 
                 HƯỚNG DẪN SỬ DỤNG GraphRAG:
                 - Với câu hỏi về món ăn, calories, dinh dưỡng → dùng nutrition_advisor_rag
+                - Với yêu cầu thực đơn cả ngày/tuần (VD: "2200 kcal, 150g protein") → dùng meal_plan_tool
+                - Với câu hỏi "món giống X nhưng ít calo/nhiều protein hơn" → dùng similar_dish_tool
                 - GraphRAG có thể query theo: tên món, calories, protein, benefits, tags, ingredients
                 - Ưu tiên GraphRAG tools trước, fallback sang gym_advice_tool nếu cần
                 
@@ -1009,6 +904,7 @@ def create_agent(llm):
                 
                 Luôn trả lời bằng tiếng Việt, thân thiện và chuyên nghiệp!""",
                     ),
+                    ("system", PROFILE_PROMPT),
                     MessagesPlaceholder(variable_name="chat_history"),
                     ("human", "{input}"),
                     MessagesPlaceholder(variable_name="agent_scratchpad"),
@@ -1019,6 +915,8 @@ def create_agent(llm):
             tools = [
                 calc_bmi,
                 nutrition_advisor_rag,
+                meal_plan_tool,
+                similar_dish_tool,
                 gym_advice_tool,
             ]
             agent = create_tool_calling_agent(llm, tools, prompt)
@@ -1035,22 +933,32 @@ def create_agent(llm):
         return None
 
 
-def simple_chat(user_input: str, llm) -> str:
+def thinking_progress(description: str, show_progress: bool = True):
+    """Spinner khi chạy CLI; server xử lý nhiều phiên song song nên không hiển thị"""
+    if not show_progress:
+        return nullcontext()
+    progress = Progress(
+        SpinnerColumn(),
+        TextColumn(PROGRESS_TEXT_COLUMN),
+        console=console,
+    )
+    progress.add_task(description, total=None)
+    return progress
+
+
+def simple_chat(user_input: str, llm, show_progress: bool = True) -> str:
     """Fallback chat đơn giản với conversation history"""
+    session = active_session()
+    conversation_history = session.history
+    user_profile = session.profile
     try:
-        with Progress(
-            SpinnerColumn(),
-            TextColumn(PROGRESS_TEXT_COLUMN),
-            console=console,
-        ) as progress:
-            progress.add_task("[cyan]Đang suy nghĩ...", total=None)
-            time.sleep(0.5)
+        with thinking_progress("[cyan]Đang suy nghĩ...", show_progress):
 
             # Tạo context từ lịch sử cuộc trò chuyện
             context = ""
             if conversation_history:
                 context = "\n\nLịch sử cuộc trò chuyện:\n"
-                for i, (user_msg, ai_msg) in enumerate(conversation_history[-3:]):
+                for user_msg, ai_msg in conversation_history.last(3):
                     context += f"User: {user_msg}\nSgms AI: {ai_msg}\n\n"
 
             profile_info = f"""
@@ -1074,7 +982,7 @@ THÔNG TIN USER:
             Luôn bắt đầu với emoji phù hợp và giọng điệu thân thiện.{context}"""
 
             full_prompt = f"{system_prompt}\n\nCâu hỏi hiện tại: {user_input}"
-            response = llm.invoke(full_prompt)
+            response = llm.invoke(full_prompt, config=trace_config())
             return response.content
 
     except Exception as e:
@@ -1120,66 +1028,7 @@ def display_welcome():
 
 def extract_user_info(user_input: str):
     """Trích xuất thông tin cá nhân từ tin nhắn của user bao gồm chấn thương"""
-    global user_profile
-
-    # Extract height (1.70, 1m70, 170cm, etc.)
-    import re
-
-    height_patterns = [
-        r"(\d+\.?\d*)\s*m(?:\s|$)",
-        r"(\d+)\s*cm",
-        r"cao\s+(\d+\.?\d*)",
-    ]
-
-    for pattern in height_patterns:
-        match = re.search(pattern, user_input.lower())
-        if match:
-            height = float(match.group(1))
-            if height > 10:
-                height = height / 100
-            user_profile["height"] = height
-            break
-
-    # Extract weight
-    weight_patterns = [
-        r"(\d+\.?\d*)\s*kg",
-        r"nặng\s+(\d+\.?\d*)",
-        r"cân\s+(\d+\.?\d*)",
-    ]
-
-    for pattern in weight_patterns:
-        match = re.search(pattern, user_input.lower())
-        if match:
-            user_profile["weight"] = float(match.group(1))
-            break
-
-    # Extract goals
-    goal_keywords = {
-        "tăng cơ": ["tăng cơ", "build muscle", "muscle", "cơ bắp"],
-        "giảm cân": ["giảm cân", "lose weight", "weight loss", "gầy"],
-        "tăng sức mạnh": ["mạnh", "strength", "sức mạnh"],
-        "giữ dáng": ["giữ dáng", "maintain", "duy trì"],
-    }
-
-    for goal, keywords in goal_keywords.items():
-        if any(keyword in user_input.lower() for keyword in keywords):
-            if goal not in user_profile["goals"]:
-                user_profile["goals"].append(goal)
-
-    # Extract injuries - NEW FEATURE
-    injury_keywords = {
-        "vai": ["đau vai", "chấn thương vai", "vai bị", "shoulder pain"],
-        "tay": ["đau tay", "chấn thương tay", "tay bị", "arm pain"],
-        "lưng": ["đau lưng", "chấn thương lưng", "lưng bị", "back pain"],
-        "gối": ["đau gối", "chấn thương gối", "gối bị", "knee pain"],
-        "cổ tay": ["đau cổ tay", "chấn thương cổ tay", "wrist pain"],
-        "chân": ["đau chân", "chấn thương chân", "chân bị", "leg pain"],
-    }
-
-    for injury, keywords in injury_keywords.items():
-        if any(keyword in user_input.lower() for keyword in keywords):
-            if injury not in user_profile["injuries"]:
-                user_profile["injuries"].append(injury)
+    update_profile(active_session().profile, user_input)
 
 
 def extract_ingredients_from_query(query_lower: str):
@@ -1207,52 +1056,37 @@ def extract_ingredients_from_query(query_lower: str):
 
 
 def format_ingredient_list(ingredients, limit=10):
-    """Hiển thị danh sách nguyên liệu với định lượng"""
+    """Hiển thị danh sách nguyên liệu (IngredientUse) với định lượng"""
     if not ingredients:
         return ""
 
     formatted = []
     for ing in ingredients[:limit]:
-        if isinstance(ing, dict):
-            name = ing.get("name")
-            quantity = ing.get("quantity")
-            benefits = [b for b in (ing.get("benefits") or []) if b]
-            if name:
-                details = []
-                if quantity is not None:
-                    details.append(f"{quantity}g")
-                if benefits:
-                    details.append(f"lợi ích: {', '.join(benefits[:5])}")
-                if details:
-                    formatted.append(f"{name} ({'; '.join(details)})")
-                else:
-                    formatted.append(name)
-        else:
-            formatted.append(str(ing))
+        details = []
+        if ing.quantity is not None:
+            details.append(f"{ing.quantity}g")
+        if ing.benefits:
+            details.append(f"lợi ích: {', '.join(map(str, ing.benefits[:5]))}")
+        formatted.append(f"{ing.name} ({'; '.join(details)})" if details else ing.name)
 
     if len(ingredients) > limit:
         formatted.append("...")
 
-    return ", ".join([item for item in formatted if item])
+    return ", ".join(formatted)
 
 
-def format_chat_history_for_agent():
-    """Format conversation history for agent input"""
-    chat_messages = []
-    for user_msg, ai_msg in conversation_history[-5:]:
-        chat_messages.append(("human", user_msg))
-        chat_messages.append(("assistant", ai_msg))
-    return chat_messages
+def format_chat_history_for_agent(user_input: str = ""):
+    """Format conversation history for agent input (tóm tắt + các lượt gần nhất)"""
+    return active_session().memory.messages(user_input)
 
 
-def get_contextual_suggestions():
+def get_contextual_suggestions(user_profile: dict):
     """Đưa ra gợi ý câu hỏi dựa trên user profile và RAG capabilities"""
     suggestions = []
 
-    if user_profile["height"] and user_profile["weight"]:
-        bmi = user_profile["weight"] / (user_profile["height"] ** 2)
-        user_profile["bmi"] = bmi
-
+    # BMI được cập nhật sẵn mỗi khi profile đổi chiều cao/cân nặng
+    bmi = user_profile.get("bmi")
+    if bmi:
         if bmi < 18.5:
             suggestions.append("💡 GraphRAG: Hỏi về 'món ăn tăng cân Việt Nam'")
         elif bmi > 25:
@@ -1273,10 +1107,86 @@ def get_contextual_suggestions():
     return suggestions
 
 
+def fast_path_answer(user_input: str):
+    """Trả lời trực tiếp câu hỏi BMI / dinh dưỡng một món khi độ tin cậy cao
+
+    Không gọi LLM; trả về None để chuyển sang agent với câu hỏi mơ hồ.
+    """
+    catalog = get_dish_catalog()
+    decision = route_query(user_input, catalog.names if catalog else ())
+    if not is_confident(decision):
+        return None
+
+    slots = decision["slots"]
+    if decision["intent"] == "bmi":
+        result = calc_bmi.func(f"{slots['height']},{slots['weight']}")
+        return render_bmi(slots["height"], slots["weight"], result)
+
+    index = catalog.names.index(slots["dish"])
+    return render_dish(slots["dish"], catalog.macros(index), catalog.ingredients[index])
+
+
+def respond(
+    agent_executor,
+    llm,
+    user_input: str,
+    show_progress: bool = True,
+    extract_profile: bool = True,
+) -> str:
+    """Trả lời một lượt hội thoại của phiên hiện tại và lưu vào history của phiên
+
+    extract_profile=False khi caller đã cập nhật profile từ câu này.
+    """
+    session = active_session()
+    with span("turn", session_id=session.session_id, input_chars=len(user_input)):
+        # Cập nhật profile trước khi gọi agent để agent thấy ngay chiều cao, cân
+        # nặng, mục tiêu, chấn thương vừa được nhắc trong câu này
+        if extract_profile:
+            with span("profile"):
+                extract_user_info(user_input)
+
+        # Câu hỏi xác định (BMI, calories của một món) không cần gọi agent
+        with span("routing") as routing_span:
+            response = fast_path_answer(user_input)
+            routing_span.set(fast_path=response is not None)
+        if response is not None:
+            metrics.TURNS.inc(path="fast_path")
+            if show_progress:
+                console.print("[dim]⚡ Trả lời nhanh không qua agent[/dim]")
+        # Sử dụng agent với RAG nếu có
+        elif agent_executor:
+            try:
+                with thinking_progress(
+                    "[cyan]🤖 Sgms AI đang tra cứu GraphRAG...", show_progress
+                ), span("agent"):
+                    # Tạo input với chat history
+                    agent_input = {
+                        "input": user_input,
+                        "chat_history": format_chat_history_for_agent(user_input),
+                        "user_profile": format_user_profile(session.profile),
+                    }
+                    result = agent_executor.invoke(agent_input, config=trace_config())
+
+                response = result["output"]
+                metrics.TURNS.inc(path="agent")
+            except Exception as e:
+                console.print(f"⚠️ Agent RAG lỗi: {e}", style="yellow")
+                metrics.ERRORS.inc(component="agent")
+                metrics.SIMPLE_CHAT_FALLBACKS.inc(reason="agent_error")
+                metrics.TURNS.inc(path="simple_chat")
+                response = simple_chat(user_input, llm, show_progress)
+        else:
+            metrics.SIMPLE_CHAT_FALLBACKS.inc(reason="no_agent")
+            metrics.TURNS.inc(path="simple_chat")
+            response = simple_chat(user_input, llm, show_progress)
+
+        # Lưu vào conversation history
+        session.add_turn(user_input, response)
+    return response
+
+
 def chat_loop(agent_executor, llm):
     """Main chat loop với Rich UI, conversation history và RAG"""
-    global conversation_history
-
     while True:
         try:
             user_input = Prompt.ask("\n[bold cyan]👤 Bạn[/bold cyan]").strip()
@@ -1291,38 +1201,14 @@ def chat_loop(agent_executor, llm):
                 )
                 break
 
-            # Sử dụng agent với RAG nếu có
-            if agent_executor:
-                try:
-                    with Progress(
-                        SpinnerColumn(),
-                        TextColumn("[cyan]🤖 Sgms AI đang tra cứu GraphRAG..."),
-                        console=console,
-                    ) as progress:
-                        progress.add_task("", total=None)
-
-                        # Tạo input với chat history
-                        agent_input = {
-                            "input": user_input,
-                            "chat_history": format_chat_history_for_agent(),
-                        }
-                        result = agent_executor.invoke(agent_input)
-
-                    response = result["output"]
-                except Exception as e:
-                    console.print(f"⚠️ Agent RAG lỗi: {e}", style="yellow")
-                    response = simple_chat(user_input, llm)
-            else:
-                response = simple_chat(user_input, llm)
-
-            # Extract thông tin từ user input (bao gồm chấn thương)
+            # Profile cập nhật trước khi gọi agent; gợi ý tính trong nền song song
+            # với agent nên không nằm trên đường trả lời
             extract_user_info(user_input)
+            suggestions = _suggestion_executor.submit(
+                get_contextual_suggestions, user_profile
+            )
 
-            # Lưu vào conversation history
-            conversation_history.append((user_input, response))
-
-            if len(conversation_history) > 30:
-                conversation_history = conversation_history[-30:]
+            response = respond(agent_executor, llm, user_input, extract_profile=False)
 
             # Hiển thị response trong panel đẹp
             response_panel = Panel(
@@ -1335,10 +1221,8 @@ def chat_loop(agent_executor, llm):
             console.print(response_panel)
 
             # Hiển thị gợi ý RAG dựa trên context
-            suggestions = get_contextual_suggestions()
-            if suggestions:
-                for suggestion in suggestions[-2:]:
-                    console.print(f"[dim blue]{suggestion}[/dim blue]")
+            for suggestion in suggestions.result()[-2:]:
+                console.print(f"[dim blue]{suggestion}[/dim blue]")
 
             # Hiển thị profile info với chấn thương
             if len(conversation_history) > 1:
@@ -1350,6 +1234,9 @@ def chat_loop(agent_executor, llm):
                 console.print(
                     f"[dim]💭 GraphRAG Memory: {len(conversation_history)} cuộc hội thoại | H={user_profile.get('height', '?')}m, W={user_profile.get('weight', '?')}kg{injuries_text}[/dim]"
                 )
+                console.print(
+                    f"[dim]📏 History trong prompt: ~{cli_session.memory.last_prompt_tokens} tokens[/dim]"
+                )
 
         except KeyboardInterrupt:
             console.print(
@@ -1377,9 +1264,7 @@ def main():
             progress.add_task("[cyan]Đang kết nối Gemini API...", total=None)
             time.sleep(1)
 
-            llm = ChatGoogleGenerativeAI(
-                model="gemini-2.5-flash", api_key=api_key, temperature=0.7
-            )
+            llm = get_llm(api_key)
 
         console.print("✅ Kết nối Gemini API thành công!", style=STYLE_SUCCESS)
     except Exception as e:
@@ -1393,6 +1278,8 @@ def main():
 
     # Tạo agent với GraphRAG
     agent_executor = create_agent(llm)
+    # Tóm tắt nền các lượt cũ bằng chính LLM đang dùng
+    cli_session.summarizer = llm_summarizer(llm)
 
     if not agent_executor:
         console.print("⚠️ Sẽ sử dụng chế độ chat đơn giản", style=STYLE_WARNING)
@@ -1401,9 +1288,16 @@ def main():
     console.print("\n")  # Thêm khoảng trống trước welcome screen
     display_welcome()
 
+    # Ghi metrics ra file định kỳ nếu đặt METRICS_DUMP_INTERVAL
+    stop_metrics = metrics.start_dump()
+
     # Bắt đầu chat loop
     chat_loop(agent_executor, llm)
 
+    if stop_metrics:
+        stop_metrics.set()
+        metrics.dump()
+
 
 if __name__ == "__main__":
     main()
@@ -2,7 +2,6 @@ import os
 import re
 from dotenv import load_dotenv
 from langchain.tools import tool
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.agents import create_tool_calling_agent, AgentExecutor
 from rich.console import Console
@@ -13,7 +12,15 @@ from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.table import Table
 from rich import print as rich_print
 import time
+from concurrent.futures import ThreadPoolExecutor
 from neo4j import GraphDatabase
+from gym_agent_test.advice import RAG_NO_MATCH, gym_advice
+from gym_agent_test.bmi import bmi_report
+from gym_agent_test.history_store import ConversationHistory
+from gym_agent_test.intents import BENEFIT_KEYWORDS, classify
+from gym_agent_test.llm_client import get_llm
+from gym_agent_test.profile import PROFILE_PROMPT, format_user_profile
+from gym_agent_test.profile_extraction import update_profile
 
 # Load environment variables
 load_dotenv()
@@ -33,8 +40,8 @@ STYLE_WARNING = "bold yellow"
 STYLE_ERROR = "bold red"
 STYLE_INFO = "bold cyan"
 
-# Conversation history để duy trì ngữ cảnh
-conversation_history = []
+# Conversation history để duy trì ngữ cảnh (ring buffer 30 lượt gần nhất)
+conversation_history = ConversationHistory("cli", limit=30, log_dir=None)
 
 # User profile để lưu thông tin cá nhân
 user_profile = {
@@ -213,20 +220,7 @@ def calc_bmi(height_weight: str) -> str:
     """Tính chỉ số BMI cơ thể.
     Input: 'chiều_cao,cân_nặng' -> chiều cao (m), cân nặng (kg).
     Ví dụ: '1.70,65'"""
-    try:
-        h, w = map(float, height_weight.split(","))
-        bmi = w / (h * h)
-        if bmi < 18.5:
-            status = "Thiếu cân"
-        elif bmi < 24.9:
-            status = "Bình thường"
-        elif bmi < 29.9:
-            status = "Thừa cân"
-        else:
-            status = "Béo phì"
-        return f"BMI = {bmi:.2f} → {status}"
-    except Exception:
-        return "Sai input! Hãy nhập theo định dạng: chiều_cao,cân_nặng (VD: 1.70,65)"
+    return bmi_report(height_weight)
 
 
 @tool
@@ -537,40 +531,28 @@ def nutrition_advisor_rag(query: str) -> str:
                         )
 
             # Query 3: Tìm món ăn theo benefit (match với benefit names trong database)
-            benefit_keywords = {
-                "tăng cơ": ["tăng cơ", "protein cao", "protein"],
-                "giảm cân": ["giảm cân", "ít calories", "rau xanh"],
-                "khớp": ["khớp", "collagen", "da"],
-                "tim mạch": ["tim mạch", "omega-3", "não bộ"],
-                "miễn dịch": ["miễn dịch", "vitamin c"],
-                "năng lượng": ["năng lượng", "pre-workout", "caffeine"],
-                "tiêu hóa": ["tiêu hóa", "dễ tiêu"],
-            }
-
-            for keyword, search_terms in benefit_keywords.items():
-                if any(term in query_lower for term in search_terms):
-                    # Query với LIKE pattern để match benefit names
-                    benefit_query = """
-                        MATCH (d:Dish)-[:HAS_BENEFIT]->(b:Benefit)
-                        WHERE any(term IN $search_terms WHERE toLower(b.name) CONTAINS toLower(term))
-                        RETURN d.name as dish_name, d.calories as calories, 
-                               d.protein_g as protein, d.carbs_g as carbs, d.fat_g as fat
-                        LIMIT 5
-                    """
-                    benefit_results = session.run(
-                        benefit_query, search_terms=search_terms
+            for benefit in classify(query_lower)["benefits"]:
+                search_terms = BENEFIT_KEYWORDS[benefit]
+                # Query với LIKE pattern để match benefit names
+                benefit_query = """
+                    MATCH (d:Dish)-[:HAS_BENEFIT]->(b:Benefit)
+                    WHERE any(term IN $search_terms WHERE toLower(b.name) CONTAINS toLower(term))
+                    RETURN d.name as dish_name, d.calories as calories, 
+                           d.protein_g as protein, d.carbs_g as carbs, d.fat_g as fat
+                    LIMIT 5
+                """
+                benefit_results = session.run(benefit_query, search_terms=search_terms)
+                for record in benefit_results:
+                    results.append(
+                        {
+                            "type": "dish_by_benefit",
+                            "name": record["dish_name"],
+                            "calories": record["calories"],
+                            "protein": record["protein_g"],
+                            "carbs": record["carbs_g"],
+                            "fat": record["fat_g"],
+                        }
                     )
-                    for record in benefit_results:
-                        results.append(
-                            {
-                                "type": "dish_by_benefit",
-                                "name": record["dish_name"],
-                                "calories": record["calories"],
-                                "protein": record["protein_g"],
-                                "carbs": record["carbs_g"],
-                                "fat": record["fat_g"],
-                            }
-                        )
 
             # Query 4: Tìm món ăn theo tag (nếu HAS_TAG relationship tồn tại)
             # Lưu ý: HAS_TAG có thể không tồn tại trong database, nên bỏ qua query này
@@ -713,18 +695,7 @@ def nutrition_advisor_rag(query: str) -> str:
 @tool
 def gym_advice_tool(question: str) -> str:
     """Đưa ra lời khuyên gym tổng quát (backup cho RAG)."""
-    advice_db = {
-        "tăng cơ": "💪 Gợi ý tăng cơ:\n- Tập trọng lượng nặng, ít rep (6-8 reps)\n- Nghỉ đủ giấc (7-9h/đêm)\n- Ăn nhiều protein (1.6-2.2g/kg cân nặng)",
-        "giảm cân": "🔥 Gợi ý giảm cân:\n- Cardio 30-45p/ngày\n- Deficit calories 300-500 cal\n- Tập circuit training\n- Uống đủ nước (2-3L/ngày)",
-        "tăng sức mạnh": "💪 Gợi ý tăng sức mạnh:\n- Compound exercises: squat, deadlift, bench press\n- Progressive overload\n- Nghỉ ngơi đủ giữa các set",
-    }
-
-    question_lower = question.lower()
-    for key, advice in advice_db.items():
-        if key in question_lower:
-            return advice
-
-    return "🤔 Hỏi cụ thể hơn về: tăng cơ, giảm cân, tăng sức mạnh. Hoặc dùng RAG tools cho tư vấn chi tiết!"
+    return gym_advice(question, fallback=RAG_NO_MATCH)
 
 
 def create_agent(llm):
@@ -741,17 +712,10 @@ def create_agent(llm):
                 [
                     (
                         "system",
-                        f"""Bạn là Sgms AI - một huấn luyện viên gym chuyên nghiệp với hệ thống GraphRAG tiên tiến sử dụng Neo4j.
+                        """Bạn là Sgms AI - một huấn luyện viên gym chuyên nghiệp với hệ thống GraphRAG tiên tiến sử dụng Neo4j.
                 
                 QUAN TRỌNG: Bạn có thể nhớ toàn bộ cuộc trò chuyện và thông tin cá nhân để tạo cuộc hội thoại tự nhiên.
                 
-                THÔNG TIN USER HIỆN TẠI:
-                - Chiều cao: {user_profile.get('height', 'chưa có')} m
-                - Cân nặng: {user_profile.get('weight', 'chưa có')} kg  
-                - BMI: {user_profile.get('bmi', 'chưa tính')}
-                - Mục tiêu: {', '.join(user_profile.get('goals', [])) or 'chưa rõ'}
-                - Chấn thương: {', '.join(user_profile.get('injuries', [])) or 'không có'}
-                
                 TOOLS CÓ SẴN:
                 1. calc_bmi(height_weight) - Tính BMI với format "chiều_cao,cân_nặng" 
                 2. nutrition_advisor_rag(query) - GraphRAG tư vấn dinh dưỡng món ăn Việt Nam từ Neo4j
@@ -771,6 +735,7 @@ def create_agent(llm):
                 
                 Luôn trả lời bằng tiếng Việt, thân thiện và chuyên nghiệp!""",
                     ),
+                    ("system", PROFILE_PROMPT),
                     MessagesPlaceholder(variable_name="chat_history"),
                     ("human", "{input}"),
                     MessagesPlaceholder(variable_name="agent_scratchpad"),
@@ -812,7 +777,7 @@ def simple_chat(user_input: str, llm) -> str:
             context = ""
             if conversation_history:
                 context = "\n\nLịch sử cuộc trò chuyện:\n"
-                for i, (user_msg, ai_msg) in enumerate(conversation_history[-3:]):
+                for i, (user_msg, ai_msg) in enumerate(conversation_history.last(3)):
                     context += f"User: {user_msg}\nSgms AI: {ai_msg}\n\n"
 
             profile_info = f"""
@@ -882,85 +847,29 @@ def display_welcome():
 
 def extract_user_info(user_input: str):
     """Trích xuất thông tin cá nhân từ tin nhắn của user bao gồm chấn thương"""
-    global user_profile
-
-    # Extract height (1.70, 1m70, 170cm, etc.)
-    import re
-
-    height_patterns = [
-        r"(\d+\.?\d*)\s*m(?:\s|$)",
-        r"(\d+)\s*cm",
-        r"cao\s+(\d+\.?\d*)",
-    ]
-
-    for pattern in height_patterns:
-        match = re.search(pattern, user_input.lower())
-        if match:
-            height = float(match.group(1))
-            if height > 10:
-                height = height / 100
-            user_profile["height"] = height
-            break
-
-    # Extract weight
-    weight_patterns = [
-        r"(\d+\.?\d*)\s*kg",
-        r"nặng\s+(\d+\.?\d*)",
-        r"cân\s+(\d+\.?\d*)",
-    ]
-
-    for pattern in weight_patterns:
-        match = re.search(pattern, user_input.lower())
-        if match:
-            user_profile["weight"] = float(match.group(1))
-            break
-
-    # Extract goals
-    goal_keywords = {
-        "tăng cơ": ["tăng cơ", "build muscle", "muscle", "cơ bắp"],
-        "giảm cân": ["giảm cân", "lose weight", "weight loss", "gầy"],
-        "tăng sức mạnh": ["mạnh", "strength", "sức mạnh"],
-        "giữ dáng": ["giữ dáng", "maintain", "duy trì"],
-    }
-
-    for goal, keywords in goal_keywords.items():
-        if any(keyword in user_input.lower() for keyword in keywords):
-            if goal not in user_profile["goals"]:
-                user_profile["goals"].append(goal)
-
-    # Extract injuries - NEW FEATURE
-    injury_keywords = {
-        "vai": ["đau vai", "chấn thương vai", "vai bị", "shoulder pain"],
-        "tay": ["đau tay", "chấn thương tay", "tay bị", "arm pain"],
-        "lưng": ["đau lưng", "chấn thương lưng", "lưng bị", "back pain"],
-        "gối": ["đau gối", "chấn thương gối", "gối bị", "knee pain"],
-        "cổ tay": ["đau cổ tay", "chấn thương cổ tay", "wrist pain"],
-        "chân": ["đau chân", "chấn thương chân", "chân bị", "leg pain"],
-    }
-
-    for injury, keywords in injury_keywords.items():
-        if any(keyword in user_input.lower() for keyword in keywords):
-            if injury not in user_profile["injuries"]:
-                user_profile["injuries"].append(injury)
+    update_profile(user_profile, user_input)
 
 
 def format_chat_history_for_agent():
     """Format conversation history for agent input"""
     chat_messages = []
-    for user_msg, ai_msg in conversation_history[-5:]:
+    for user_msg, ai_msg in conversation_history.last(5):
         chat_messages.append(("human", user_msg))
         chat_messages.append(("assistant", ai_msg))
     return chat_messages
 
 
+# Tính gợi ý câu hỏi trong nền trong lúc agent trả lời
+_suggestion_executor = ThreadPoolExecutor(max_workers=1)
+
+
 def get_contextual_suggestions():
     """Đưa ra gợi ý câu hỏi dựa trên user profile và RAG capabilities"""
     suggestions = []
 
-    if user_profile["height"] and user_profile["weight"]:
-        bmi = user_profile["weight"] / (user_profile["height"] ** 2)
-        user_profile["bmi"] = bmi
-
+    # BMI được cập nhật sẵn mỗi khi profile đổi chiều cao/cân nặng
+    bmi = user_profile.get("bmi")
+    if bmi:
         if bmi < 18.5:
             suggestions.append("💡 GraphRAG: Hỏi về 'món ăn tăng cân Việt Nam'")
         elif bmi > 25:
@@ -983,8 +892,6 @@ def get_contextual_suggestions():
 
 def chat_loop(agent_executor, llm):
     """Main chat loop với Rich UI, conversation history và RAG"""
-    global conversation_history
-
     while True:
         try:
             user_input = Prompt.ask("\n[bold cyan]👤 Bạn[/bold cyan]").strip()
@@ -999,6 +906,11 @@ def chat_loop(agent_executor, llm):
                 )
                 break
 
+            # Profile cập nhật trước khi gọi agent; gợi ý tính trong nền song song
+            # với agent nên không nằm trên đường trả lời
+            extract_user_info(user_input)
+            suggestions = _suggestion_executor.submit(get_contextual_suggestions)
+
             # Sử dụng agent với RAG nếu có
             if agent_executor:
                 try:
@@ -1013,6 +925,7 @@ def chat_loop(agent_executor, llm):
                         agent_input = {
                             "input": user_input,
                             "chat_history": format_chat_history_for_agent(),
+                            "user_profile": format_user_profile(user_profile),
                         }
                         result = agent_executor.invoke(agent_input)
 
@@ -1023,14 +936,8 @@ def chat_loop(agent_executor, llm):
             else:
                 response = simple_chat(user_input, llm)
 
-            # Extract thông tin từ user input (bao gồm chấn thương)
-            extract_user_info(user_input)
-
             # Lưu vào conversation history
-            conversation_history.append((user_input, response))
-
-            if len(conversation_history) > 30:
-                conversation_history = conversation_history[-30:]
+            conversation_history.append(user_input, response)
 
             # Hiển thị response trong panel đẹp
             response_panel = Panel(
@@ -1043,10 +950,8 @@ def chat_loop(agent_executor, llm):
             console.print(response_panel)
 
             # Hiển thị gợi ý RAG dựa trên context
-            suggestions = get_contextual_suggestions()
-            if suggestions:
-                for suggestion in suggestions[-2:]:
-                    console.print(f"[dim blue]{suggestion}[/dim blue]")
+            for suggestion in suggestions.result()[-2:]:
+                console.print(f"[dim blue]{suggestion}[/dim blue]")
 
             # Hiển thị profile info với chấn thương
             if len(conversation_history) > 1:
@@ -1085,9 +990,7 @@ def main():
             progress.add_task("[cyan]Đang kết nối Gemini API...", total=None)
             time.sleep(1)
 
-            llm = ChatGoogleGenerativeAI(
-                model="gemini-2.5-flash", api_key=api_key, temperature=0.7
-            )
+            llm = get_llm(api_key)
 
         console.print("✅ Kết nối Gemini API thành công!", style=STYLE_SUCCESS)
     except Exception as e:
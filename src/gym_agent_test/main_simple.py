@@ -1,7 +1,10 @@
 import os
 from dotenv import load_dotenv
 from langchain.tools import tool
-from langchain_google_genai import ChatGoogleGenerativeAI
+from gym_agent_test.advice import gym_advice
+from gym_agent_test.bmi import bmi_report
+from gym_agent_test.intents import classify
+from gym_agent_test.llm_client import get_llm
 
 # Load environment variables
 load_dotenv()
@@ -13,52 +16,19 @@ def calc_bmi(height_weight: str) -> str:
     """Tính chỉ số BMI cơ thể.
     Input: 'chiều_cao,cân_nặng' -> chiều cao (m), cân nặng (kg).
     Ví dụ: '1.70,65'"""
-    try:
-        h, w = map(float, height_weight.split(","))
-        bmi = w / (h * h)
-        if bmi < 18.5:
-            status = "Thiếu cân"
-        elif bmi < 24.9:
-            status = "Bình thường"
-        elif bmi < 29.9:
-            status = "Thừa cân"
-        else:
-            status = "Béo phì"
-        return f"BMI = {bmi:.2f} → {status}"
-    except Exception:
-        return "Sai input! Hãy nhập theo định dạng: chiều_cao,cân_nặng (VD: 1.70,65)"
+    return bmi_report(height_weight)
 
 
 def get_gym_advice(question: str) -> str:
     """Đưa ra lời khuyên về tập gym, bài tập, dinh dưỡng."""
-    advice_db = {
-        "tăng cơ": "💪 Gợi ý tăng cơ:\n- Tập trọng lượng nặng, ít rep (6-8 reps)\n- Nghỉ đủ giấc (7-9h/đêm)\n- Ăn nhiều protein (1.6-2.2g/kg cân nặng)",
-        "giảm cân": "🔥 Gợi ý giảm cân:\n- Cardio 30-45p/ngày\n- Deficit calories 300-500 cal\n- Tập circuit training\n- Uống đủ nước (2-3L/ngày)",
-        "tăng sức mạnh": "💪 Gợi ý tăng sức mạnh:\n- Compound exercises: squat, deadlift, bench press\n- Progressive overload\n- Nghỉ ngơi đủ giữa các set",
-        "bụng": "🏋️ Bài tập bụng:\n- Plank (30s-2p)\n- Crunches, bicycle crunches\n- Mountain climbers, russian twists",
-        "chân": "🦵 Bài tập chân:\n- Squats, lunges\n- Leg press, calf raises\n- Bulgarian split squats",
-        "tay": "💪 Bài tập tay:\n- Push-ups, pull-ups, dips\n- Bicep curls, tricep extensions\n- Overhead press",
-        "ngực": "🏋️ Bài tập ngực:\n- Bench press, push-ups\n- Dumbbell flyes, incline press",
-        "lưng": "🏋️ Bài tập lưng:\n- Pull-ups, rows\n- Lat pulldowns, deadlifts",
-        "dinh dưỡng": "🍗 Dinh dưỡng:\n- Protein: thịt, cá, trứng, sữa\n- Carbs: yến mạch, gạo lứt\n- Fats: nuts, olive oil",
-    }
-
-    question_lower = question.lower()
-    for key, advice in advice_db.items():
-        if key in question_lower:
-            return advice
-
-    return "🤔 Hỏi cụ thể hơn về: tăng cơ, giảm cân, tăng sức mạnh, bài tập bụng/chân/tay/ngực/lưng, dinh dưỡng"
+    return gym_advice(question)
 
 
 def chat_with_gemini(user_input: str, llm) -> str:
     """Chat trực tiếp với Gemini để trả lời câu hỏi về gym"""
 
     # Kiểm tra xem có phải là yêu cầu tính BMI không
-    if (
-        any(keyword in user_input.lower() for keyword in ["bmi", "chỉ số", "cân nặng"])
-        or "tính" in user_input.lower()
-    ):
+    if "bmi" in classify(user_input)["intents"]:
         # Tìm pattern số trong input
         import re
 
@@ -104,9 +74,7 @@ def main():
 
     # Initialize LLM
     try:
-        llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash", api_key=api_key, temperature=0.7
-        )
+        llm = get_llm(api_key)
         print("✅ Kết nối Gemini API thành công!")
     except Exception as e:
         print(f"❌ Lỗi kết nối API: {e}")
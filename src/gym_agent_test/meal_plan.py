@@ -0,0 +1,281 @@
+"""Lập thực đơn ngày/tuần từ catalog món ăn theo ràng buộc calories và macro"""
+
+import numpy as np
+
+from gym_agent_test.graph_queries import run_query
+from gym_agent_test.ranking import MACRO_KEYS
+
+try:
+    from scipy.optimize import Bounds, LinearConstraint, milp
+except ImportError:  # scipy là optional, fallback sang greedy + local search
+    milp = None
+
+# Trọng số độ lệch (calories, protein, carbs, fat)
+PLAN_WEIGHTS = np.array([2.0, 1.5, 0.5, 0.5])
+CALORIE_TOLERANCE = 0.1
+OVER_CALORIE_PENALTY = 50.0
+MIN_ITEMS = 2
+MAX_ITEMS = 8
+MAX_ITERATIONS = 50
+# Giới hạn thời gian cho MILP để giữ thời gian phản hồi dưới 100ms
+MILP_TIME_LIMIT_S = 0.08
+# HiGHS không dừng giữa presolve nên catalog lớn vượt time_limit: chỉ đưa vào
+# MILP các món có tỉ lệ macro gần mục tiêu nhất
+MILP_CANDIDATES = 300
+# Điểm phạt khi lập thực đơn tuần: món đã ăn hôm trước, và mỗi lần món đã dùng
+YESTERDAY_PENALTY = 0.05
+REPEAT_PENALTY = 0.02
+
+
+class DishCatalog:
+    """Ma trận macro (n, 4) của toàn bộ món ăn, nạp một lần vào bộ nhớ"""
+
+    def __init__(self, names, matrix, ingredients=None):
+        self.names = list(names)
+        self.matrix = np.asarray(matrix, dtype=float).reshape(-1, len(MACRO_KEYS))
+        self.ingredients = ingredients or [[] for _ in self.names]
+        self._names_lower = [name.lower() for name in self.names]
+        # Món thiếu dữ liệu macro không được chọn vào thực đơn
+        self.valid = ~np.isnan(self.matrix).any(axis=1)
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_records(cls, records):
+        """Tạo catalog từ các record có name, calories, protein, carbs, fat"""
+        records = [r for r in records if r.get("name")]
+        return cls(
+            [r["name"] for r in records],
+            [[r.get(key) for key in MACRO_KEYS] for r in records],
+            [[i for i in (r.get("ingredients") or []) if i] for r in records],
+        )
+
+    def macros(self, index: int) -> dict:
+        """Macro của một món dạng dict (None nếu thiếu dữ liệu)"""
+        return {
+            key: None if np.isnan(value) else float(value)
+            for key, value in zip(MACRO_KEYS, self.matrix[index])
+        }
+
+    def exclusion_mask(self, exclude=()):
+        """Mask các món có tên hoặc nguyên liệu chứa từ khóa bị loại trừ"""
+        mask = np.zeros(len(self), dtype=bool)
+        for term in exclude:
+            term = term.lower().strip()
+            if not term:
+                continue
+            mask |= np.fromiter(
+                (
+                    term in name or any(term in ing for ing in ings)
+                    for name, ings in zip(self._names_lower, self.ingredients)
+                ),
+                dtype=bool,
+                count=len(self),
+            )
+        return mask
+
+
+def load_dish_catalog(driver, database: str) -> DishCatalog:
+    """Nạp toàn bộ Dish từ Neo4j vào DishCatalog"""
+    with driver.session(database=database) as session:
+        records = [record.data() for record in run_query(session, "dish_catalog")]
+    return DishCatalog.from_records(records)
+
+
+def _targets(calories, protein=None, carbs=None, fat=None):
+    """Vector mục tiêu và trọng số (macro không yêu cầu có trọng số 0)"""
+    target = np.array([calories, protein, carbs, fat], dtype=float)
+    weights = np.where(np.isnan(target), 0.0, PLAN_WEIGHTS)
+    return np.nan_to_num(target, nan=1.0), weights
+
+
+def _objective(totals, target, weights):
+    """Độ lệch có trọng số của tổng macro so với mục tiêu (vectorized theo hàng)"""
+    deviation = (totals - target) / np.maximum(target, 1.0)
+    # Dư protein không bị phạt
+    deviation[..., 1] = np.minimum(deviation[..., 1], 0.0)
+    over = np.maximum(deviation[..., 0] - CALORIE_TOLERANCE, 0.0)
+    return (deviation * deviation) @ weights + OVER_CALORIE_PENALTY * over * over
+
+
+def _local_search(matrix, allowed, target, weights, min_items, max_items, penalty):
+    """Greedy thêm món rồi cải thiện bằng các bước add/remove/swap
+
+    penalty: điểm phạt (n,) cộng vào mục tiêu cho mỗi món được chọn
+    """
+    selected = []
+    totals = np.zeros(len(MACRO_KEYS))
+    cost = 0.0
+    best = _objective(totals, target, weights)
+
+    for _ in range(MAX_ITERATIONS):
+        unavailable = ~allowed
+        unavailable[selected] = True
+        moves = []
+
+        # Thêm một món
+        if len(selected) < max_items:
+            scores = _objective(totals + matrix, target, weights) + cost + penalty
+            scores[unavailable] = np.inf
+            j = int(np.argmin(scores))
+            if np.isfinite(scores[j]):
+                moves.append((scores[j], "add", j))
+
+        if len(selected) >= min_items:
+            # Bỏ một món
+            if len(selected) > min_items:
+                scores = _objective(totals - matrix[selected], target, weights)
+                scores += cost - penalty[selected]
+                i = int(np.argmin(scores))
+                moves.append((scores[i], "remove", i))
+
+            # Đổi một món đã chọn lấy một món khác
+            if selected:
+                base = (totals - matrix[selected])[:, None, :]
+                scores = _objective(base + matrix[None, :, :], target, weights)
+                scores += cost - penalty[selected][:, None] + penalty[None, :]
+                scores[:, unavailable] = np.inf
+                i, j = np.unravel_index(int(np.argmin(scores)), scores.shape)
+                moves.append((scores[i, j], "swap", (int(i), int(j))))
+
+        if not moves:
+            break
+        score, kind, arg = min(moves, key=lambda move: move[0])
+        # Chưa đủ số món tối thiểu thì bắt buộc thêm, ngược lại chỉ nhận bước cải thiện
+        if len(selected) >= min_items and score >= best:
+            break
+
+        if kind == "add":
+            selected.append(arg)
+        elif kind == "remove":
+            selected.pop(arg)
+        else:
+            selected[arg[0]] = arg[1]
+        totals = matrix[selected].sum(axis=0)
+        cost = float(penalty[selected].sum())
+        best = score
+
+    return selected
+
+
+def _milp_candidates(matrix, allowed, target, weights, penalty):
+    """Chỉ số tối đa MILP_CANDIDATES món được phép có tỉ lệ macro gần mục tiêu nhất"""
+    candidates = np.flatnonzero(allowed)
+    if len(candidates) <= MILP_CANDIDATES:
+        return candidates
+    # Quy mọi món về cùng mức calories mục tiêu rồi so tỉ lệ macro
+    rows = matrix[candidates]
+    scaled = rows * (target[0] / np.maximum(rows[:, 0], 1.0))[:, None]
+    scores = _objective(scaled, target, weights) + penalty[candidates]
+    return candidates[np.argpartition(scores, MILP_CANDIDATES)[:MILP_CANDIDATES]]
+
+
+def _solve_milp(matrix, allowed, target, weights, min_items, max_items, penalty):
+    """Giải bài toán chọn món dạng integer program (L1) bằng scipy.optimize.milp"""
+    candidates = _milp_candidates(matrix, allowed, target, weights, penalty)
+    matrix = matrix[candidates]
+    n = matrix.shape[0]
+    active = np.flatnonzero(weights > 0)
+    m = len(active)
+    scale = weights[active] / np.maximum(target[active], 1.0)
+
+    # Biến: x (n, nhị phân), d_plus (m), d_minus (m)
+    over_cost = scale.copy()
+    over_cost[active == 1] = 0.0  # Dư protein không bị phạt
+    cost = np.concatenate([penalty[candidates], over_cost, scale])
+
+    a_eq = np.hstack([matrix[:, active].T, -np.eye(m), np.eye(m)])
+    a_count = np.concatenate([np.ones(n), np.zeros(2 * m)])[None, :]
+    a_cal = np.concatenate([matrix[:, 0], np.zeros(2 * m)])[None, :]
+    constraints = [
+        LinearConstraint(a_eq, target[active], target[active]),
+        LinearConstraint(a_count, min_items, max_items),
+        LinearConstraint(a_cal, 0, target[0] * (1 + CALORIE_TOLERANCE)),
+    ]
+    upper = np.concatenate([np.ones(n), np.full(2 * m, np.inf)])
+    result = milp(
+        cost,
+        constraints=constraints,
+        integrality=np.concatenate([np.ones(n), np.zeros(2 * m)]),
+        bounds=Bounds(np.zeros(n + 2 * m), upper),
+        options={"time_limit": MILP_TIME_LIMIT_S},
+    )
+    if result.x is None:
+        return None
+    return [int(candidates[i]) for i in np.flatnonzero(result.x[:n] > 0.5)]
+
+
+def plan_day(
+    catalog: DishCatalog,
+    calories: float,
+    protein=None,
+    carbs=None,
+    fat=None,
+    exclude=(),
+    min_items: int = MIN_ITEMS,
+    max_items: int = MAX_ITEMS,
+    solver: str = "local",
+    blocked=None,
+    penalty=None,
+):
+    """Chọn tập món cho một ngày sát nhất với mục tiêu calories/macro
+
+    solver: "local" (greedy + local search) hoặc "milp" (cần scipy)
+    blocked: mask các món không được chọn (VD: đã dùng đủ số lần trong tuần)
+    penalty: điểm phạt (n,) khi chọn từng món (VD: món đã ăn hôm trước)
+    on_target trong kết quả: tổng calories nằm trong ±CALORIE_TOLERANCE mục tiêu
+    """
+    target, weights = _targets(calories, protein, carbs, fat)
+    matrix = np.nan_to_num(catalog.matrix)
+    allowed = catalog.valid & ~catalog.exclusion_mask(exclude)
+    if blocked is not None:
+        allowed &= ~blocked
+    if penalty is None:
+        penalty = np.zeros(len(catalog))
+    args = (matrix, allowed, target, weights, min_items, max_items, penalty)
+
+    selected = None
+    if solver == "milp" and milp is not None:
+        selected = _solve_milp(*args)
+    if selected is None:
+        selected = _local_search(*args)
+
+    totals = matrix[selected].sum(axis=0)
+    return {
+        "dishes": [catalog.names[i] for i in selected],
+        "indices": selected,
+        "totals": dict(zip(MACRO_KEYS, (round(float(v), 1) for v in totals))),
+        "score": float(_objective(totals, target, weights)),
+        "on_target": bool(abs(totals[0] - calories) <= CALORIE_TOLERANCE * calories),
+    }
+
+
+def plan_week(
+    catalog: DishCatalog, calories: float, days: int = 7, max_repeats: int = 2, **kwargs
+):
+    """Lập thực đơn nhiều ngày, mỗi món xuất hiện tối đa max_repeats lần
+
+    Món đã ăn hôm trước và món dùng nhiều lần bị phạt điểm để các ngày khác
+    nhau. Ngày không đạt calories vì hết lượt lặp lại thì lập lại không giới hạn
+    số lần (vẫn bị phạt); ngày vẫn lệch mục tiêu có on_target=False.
+    """
+    usage = np.zeros(len(catalog), dtype=int)
+    yesterday = np.zeros(len(catalog), dtype=bool)
+    plans = []
+    for _ in range(days):
+        penalty = YESTERDAY_PENALTY * yesterday + REPEAT_PENALTY * usage
+        plan = plan_day(
+            catalog,
+            calories,
+            blocked=usage >= max_repeats,
+            penalty=penalty,
+            **kwargs,
+        )
+        if not plan["on_target"]:
+            plan = plan_day(catalog, calories, penalty=penalty, **kwargs)
+        usage[plan["indices"]] += 1
+        yesterday[:] = False
+        yesterday[plan["indices"]] = True
+        plans.append(plan)
+    return plans
@@ -0,0 +1,174 @@
+"""Bộ nhớ hội thoại có giới hạn token: giữ các lượt gần nhất, tóm tắt dần các lượt cũ"""
+
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Ước lượng thô: tiếng Việt có dấu trung bình ~3 ký tự / token
+CHARS_PER_TOKEN = 3
+# Ngân sách token cho phần history gửi kèm prompt (tóm tắt + các lượt gần nhất)
+HISTORY_TOKEN_BUDGET = 1200
+SUMMARY_TOKEN_BUDGET = 300
+MAX_RECENT_TURNS = 5
+# Câu trả lời dài (danh sách nguyên liệu, thực đơn...) được rút gọn trước khi lưu
+MAX_STORED_CHARS = 800
+LIST_ITEMS_KEPT = 6
+
+SUMMARY_PROMPT = """Tóm tắt ngắn gọn (tối đa {max_words} từ, tiếng Việt) cuộc trò chuyện giữa user và huấn luyện viên gym.
+Giữ lại: thông tin cá nhân, mục tiêu, chấn thương, món ăn/bài tập đã được tư vấn và các quyết định quan trọng.
+
+Tóm tắt trước đó:
+{summary}
+
+Các lượt hội thoại mới:
+{turns}
+
+Tóm tắt mới:"""
+
+# Tóm tắt chạy nền, không chặn lượt trả lời hiện tại
+_summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="memory")
+
+
+def estimate_tokens(text: str) -> int:
+    """Ước lượng số token của một đoạn text"""
+    return len(text) // CHARS_PER_TOKEN + 1 if text else 0
+
+
+def _shorten_list(line: str) -> str:
+    """Cắt bớt các dòng liệt kê dài (VD: danh sách nguyên liệu)"""
+    items = line.split(", ")
+    if len(items) <= LIST_ITEMS_KEPT:
+        return line
+    return ", ".join(items[:LIST_ITEMS_KEPT]) + ", …"
+
+
+def compact_text(text: str, max_chars: int = MAX_STORED_CHARS) -> str:
+    """Rút gọn câu trả lời trước khi lưu: bỏ dòng trống, khoảng trắng thừa, list dài"""
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    compact = "\n".join(_shorten_list(line) for line in lines if line)
+    if len(compact) > max_chars:
+        compact = compact[:max_chars].rstrip() + " …"
+    return compact
+
+
+def format_turns(turns) -> str:
+    return "\n".join(f"User: {user_msg}\nAI: {ai_msg}" for user_msg, ai_msg in turns)
+
+
+def extractive_summary(summary: str, turns, max_tokens: int = SUMMARY_TOKEN_BUDGET):
+    """Tóm tắt không cần LLM: nối các câu hỏi của user, giữ phần mới nhất"""
+    parts = [summary] if summary else []
+    parts.extend(f"User hỏi: {user_msg}" for user_msg, _ in turns)
+    text = " | ".join(parts)
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    return text if len(text) <= max_chars else "…" + text[-max_chars:]
+
+
+def llm_summarizer(llm, max_tokens: int = SUMMARY_TOKEN_BUDGET):
+    """Tạo hàm tóm tắt (summary, turns) -> summary dùng LLM"""
+
+    def summarize(summary: str, turns) -> str:
+        prompt = SUMMARY_PROMPT.format(
+            max_words=max_tokens * CHARS_PER_TOKEN // 5,
+            summary=summary or "(chưa có)",
+            turns=format_turns(turns),
+        )
+        return compact_text(
+            llm.invoke(prompt).content, max_chars=max_tokens * CHARS_PER_TOKEN
+        )
+
+    return summarize
+
+
+class ConversationMemory:
+    """Lịch sử gửi kèm prompt: tóm tắt các lượt cũ + các lượt gần nhất trong ngân sách
+
+    Lượt bị đẩy khỏi cửa sổ được tóm tắt dần trong background bằng summarizer;
+    nếu chưa có summarizer (hoặc LLM lỗi) thì dùng tóm tắt trích xuất.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = HISTORY_TOKEN_BUDGET,
+        max_recent_turns: int = MAX_RECENT_TURNS,
+        summarizer=None,
+    ):
+        self.token_budget = token_budget
+        self.max_recent_turns = max_recent_turns
+        self.summarizer = summarizer
+        self.summary = ""
+        self.recent = deque()
+        self.pending = []
+        self.last_prompt_tokens = 0
+        self._recent_tokens = 0
+        self._summarizing = False
+        self._future = None
+        self._lock = threading.Lock()
+
+    def add_turn(self, user_msg: str, ai_msg: str):
+        """Lưu lượt mới (đã rút gọn), đẩy lượt cũ ra ngoài cửa sổ để tóm tắt"""
+        turn = (compact_text(user_msg), compact_text(ai_msg))
+        with self._lock:
+            self.recent.append(turn)
+            self._recent_tokens += self._turn_tokens(turn)
+            window_budget = self.token_budget - estimate_tokens(self.summary)
+            while len(self.recent) > 1 and (
+                len(self.recent) > self.max_recent_turns
+                or self._recent_tokens > window_budget
+            ):
+                old = self.recent.popleft()
+                self._recent_tokens -= self._turn_tokens(old)
+                self.pending.append(old)
+            schedule = bool(self.pending) and not self._summarizing
+            self._summarizing = self._summarizing or schedule
+        if schedule:
+            self._future = _summary_executor.submit(self._summarize_pending)
+
+    def messages(self, user_input: str = ""):
+        """Danh sách message cho MessagesPlaceholder chat_history"""
+        with self._lock:
+            summary = self.summary
+            turns = list(self.recent)
+
+        chat_messages = []
+        if summary:
+            chat_messages.append(("system", f"Tóm tắt hội thoại trước: {summary}"))
+        for user_msg, ai_msg in turns:
+            chat_messages.append(("human", user_msg))
+            chat_messages.append(("assistant", ai_msg))
+
+        self.last_prompt_tokens = estimate_tokens(user_input) + sum(
+            estimate_tokens(text) for _, text in chat_messages
+        )
+        return chat_messages
+
+    def wait_idle(self, timeout: float = 30.0):
+        """Chờ tóm tắt nền hoàn tất (dùng khi benchmark/đóng ứng dụng)"""
+        if self._future:
+            self._future.result(timeout=timeout)
+
+    def _turn_tokens(self, turn) -> int:
+        return estimate_tokens(turn[0]) + estimate_tokens(turn[1])
+
+    def _summarize_pending(self):
+        """Tóm tắt các lượt đang chờ, lặp lại nếu có lượt mới trong lúc tóm tắt"""
+        while True:
+            with self._lock:
+                turns = list(self.pending)
+                summary = self.summary
+                if not turns:
+                    self._summarizing = False
+                    return
+
+            new_summary = None
+            if self.summarizer:
+                try:
+                    new_summary = self.summarizer(summary, turns)
+                except Exception:
+                    new_summary = None
+            if not new_summary:
+                new_summary = extractive_summary(summary, turns)
+
+            with self._lock:
+                self.summary = new_summary
+                del self.pending[: len(turns)]
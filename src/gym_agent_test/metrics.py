@@ -0,0 +1,224 @@
+"""Metrics kiểu Prometheus cho runtime chat (không cần prometheus_client)
+
+Counter/Histogram có label, xuất theo text exposition format của Prometheus:
+server phục vụ tại GET /metrics, CLI ghi định kỳ ra METRICS_PATH (dùng được với
+textfile collector của node_exporter) khi đặt METRICS_DUMP_INTERVAL > 0.
+
+Độ trễ tool, LLM (token), embeddings và truy vấn Neo4j lấy từ span của tracing
+(observer); số lượt theo nhánh, fallback sang simple_chat và cache hit/miss được
+đếm trực tiếp tại chỗ.
+"""
+
+import os
+import threading
+from pathlib import Path
+
+from gym_agent_test import tracing
+
+METRICS_PATH = Path(os.getenv("METRICS_PATH", ".metrics/gym_agent.prom"))
+METRICS_DUMP_INTERVAL = float(os.getenv("METRICS_DUMP_INTERVAL", "0"))
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra="") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels.get(n, "") for n in self.labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labels, key)} {value:g}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [số lượng theo bucket..., sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            counts = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            counts[-2] += value
+            counts[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(counts)) for key, counts in self._values.items())
+        for key, counts in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labels, key, f'le="{bound:g}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labels, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {counts[-1]}"
+            yield f"{self.name}_sum{_format_labels(self.labels, key)} {counts[-2]:g}"
+            yield f"{self.name}_count{_format_labels(self.labels, key)} {counts[-1]}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labels=()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+
+    def histogram(
+        self, name: str, help_text: str, labels=(), buckets=LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        """Text exposition format (Content-Type: text/plain; version=0.0.4)"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+TURNS = REGISTRY.counter(
+    "gym_turns_total", "Số lượt hội thoại theo nhánh xử lý", ["path"]
+)
+TURN_SECONDS = REGISTRY.histogram(
+    "gym_turn_duration_seconds", "Thời gian xử lý một lượt", buckets=LLM_BUCKETS
+)
+SIMPLE_CHAT_FALLBACKS = REGISTRY.counter(
+    "gym_simple_chat_fallbacks_total", "Số lần chuyển sang simple_chat", ["reason"]
+)
+ERRORS = REGISTRY.counter("gym_errors_total", "Số lỗi theo thành phần", ["component"])
+HTTP_REQUESTS = REGISTRY.counter(
+    "gym_http_requests_total", "Request HTTP của server", ["endpoint", "status"]
+)
+TOOL_SECONDS = REGISTRY.histogram(
+    "gym_tool_duration_seconds", "Thời gian chạy tool của agent", ["tool"]
+)
+NEO4J_SECONDS = REGISTRY.histogram(
+    "gym_neo4j_query_duration_seconds", "Thời gian truy vấn Neo4j", ["query"]
+)
+NEO4J_ROWS = REGISTRY.counter(
+    "gym_neo4j_rows_total", "Số dòng Neo4j trả về theo truy vấn", ["query"]
+)
+LLM_SECONDS = REGISTRY.histogram(
+    "gym_llm_duration_seconds", "Thời gian một lần gọi LLM", buckets=LLM_BUCKETS
+)
+LLM_TOKENS = REGISTRY.counter("gym_llm_tokens_total", "Token LLM vào/ra", ["direction"])
+EMBEDDING_SECONDS = REGISTRY.histogram(
+    "gym_embedding_duration_seconds", "Thời gian một lần gọi embeddings"
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "gym_cache_requests_total",
+    "Tra cứu cache theo kết quả hit/miss",
+    ["cache", "result"],
+)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def observe_span(span):
+    """Observer của tracing: chuyển span đã kết thúc thành metrics"""
+    seconds = (span.duration_ms or 0.0) / 1000
+    name = span.name
+    if name == "turn":
+        TURN_SECONDS.observe(seconds)
+    elif name.startswith("tool."):
+        TOOL_SECONDS.observe(seconds, tool=name[5:])
+    elif name == "neo4j.query":
+        query = span.attributes.get("query", "")
+        NEO4J_SECONDS.observe(seconds, query=query)
+        NEO4J_ROWS.inc(span.attributes.get("rows", 0), query=query)
+    elif name == "llm":
+        LLM_SECONDS.observe(seconds)
+        for direction in ("input", "output"):
+            LLM_TOKENS.inc(
+                span.attributes.get(f"{direction}_tokens", 0), direction=direction
+            )
+    elif name == "embeddings":
+        EMBEDDING_SECONDS.observe(seconds)
+    if span.error:
+        ERRORS.inc(component=name.split(".")[0])
+
+
+def enable():
+    """Bật thu thập metrics từ span (gọi một lần lúc khởi động)"""
+    tracing.add_observer(observe_span)
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+def dump(path=METRICS_PATH):
+    """Ghi metrics ra file (ghi file tạm rồi rename để không đọc phải file dở)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(render(), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def start_dump(interval: float = METRICS_DUMP_INTERVAL, path=METRICS_PATH):
+    """Bật metrics và ghi ra file mỗi interval giây trong thread nền
+
+    Trả về threading.Event để dừng; interval <= 0 thì không làm gì (None).
+    """
+    if interval <= 0:
+        return None
+    enable()
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval):
+            dump(path)
+
+    threading.Thread(target=loop, name="metrics-dump", daemon=True).start()
+    return stop
@@ -0,0 +1,109 @@
+"""Mô hình dữ liệu gọn (dataclass có __slots__) cho món ăn, nguyên liệu và profile
+
+Mỗi object không có __dict__ riêng: món cache lâu và profile của hàng nghìn phiên
+chiếm ít bộ nhớ hơn dict. Benefit là flyweight (mỗi tên một object dùng chung),
+nguyên liệu/benefit của món lưu bằng tuple. Các class vẫn hỗ trợ x["key"] và
+x.get("key") như dict để code định dạng kết quả không phải đổi.
+
+Đo bộ nhớ trước/sau: poetry run python benchmarks/bench_memory.py
+"""
+
+from dataclasses import asdict, dataclass, field
+
+EMPTY = ()
+
+
+class SlotRow:
+    """Truy cập kiểu dict (get, [], keys) trên các slot đã gán"""
+
+    __slots__ = ()
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def keys(self):
+        return [key for key in self.__slots__ if hasattr(self, key)]
+
+
+@dataclass(frozen=True, slots=True)
+class Benefit:
+    name: str
+
+    def __str__(self):
+        return self.name
+
+
+_benefits = {}
+
+
+def benefit(name: str) -> Benefit:
+    """Benefit dùng chung theo tên (số benefit ít, món thì nhiều)"""
+    value = _benefits.get(name)
+    if value is None:
+        value = _benefits.setdefault(name, Benefit(name))
+    return value
+
+
+def benefits(names) -> tuple:
+    """Tuple Benefit từ danh sách tên, bỏ null"""
+    if not names:
+        return EMPTY
+    return tuple(benefit(name) for name in names if name is not None)
+
+
+@dataclass(slots=True)
+class IngredientUse(SlotRow):
+    """Nguyên liệu trong một món (định lượng g và benefit của nguyên liệu)"""
+
+    name: str
+    quantity: float | None = None
+    benefits: tuple = EMPTY
+
+
+@dataclass(slots=True)
+class Dish(SlotRow):
+    """Món ăn; cột không có trong truy vấn để None"""
+
+    type: str = "dish"
+    name: str | None = None
+    calories: float | None = None
+    protein: float | None = None
+    carbs: float | None = None
+    fat: float | None = None
+    cuisine: str | None = None
+    benefits: tuple | None = None
+    ingredients: tuple | None = None
+    matched_ingredients: tuple | None = None
+    match_count: int | None = None
+
+
+@dataclass(slots=True)
+class UserProfile(SlotRow):
+    """Thông tin cá nhân của user trong một phiên"""
+
+    height: float | None = None
+    weight: float | None = None
+    bmi: float | None = None
+    goals: list = field(default_factory=list)
+    preferences: list = field(default_factory=list)
+    name: str | None = None
+    injuries: list = field(default_factory=list)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def to_dict(self) -> dict:
+        return asdict(self)
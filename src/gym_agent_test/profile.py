@@ -0,0 +1,27 @@
+"""User profile dùng chung cho CLI và server"""
+
+from gym_agent_test.models import UserProfile
+
+
+def new_user_profile() -> UserProfile:
+    """Tạo user profile rỗng (models.UserProfile) để lưu thông tin cá nhân"""
+    return UserProfile()
+
+
+# Phần prompt thay đổi theo user, đặt sau system prompt tĩnh để agent và prompt
+# được tạo một lần và dùng chung cho mọi phiên
+PROFILE_PROMPT = "THÔNG TIN USER HIỆN TẠI:\n{user_profile}"
+
+
+def format_user_profile(profile: dict) -> str:
+    """Render profile thành giá trị biến {user_profile} của prompt agent"""
+    bmi = profile.get("bmi")
+    lines = [
+        f"- Chiều cao: {profile.get('height') or 'chưa có'} m",
+        f"- Cân nặng: {profile.get('weight') or 'chưa có'} kg",
+        f"- BMI: {f'{bmi:.1f}' if bmi else 'chưa tính'}",
+        f"- Mục tiêu: {', '.join(profile.get('goals', [])) or 'chưa rõ'}",
+    ]
+    if "injuries" in profile:
+        lines.append(f"- Chấn thương: {', '.join(profile['injuries']) or 'không có'}")
+    return "\n".join(lines)
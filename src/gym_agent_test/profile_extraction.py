@@ -0,0 +1,117 @@
+"""Trích xuất chiều cao, cân nặng, mục tiêu và chấn thương từ tin nhắn của user
+
+Một regex duy nhất (biên dịch lúc import) với named group cho từng slot, quét câu
+đã lowercase một lần; hỗ trợ "1m70", "1.70m", "170cm", "cao 1.7", "70kg", "70 ký",
+"nặng 70".
+"""
+
+import re
+
+from gym_agent_test.bmi import refresh_profile_bmi
+from gym_agent_test.intents import GOAL_KEYWORDS, INJURY_KEYWORDS, IntentClassifier
+
+HEIGHT_RANGE_M = (0.5, 2.5)
+WEIGHT_RANGE_KG = (20.0, 300.0)
+
+_NUMBER = r"\d+(?:[.,]\d+)?"
+# Thứ tự ưu tiên khi một câu có nhiều cách ghi cho cùng một slot
+HEIGHT_GROUPS = ("height_m", "height_cm", "height_cao")
+WEIGHT_GROUPS = ("weight_kg", "weight_nang", "weight_can")
+# Số đo có ghi đơn vị (m, cm, kg); "cao 1.7", "nặng 70" thì không
+UNIT_HEIGHT_GROUPS = ("height_m", "height_cm")
+UNIT_WEIGHT_GROUPS = ("weight_kg",)
+SLOT_GROUPS = HEIGHT_GROUPS + WEIGHT_GROUPS + ("keyword",)
+
+_keywords = IntentClassifier(
+    {
+        **{f"goals:{goal}": terms for goal, terms in GOAL_KEYWORDS.items()},
+        **{f"injuries:{injury}": terms for injury, terms in INJURY_KEYWORDS.items()},
+    }
+)
+
+# Lọc nhanh theo ký tự đầu để engine bỏ qua phần lớn vị trí trong câu
+_FIRST_CHARS = "".join(sorted(set("0123456789cn") | {k[0] for k in _keywords.keywords}))
+
+# Lookahead để các match có thể chồng lấn (VD: "cao 1m70" khớp cả height_m và
+# height_cao); (?<![\d.,]) tránh match lại từ giữa một con số
+PROFILE_PATTERN = re.compile(
+    f"(?=[{re.escape(_FIRST_CHARS)}])"
+    "(?=(?:"
+    + "|".join(
+        [
+            r"(?<![\d.,])(?P<height_m>\d(?:[.,]\d{1,2})?)\s*m"
+            r"(?:(?P<height_m_rest>\d{1,2})(?!\d)|(?!\w))",
+            r"(?<![\d.,])(?P<height_cm>\d{2,3}(?:[.,]\d)?)\s*cm(?!\w)",
+            rf"\bcao\s*(?:khoảng\s*)?(?P<height_cao>{_NUMBER})",
+            rf"(?<![\d.,])(?P<weight_kg>{_NUMBER})\s*(?:kgs?|ký|kí|ki lô|kilo)(?!\w)",
+            rf"\bnặng\s*(?:khoảng\s*)?(?P<weight_nang>{_NUMBER})",
+            rf"\bcân\s+(?P<weight_can>{_NUMBER})",
+            rf"(?P<keyword>{_keywords.alternation})",
+        ]
+    )
+    + "))"
+)
+
+
+def _to_float(value: str) -> float:
+    return float(value.replace(",", "."))
+
+
+def _height(group: str, match) -> float:
+    """Quy đổi chiều cao về mét"""
+    value = _to_float(match.group(group))
+    if group == "height_m":
+        rest = match.group("height_m_rest")
+        if rest:
+            value += int(rest) / (10 ** len(rest))
+    elif group == "height_cm" or value > 10:
+        value /= 100
+    return value
+
+
+def extract_profile_slots(text: str, units_only: bool = False) -> dict:
+    """Các slot profile trong câu: {"height", "weight", "goals", "injuries"}
+
+    units_only: chỉ nhận chiều cao/cân nặng có ghi đơn vị (VD: fast path BMI)
+    """
+    heights, weights = {}, {}
+    labels = set()
+    for match in PROFILE_PATTERN.finditer(text.lower()):
+        group = next(name for name in SLOT_GROUPS if match.group(name) is not None)
+        if group == "keyword":
+            labels |= _keywords.labels_for(match.group("keyword"))
+        elif group in HEIGHT_GROUPS:
+            value = _height(group, match)
+            if HEIGHT_RANGE_M[0] <= value <= HEIGHT_RANGE_M[1]:
+                heights.setdefault(group, value)
+        else:
+            value = _to_float(match.group(group))
+            if WEIGHT_RANGE_KG[0] <= value <= WEIGHT_RANGE_KG[1]:
+                weights.setdefault(group, value)
+
+    height_groups = UNIT_HEIGHT_GROUPS if units_only else HEIGHT_GROUPS
+    weight_groups = UNIT_WEIGHT_GROUPS if units_only else WEIGHT_GROUPS
+    height = next((heights[g] for g in height_groups if g in heights), None)
+    weight = next((weights[g] for g in weight_groups if g in weights), None)
+    slots = {"height": height, "weight": weight, "goals": [], "injuries": []}
+    for label in _keywords.sorted_labels(labels):
+        slot, _, value = label.partition(":")
+        slots[slot].append(value)
+    return slots
+
+
+def update_profile(profile: dict, text: str) -> dict:
+    """Cập nhật profile từ tin nhắn; chỉ ghi các slot tìm thấy"""
+    slots = extract_profile_slots(text)
+    measured = [key for key in ("height", "weight") if slots[key] is not None]
+    for key in measured:
+        profile[key] = slots[key]
+    if measured:
+        refresh_profile_bmi(profile)
+    for key in ("goals", "injuries"):
+        if key not in profile:
+            continue
+        for value in slots[key]:
+            if value not in profile[key]:
+                profile[key].append(value)
+    return slots
@@ -0,0 +1,181 @@
+"""Profile truy vấn Cypher và slow-query log
+
+CYPHER_PROFILE=1 chạy các truy vấn đọc trong graph_queries với PROFILE (lệnh
+schema/ghi trong WRITE_QUERIES thì không) và ghi lại db hits, số dòng và các
+operator của plan. Đặt SLOW_QUERY_MS thì truy vấn chạy lâu hơn ngưỡng được ghi
+thêm một dòng JSON vào SLOW_QUERY_LOG (0 ghi mọi truy vấn, âm là tắt). Không đặt
+SLOW_QUERY_MS thì log tắt, trừ khi bật CYPHER_PROFILE: khi đó ngưỡng là 0, mọi
+truy vấn đều được ghi (truy vấn đọc kèm thống kê profile).
+
+Xếp hạng truy vấn theo chi phí từ log:
+    poetry run python -m gym_agent_test.query_profile --sort db_hits
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+CYPHER_PROFILE = os.getenv("CYPHER_PROFILE", "0").lower() in ("1", "true", "yes")
+# None: theo CYPHER_PROFILE (bật thì ghi mọi truy vấn, tắt thì không ghi)
+SLOW_QUERY_MS = (
+    float(os.environ["SLOW_QUERY_MS"]) if os.getenv("SLOW_QUERY_MS") else None
+)
+SLOW_QUERY_LOG = Path(os.getenv("SLOW_QUERY_LOG", ".metrics/slow_queries.jsonl"))
+# Số operator tốn nhiều db hits nhất được giữ lại mỗi lần chạy
+TOP_OPERATORS = 5
+MAX_PARAM_CHARS = 200
+
+_log_lock = threading.Lock()
+
+
+def profiled(cypher: str) -> str:
+    return f"PROFILE {cypher}" if CYPHER_PROFILE else cypher
+
+
+def _operators(plan: dict):
+    """Duyệt cây profile (dict của ResultSummary.profile), trả về mọi operator"""
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        args = node.get("args") or {}
+        yield {
+            "operator": node.get("operatorType", "?").split("@")[0],
+            "db_hits": node.get("dbHits", args.get("DbHits", 0)) or 0,
+            "rows": node.get("rows", args.get("Rows", 0)) or 0,
+            "details": str(args.get("Details", ""))[:MAX_PARAM_CHARS],
+        }
+        stack.extend(node.get("children") or ())
+
+
+def profile_stats(profile) -> dict:
+    """Tổng db hits và các operator tốn kém nhất; {} nếu không có profile"""
+    if not profile:
+        return {}
+    operators = list(_operators(profile))
+    operators.sort(key=lambda op: op["db_hits"], reverse=True)
+    return {
+        "db_hits": sum(op["db_hits"] for op in operators),
+        "operators": operators[:TOP_OPERATORS],
+    }
+
+
+def _short_params(params: dict) -> dict:
+    return {key: repr(value)[:MAX_PARAM_CHARS] for key, value in params.items()}
+
+
+def slow_query_threshold() -> float:
+    """Ngưỡng slow-query log (ms), âm là tắt"""
+    if SLOW_QUERY_MS is not None:
+        return SLOW_QUERY_MS
+    return 0.0 if CYPHER_PROFILE else -1.0
+
+
+def record_execution(
+    name: str, params: dict, elapsed_ms: float, rows: int, summary, stats: dict
+):
+    """Ghi slow-query log nếu truy vấn chạy lâu hơn ngưỡng"""
+    threshold = slow_query_threshold()
+    if threshold < 0 or elapsed_ms < threshold:
+        return
+    entry = {
+        "ts": time.time(),
+        "query": name,
+        "params": _short_params(params),
+        "elapsed_ms": round(elapsed_ms, 3),
+        "db_available_ms": getattr(summary, "result_available_after", None),
+        "db_consumed_ms": getattr(summary, "result_consumed_after", None),
+        "rows": rows,
+        **stats,
+    }
+    line = json.dumps(entry, ensure_ascii=False)
+    with _log_lock:
+        SLOW_QUERY_LOG.parent.mkdir(parents=True, exist_ok=True)
+        with open(SLOW_QUERY_LOG, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def load_log(path=SLOW_QUERY_LOG) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def rank_queries(entries, sort: str = "db_hits") -> list:
+    """Gộp log theo tên truy vấn, xếp theo tổng db hits (hoặc tổng thời gian)"""
+    grouped = {}
+    for entry in entries:
+        grouped.setdefault(entry["query"], []).append(entry)
+
+    report = []
+    for name, runs in grouped.items():
+        elapsed = np.array([run["elapsed_ms"] for run in runs])
+        db_hits = [run["db_hits"] for run in runs if "db_hits" in run]
+        operators = {}
+        for run in runs:
+            for op in run.get("operators", ()):
+                operator = op["operator"]
+                operators[operator] = operators.get(operator, 0) + op["db_hits"]
+        report.append(
+            {
+                "query": name,
+                "runs": len(runs),
+                "total_ms": float(elapsed.sum()),
+                "p50_ms": float(np.percentile(elapsed, 50)),
+                "p95_ms": float(np.percentile(elapsed, 95)),
+                "rows": float(np.mean([run["rows"] for run in runs])),
+                "total_db_hits": sum(db_hits),
+                "max_db_hits": max(db_hits, default=0),
+                "hot_operator": max(operators, key=operators.get, default=""),
+            }
+        )
+    key = "total_db_hits" if sort == "db_hits" else "total_ms"
+    report.sort(key=lambda row: (row[key], row["total_ms"]), reverse=True)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Xếp hạng truy vấn Cypher theo chi phí"
+    )
+    parser.add_argument("--log", type=Path, default=SLOW_QUERY_LOG)
+    parser.add_argument("--sort", choices=["db_hits", "time"], default="db_hits")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    console = Console()
+    if not args.log.exists():
+        console.print(
+            f"⚠️ Chưa có log {args.log}: chạy với CYPHER_PROFILE=1 SLOW_QUERY_MS=0",
+            style="yellow",
+        )
+        return
+
+    entries = load_log(args.log)
+    table = Table(title=f"🔎 Truy vấn Cypher theo chi phí ({len(entries)} lần chạy)")
+    table.add_column("query", no_wrap=True)
+    for column in ("runs", "p50 ms", "p95 ms", "tổng ms", "rows"):
+        table.add_column(column, justify="right")
+    table.add_column("db hits (tổng / max)", justify="right")
+    table.add_column("operator nặng nhất")
+    for row in rank_queries(entries, args.sort)[: args.limit]:
+        table.add_row(
+            row["query"],
+            str(row["runs"]),
+            f"{row['p50_ms']:.1f}",
+            f"{row['p95_ms']:.1f}",
+            f"{row['total_ms']:.0f}",
+            f"{row['rows']:.1f}",
+            f"{row['total_db_hits']} / {row['max_db_hits']}",
+            row["hot_operator"],
+        )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Xếp hạng món ăn theo mức độ phù hợp macro với mục tiêu của user (NumPy)"""
+
+import numpy as np
+
+# Thứ tự cột trong ma trận macro
+MACRO_KEYS = ("calories", "protein", "carbs", "fat")
+
+# Giá trị mặc định khi profile chưa có cân nặng
+DEFAULT_WEIGHT_KG = 65.0
+MEALS_PER_DAY = 3
+
+# Trọng số từng macro khi tính độ lệch (calories, protein, carbs, fat)
+BASE_WEIGHTS = np.array([1.0, 1.0, 0.5, 0.5])
+GOAL_WEIGHTS = {
+    "tăng cơ": np.array([0.0, 1.5, 0.0, 0.0]),
+    "giảm cân": np.array([1.5, 0.5, 0.0, 0.5]),
+    "tăng sức mạnh": np.array([0.0, 1.0, 0.5, 0.0]),
+    "giữ dáng": np.array([0.5, 0.0, 0.0, 0.0]),
+}
+
+# Phạt cho mỗi macro bị thiếu dữ liệu (None)
+MISSING_PENALTY = 0.25
+
+
+def target_macros(profile: dict) -> np.ndarray:
+    """Tính vector macro mục tiêu cho một bữa ăn từ goals và BMI của user"""
+    weight = profile.get("weight") or DEFAULT_WEIGHT_KG
+    height = profile.get("height")
+    goals = profile.get("goals") or []
+
+    bmi = profile.get("bmi")
+    if not bmi and height:
+        bmi = weight / (height * height)
+
+    daily_calories = weight * 30
+    protein_per_kg = 1.4
+    if "giảm cân" in goals or (bmi and bmi >= 25):
+        daily_calories -= 400
+    elif "tăng cơ" in goals or (bmi and bmi < 18.5):
+        daily_calories += 300
+    if "tăng cơ" in goals or "tăng sức mạnh" in goals:
+        protein_per_kg = 2.0
+
+    calories = daily_calories / MEALS_PER_DAY
+    protein = weight * protein_per_kg / MEALS_PER_DAY
+    fat = calories * 0.25 / 9
+    carbs = max(calories - protein * 4 - fat * 9, 0) / 4
+
+    return np.array([calories, protein, carbs, fat])
+
+
+def macro_weights(profile: dict) -> np.ndarray:
+    """Trọng số macro theo mục tiêu của user"""
+    weights = BASE_WEIGHTS.copy()
+    for goal in profile.get("goals") or []:
+        if goal in GOAL_WEIGHTS:
+            weights += GOAL_WEIGHTS[goal]
+    return weights
+
+
+def macro_matrix(candidates) -> np.ndarray:
+    """Đưa macro của các ứng viên vào ma trận (n, 4); thiếu dữ liệu -> NaN"""
+    return np.array(
+        [[c.get(key) for key in MACRO_KEYS] for c in candidates], dtype=float
+    ).reshape(-1, len(MACRO_KEYS))
+
+
+def score_macros(matrix: np.ndarray, target: np.ndarray, weights: np.ndarray):
+    """Chấm điểm toàn bộ ứng viên trong một lượt vectorized (điểm càng cao càng tốt)"""
+    missing = np.isnan(matrix)
+    deviation = (np.where(missing, target, matrix) - target) / np.maximum(target, 1.0)
+    # Dư protein không bị phạt, chỉ phạt khi thiếu
+    deviation[:, 1] = np.minimum(deviation[:, 1], 0.0)
+    return -(deviation * deviation) @ weights - MISSING_PENALTY * missing.sum(axis=1)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Lấy chỉ số top-k bằng argpartition, sau đó chỉ sắp xếp k phần tử"""
+    n = scores.shape[0]
+    if k >= n:
+        return np.argsort(-scores, kind="stable")
+    idx = np.argpartition(-scores, k)[:k]
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+def rank_dishes(candidates, profile: dict, k: int = 5, priors=None):
+    """Xếp hạng các món ăn ứng viên theo độ khớp macro với profile, trả về top-k
+
+    priors: điểm cộng thêm cho từng ứng viên (VD: món khớp đúng tên user hỏi)
+    """
+    if not candidates:
+        return []
+
+    scores = score_macros(
+        macro_matrix(candidates), target_macros(profile), macro_weights(profile)
+    )
+    if priors is not None:
+        scores = scores + np.asarray(priors, dtype=float)
+
+    return [candidates[i] for i in top_k(scores, k)]
+
+
+def merge_ranked(groups, profile: dict, k: int = 5):
+    """Ghép kết quả của nhiều truy vấn theo thứ tự nhóm, trả về top-k
+
+    groups: [(candidates, ordered)]. Nhóm ordered đã được truy vấn sắp xếp theo
+    điều kiện user hỏi (VD: ORDER BY calories) nên giữ nguyên thứ tự; nhóm còn
+    lại (tìm theo tên, theo benefit) mới xếp theo độ khớp macro với profile.
+    """
+    merged = []
+    for candidates, ordered in groups:
+        remaining = k - len(merged)
+        if remaining <= 0:
+            break
+        if not ordered:
+            candidates = rank_dishes(candidates, profile, k=remaining)
+        merged.extend(candidates[:remaining])
+    return merged
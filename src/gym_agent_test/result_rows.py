@@ -0,0 +1,224 @@
+"""Ánh xạ record Neo4j sang dòng kết quả có __slots__ theo danh mục truy vấn
+
+ROW_SPECS khai báo cho từng truy vấn trong graph_queries.QUERIES: cột Cypher nào
+vào slot nào (kèm hàm chuyển đổi nếu cần). Mapper đọc record[cột] trực tiếp vào
+slot, không dựng dict trung gian; cột không tồn tại báo KeyError thay vì lặng lẽ
+trả về None. Dòng món ăn là models.Dish; mọi dòng vẫn hỗ trợ row["x"] và
+row.get("x") như dict.
+
+Đối chiếu cột RETURN của từng Cypher với mapper:
+    poetry run python -m gym_agent_test.result_rows
+"""
+
+import re
+import sys
+from dataclasses import dataclass
+
+from rich.console import Console
+
+from gym_agent_test.dish_summary import parse_summary
+from gym_agent_test.graph_queries import QUERIES, run_query
+from gym_agent_test.models import EMPTY, Dish, IngredientUse, SlotRow, benefits
+
+
+@dataclass(slots=True)
+class IngredientMacroRow(SlotRow):
+    type: str = "ingredient"
+    name: str | None = None
+    calories: float | None = None
+    protein: float | None = None
+    carbs: float | None = None
+    fat: float | None = None
+
+
+@dataclass(slots=True)
+class SimilarDishRow(SlotRow):
+    type: str = "similar_dish"
+    source: str | None = None
+    source_calories: float | None = None
+    source_protein: float | None = None
+    name: str | None = None
+    calories: float | None = None
+    protein: float | None = None
+    carbs: float | None = None
+    fat: float | None = None
+    score: float | None = None
+    jaccard: float | None = None
+
+
+def ingredients(values) -> tuple:
+    """collect({name, quantity, benefits}) -> (IngredientUse, ...), bỏ phần tử không tên"""
+    return tuple(
+        IngredientUse(value["name"], value["quantity"], benefits(value["benefits"]))
+        for value in values or EMPTY
+        if value and value.get("name")
+    )
+
+
+def summary(text) -> dict:
+    """Dish.summary -> các slot cuisine/ingredients/benefits ({} khi chưa có)"""
+    if not text:
+        return {}
+    data = parse_summary(text)
+    return {
+        "cuisine": data.get("cuisine"),
+        "ingredients": ingredients(data.get("ingredients")),
+        "benefits": benefits(data.get("benefits")),
+    }
+
+
+class RowSpec:
+    """Cách đọc dòng kết quả của một truy vấn
+
+    columns: {cột Cypher: slot | (slot, chuyển đổi)}; slot None nghĩa là hàm
+    chuyển đổi trả về dict {slot: giá trị}.
+    """
+
+    __slots__ = ("row_type", "kind", "columns")
+
+    def __init__(self, row_type, kind: str, columns: dict):
+        self.row_type = row_type
+        self.kind = kind
+        self.columns = tuple(
+            (column, *(spec if isinstance(spec, tuple) else (spec, None)))
+            for column, spec in columns.items()
+        )
+
+    def map(self, record):
+        row = self.row_type(self.kind)
+        for column, slot, convert in self.columns:
+            value = record[column]
+            if convert is None:
+                setattr(row, slot, value)
+            elif slot is None:
+                for key, converted in convert(value).items():
+                    setattr(row, key, converted)
+            else:
+                setattr(row, slot, convert(value))
+        return row
+
+
+MACROS = {"calories": "calories", "protein": "protein", "carbs": "carbs", "fat": "fat"}
+MACRO_COLUMNS = {"dish_name": "name", **MACROS}
+
+ROW_SPECS = {
+    "dish_by_name": RowSpec(
+        Dish,
+        "dish",
+        {
+            **MACRO_COLUMNS,
+            "cuisine": "cuisine",
+            "ingredients": ("ingredients", ingredients),
+            "benefits": ("benefits", benefits),
+        },
+    ),
+    "dish_summary_by_name": RowSpec(
+        Dish, "dish", {**MACRO_COLUMNS, "summary": (None, summary)}
+    ),
+    "dishes_by_ingredients": RowSpec(
+        Dish,
+        "dish_by_ingredient",
+        {
+            **MACRO_COLUMNS,
+            "matched_ingredients": ("matched_ingredients", ingredients),
+            "ingredients": ("ingredients", ingredients),
+            "benefits": ("benefits", benefits),
+            "match_count": "match_count",
+        },
+    ),
+    "dishes_by_calories": RowSpec(
+        Dish, "dish_by_cal", {**MACRO_COLUMNS, "benefits": ("benefits", benefits)}
+    ),
+    "dishes_by_benefit": RowSpec(Dish, "dish_by_benefit", MACRO_COLUMNS),
+    "high_protein_dishes": RowSpec(Dish, "dish_by_protein", MACRO_COLUMNS),
+    "low_calorie_dishes": RowSpec(Dish, "dish_low_cal", MACRO_COLUMNS),
+    "ingredient_macros": RowSpec(
+        IngredientMacroRow,
+        "ingredient",
+        {"ingredient": "name", **MACROS},
+    ),
+    "similar_dishes": RowSpec(
+        SimilarDishRow,
+        "similar_dish",
+        {
+            "source": "source",
+            "source_calories": "source_calories",
+            "source_protein": "source_protein",
+            **MACRO_COLUMNS,
+            "score": "score",
+            "jaccard": "jaccard",
+        },
+    ),
+}
+
+
+def map_rows(name: str, records) -> list:
+    spec = ROW_SPECS[name]
+    return [spec.map(record) for record in records]
+
+
+def fetch_rows(session, name: str, **params) -> list:
+    """run_query rồi ánh xạ mỗi record sang dòng có __slots__ của truy vấn đó"""
+    return map_rows(name, run_query(session, name, **params))
+
+
+# --- đối chiếu cột Cypher với mapper ---
+
+
+def _split_top_level(text: str) -> list:
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(text):
+        if char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def return_columns(cypher: str) -> list:
+    """Tên cột của mệnh đề RETURN cuối cùng (bỏ qua RETURN trong CALL {...})"""
+    clause = re.split(r"\bRETURN\b", cypher, flags=re.IGNORECASE)[-1]
+    clause = re.split(r"\b(?:ORDER\s+BY|SKIP|LIMIT)\b", clause, flags=re.IGNORECASE)
+    columns = []
+    for item in _split_top_level(clause[0]):
+        alias = re.search(r"\s+AS\s+(\w+)\s*$", item, flags=re.IGNORECASE)
+        columns.append(alias.group(1) if alias else item)
+    return columns
+
+
+def check_columns() -> list:
+    """Các lỗi lệch cột giữa Cypher trong QUERIES và ROW_SPECS (rỗng là khớp)"""
+    problems = []
+    for name, spec in ROW_SPECS.items():
+        if name not in QUERIES:
+            problems.append(f"{name}: không có trong graph_queries.QUERIES")
+            continue
+        returned = return_columns(QUERIES[name])
+        mapped = [column for column, _, _ in spec.columns]
+        missing = [column for column in mapped if column not in returned]
+        unmapped = [column for column in returned if column not in mapped]
+        if missing:
+            problems.append(f"{name}: mapper đọc cột Cypher không trả về {missing}")
+        if unmapped:
+            problems.append(f"{name}: cột Cypher chưa được ánh xạ {unmapped}")
+    return problems
+
+
+def main():
+    console = Console()
+    problems = check_columns()
+    for problem in problems:
+        console.print(f"❌ {problem}", style="bold red")
+    if problems:
+        sys.exit(1)
+    console.print(
+        f"✅ {len(ROW_SPECS)} truy vấn khớp cột với mapper", style="bold green"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Server HTTP/WebSocket nhiều user cho GraphRAG Gym Agent
+
+Mỗi user có một ChatSession riêng (history + profile); LLM, Neo4j driver và agent
+được tạo một lần và dùng chung cho mọi phiên.
+
+Chạy: poetry run python -m gym_agent_test.server --port 8080
+
+API:
+- POST /chat  {"session_id": "...", "message": "..."}
+- GET  /ws?session_id=...  (WebSocket, mỗi tin nhắn text là một câu hỏi)
+- GET  /health
+- GET  /metrics  (Prometheus text format)
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import WSMsgType, web
+
+from gym_agent_test import main_RAG_Graph as graph_agent
+from gym_agent_test import metrics
+from gym_agent_test.llm_client import get_llm
+from gym_agent_test.memory import llm_summarizer
+from gym_agent_test.session import SessionStore, use_session
+
+console = graph_agent.console
+
+# Số lượt xử lý đồng thời tối đa (mỗi lượt chiếm một thread gọi LLM/Neo4j)
+MAX_CONCURRENCY = int(os.getenv("SERVER_MAX_CONCURRENCY", "32"))
+MAX_SESSIONS = int(os.getenv("SERVER_MAX_SESSIONS", "1000"))
+SESSION_IDLE_TTL_S = float(os.getenv("SERVER_SESSION_TTL", "1800"))
+MAX_MESSAGE_CHARS = 2000
+
+
+class ChatService:
+    """Tài nguyên dùng chung (LLM, agent, Neo4j driver) và các phiên của user"""
+
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENCY,
+        max_sessions: int = MAX_SESSIONS,
+        idle_ttl: float = SESSION_IDLE_TTL_S,
+    ):
+        self.sessions = SessionStore(max_sessions=max_sessions, idle_ttl=idle_ttl)
+        self.limiter = asyncio.Semaphore(max_concurrency)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="gym-agent"
+        )
+        self.llm = None
+        self.agent_executor = None
+
+    def start(self):
+        """Khởi tạo LLM, kết nối GraphRAG và tạo agent một lần"""
+        metrics.enable()
+        self.llm = get_llm(graph_agent.api_key)
+        if not graph_agent.initialize_rag():
+            console.print("⚠️ Tiếp tục mà không có GraphRAG", style="bold yellow")
+        self.agent_executor = graph_agent.create_agent(self.llm)
+        self.sessions.summarizer = llm_summarizer(self.llm)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if graph_agent.graph_driver:
+            graph_agent.graph_driver.close()
+
+    def _respond(self, session, message: str) -> str:
+        """Chạy trong worker thread: gắn phiên vào context rồi gọi agent"""
+        with use_session(session):
+            return graph_agent.respond(
+                self.agent_executor, self.llm, message, show_progress=False
+            )
+
+    async def chat(self, session_id: str, message: str) -> dict:
+        """Xử lý một lượt hội thoại; các lượt của cùng một phiên chạy tuần tự"""
+        session = self.sessions.get(session_id)
+        async with session.lock:
+            async with self.limiter:
+                loop = asyncio.get_running_loop()
+                response = await loop.run_in_executor(
+                    self.executor, self._respond, session, message
+                )
+        return {
+            "session_id": session_id,
+            "response": response,
+            "turns": len(session.history),
+            "history_tokens": session.memory.last_prompt_tokens,
+            "profile": session.profile.to_dict(),
+        }
+
+
+# Khóa của ChatService trong app (khóa chuỗi gây NotAppKeyWarning)
+SERVICE = web.AppKey("service", ChatService)
+
+
+def validate_message(message) -> str:
+    """Kiểm tra tin nhắn, trả về thông báo lỗi hoặc chuỗi rỗng nếu hợp lệ"""
+    if not isinstance(message, str) or not message.strip():
+        return "Thiếu 'message'"
+    if len(message) > MAX_MESSAGE_CHARS:
+        return f"'message' dài quá {MAX_MESSAGE_CHARS} ký tự"
+    return ""
+
+
+async def chat_handler(request: web.Request) -> web.Response:
+    """POST /chat"""
+    service = request.app[SERVICE]
+    try:
+        payload = await request.json()
+    except json.JSONDecodeError:
+        return web.json_response({"error": "Body phải là JSON"}, status=400)
+    if not isinstance(payload, dict):
+        return web.json_response({"error": "Body phải là JSON object"}, status=400)
+
+    message = payload.get("message")
+    error = validate_message(message)
+    if error:
+        return web.json_response({"error": error}, status=400)
+
+    session_id = str(payload.get("session_id") or uuid.uuid4())
+    return web.json_response(await service.chat(session_id, message.strip()))
+
+
+async def websocket_handler(request: web.Request) -> web.WebSocketResponse:
+    """GET /ws: một kết nối WebSocket ứng với một phiên"""
+    service = request.app[SERVICE]
+    session_id = request.query.get("session_id") or str(uuid.uuid4())
+    ws = web.WebSocketResponse(heartbeat=30)
+    await ws.prepare(request)
+
+    async for msg in ws:
+        if msg.type != WSMsgType.TEXT:
+            continue
+        # Chấp nhận text thuần hoặc JSON {"message": "..."}
+        message = msg.data
+        if message.lstrip().startswith("{"):
+            try:
+                message = json.loads(message).get("message")
+            except (json.JSONDecodeError, AttributeError):
+                pass
+
+        error = validate_message(message)
+        if error:
+            await ws.send_json({"session_id": session_id, "error": error})
+            continue
+        await ws.send_json(await service.chat(session_id, message.strip()))
+
+    return ws
+
+
+async def health_handler(request: web.Request) -> web.Response:
+    """GET /health"""
+    service = request.app[SERVICE]
+    return web.json_response(
+        {
+            "status": "ok",
+            "sessions": len(service.sessions),
+            "agent": service.agent_executor is not None,
+            "graphrag": graph_agent.graph_driver is not None,
+        }
+    )
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    """GET /metrics"""
+    return web.Response(
+        text=metrics.render(), content_type="text/plain", charset="utf-8"
+    )
+
+
+@web.middleware
+async def metrics_middleware(request: web.Request, handler):
+    """Đếm request theo route và status code"""
+    route = request.match_info.route.resource
+    endpoint = route.canonical if route else "unmatched"
+    try:
+        response = await handler(request)
+    except web.HTTPException as e:
+        metrics.HTTP_REQUESTS.inc(endpoint=endpoint, status=e.status)
+        raise
+    except Exception:
+        metrics.HTTP_REQUESTS.inc(endpoint=endpoint, status=500)
+        metrics.ERRORS.inc(component="http")
+        raise
+    metrics.HTTP_REQUESTS.inc(endpoint=endpoint, status=response.status)
+    return response
+
+
+def create_app(service: ChatService = None) -> web.Application:
+    """Tạo aiohttp app; service được khởi tạo lúc startup, đóng lúc shutdown"""
+    app = web.Application(middlewares=[metrics_middleware])
+    app[SERVICE] = service or ChatService()
+
+    async def on_startup(app):
+        await asyncio.get_running_loop().run_in_executor(None, app[SERVICE].start)
+
+    async def on_cleanup(app):
+        app[SERVICE].close()
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    app.router.add_post("/chat", chat_handler)
+    app.router.add_get("/ws", websocket_handler)
+    app.router.add_get("/health", health_handler)
+    app.router.add_get("/metrics", metrics_handler)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GraphRAG Gym Agent server")
+    parser.add_argument("--host", default=os.getenv("SERVER_HOST", "127.0.0.1"))
+    parser.add_argument(
+        "--port", type=int, default=int(os.getenv("SERVER_PORT", "8080"))
+    )
+    args = parser.parse_args()
+    web.run_app(create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Trạng thái hội thoại theo từng phiên (history + profile) thay cho biến global"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from gym_agent_test.history_store import (
+    HISTORY_DIR,
+    HISTORY_LIMIT,
+    ConversationHistory,
+)
+from gym_agent_test.memory import ConversationMemory
+from gym_agent_test.profile import new_user_profile
+
+# Phiên đang xử lý trong context hiện tại (tools đọc profile từ đây)
+_current_session = ContextVar("gym_agent_session", default=None)
+
+
+class ChatSession:
+    """Lịch sử hội thoại và profile của một user"""
+
+    __slots__ = (
+        "session_id",
+        "history",
+        "summarizer",
+        "_memory",
+        "profile",
+        "last_active",
+        "lock",
+    )
+
+    def __init__(
+        self,
+        session_id: str,
+        history_limit: int = HISTORY_LIMIT,
+        summarizer=None,
+        log_dir=HISTORY_DIR,
+    ):
+        self.session_id = session_id
+        self.history = ConversationHistory(session_id, history_limit, log_dir)
+        self.summarizer = summarizer
+        self._memory = None
+        self.profile = new_user_profile()
+        self.last_active = time.monotonic()
+        # Mỗi phiên chỉ xử lý một lượt tại một thời điểm
+        self.lock = asyncio.Lock()
+
+    @property
+    def memory(self) -> ConversationMemory:
+        """Phần history gửi kèm prompt (giới hạn token), khôi phục từ log khi cần
+
+        Phát lại toàn bộ history đã khôi phục: lượt rơi khỏi cửa sổ được tóm tắt
+        như lúc đang chat, không bị mất khỏi prompt.
+        """
+        if self._memory is None:
+            self._memory = ConversationMemory(summarizer=self.summarizer)
+            for user_msg, ai_msg in self.history:
+                self._memory.add_turn(user_msg, ai_msg)
+        return self._memory
+
+    def add_turn(self, user_msg: str, ai_msg: str):
+        """Lưu một lượt hội thoại, giữ tối đa history_limit lượt gần nhất"""
+        self.history.append(user_msg, ai_msg)
+        self.memory.add_turn(user_msg, ai_msg)
+        self.last_active = time.monotonic()
+
+
+def get_current_session():
+    """Phiên đang được xử lý trong context hiện tại (None nếu không có)"""
+    return _current_session.get()
+
+
+@contextmanager
+def use_session(session: ChatSession):
+    """Gắn phiên vào context hiện tại trong suốt một lượt xử lý"""
+    token = _current_session.set(session)
+    try:
+        yield session
+    finally:
+        _current_session.reset(token)
+
+
+class SessionStore:
+    """Quản lý các phiên trong bộ nhớ, loại bỏ phiên idle hoặc cũ nhất khi đầy"""
+
+    def __init__(
+        self, max_sessions: int = 1000, idle_ttl: float = 1800, summarizer=None
+    ):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.summarizer = summarizer
+        self._sessions = OrderedDict()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, session_id: str) -> ChatSession:
+        """Lấy phiên theo id, tạo mới nếu chưa có"""
+        session = self._sessions.get(session_id)
+        if session is None:
+            self._evict()
+            session = ChatSession(session_id, summarizer=self.summarizer)
+            self._sessions[session_id] = session
+        else:
+            self._sessions.move_to_end(session_id)
+        session.last_active = time.monotonic()
+        return session
+
+    def _evict(self):
+        """Xóa phiên idle quá lâu, sau đó xóa phiên cũ nhất nếu vẫn đầy"""
+        now = time.monotonic()
+        for session_id, session in list(self._sessions.items()):
+            if session.lock.locked():
+                continue  # Phiên đang xử lý một lượt thì không xóa
+            expired = now - session.last_active > self.idle_ttl
+            if not expired and len(self._sessions) < self.max_sessions:
+                break
+            del self._sessions[session_id]
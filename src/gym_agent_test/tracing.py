@@ -0,0 +1,272 @@
+"""Tracing theo lượt hội thoại: span cho agent, tool, truy vấn Neo4j, embeddings, LLM
+
+Span lồng nhau theo ContextVar; khi span gốc (thường là một lượt) kết thúc, cả
+cây được gửi tới các exporter bật qua TRACE_EXPORTERS (phân cách bằng dấu phẩy):
+
+- console: in cây span ra stderr
+- json:    ghi mỗi lượt một dòng JSON vào TRACE_PATH
+- otel:    chuyển sang OpenTelemetry (cần opentelemetry-api, SDK/exporter cấu
+           hình theo chuẩn OTel, vd. opentelemetry-instrument)
+
+Observer (vd. metrics) nhận mọi span khi kết thúc qua add_observer(). Không có
+exporter hay observer nào thì span() gần như không tốn chi phí.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from langchain_core.callbacks import BaseCallbackHandler
+from rich.console import Console
+from rich.tree import Tree
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # opentelemetry là optional, chỉ cần khi dùng exporter "otel"
+    otel_trace = None
+
+TRACE_EXPORTERS = os.getenv("TRACE_EXPORTERS", "")
+TRACE_PATH = Path(os.getenv("TRACE_PATH", ".traces/traces.jsonl"))
+
+_current_span = ContextVar("gym_agent_span", default=None)
+
+
+class Span:
+    """Một đoạn công việc có tên, thuộc tính, thời gian và các span con"""
+
+    recording = True
+
+    def __init__(self, name: str, attributes=None, parent=None):
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.parent = parent
+        self.children = []
+        self.error = None
+        self.start_ns = time.time_ns()
+        self._start = time.perf_counter()
+        self.duration_ms = None
+        if parent is not None:
+            parent.children.append(self)
+
+    @property
+    def root(self) -> "Span":
+        span = self
+        while span.parent is not None:
+            span = span.parent
+        return span
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, key: str, value):
+        """Cộng dồn thuộc tính số (vd. token của cả lượt)"""
+        self.attributes[key] = self.attributes.get(key, 0) + value
+
+    def finish(self):
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+
+    def to_dict(self) -> dict:
+        data = {
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms or 0.0, 3),
+            "attributes": self.attributes,
+        }
+        if self.error:
+            data["error"] = self.error
+        if self.children:
+            data["children"] = [child.to_dict() for child in self.children]
+        return data
+
+
+class _NoopSpan:
+    recording = False
+
+    def set(self, **attributes):
+        pass
+
+    def add(self, key: str, value):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class ConsoleExporter:
+    def __init__(self, console=None):
+        self.console = console or Console(stderr=True)
+
+    def _branch(self, tree, span: Span):
+        attributes = " ".join(f"{k}={v}" for k, v in span.attributes.items())
+        label = f"[bold]{span.name}[/bold] {span.duration_ms:.1f} ms [dim]{attributes}[/dim]"
+        if span.error:
+            label += f" [red]{span.error}[/red]"
+        node = tree.add(label)
+        for child in span.children:
+            self._branch(node, child)
+
+    def export(self, span: Span):
+        tree = Tree("🔭 trace")
+        self._branch(tree, span)
+        self.console.print(tree)
+
+
+class JsonExporter:
+    def __init__(self, path=TRACE_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class OtelExporter:
+    """Dựng lại cây span bằng tracer OpenTelemetry với thời gian đã ghi"""
+
+    def __init__(self):
+        if otel_trace is None:
+            raise ImportError("Exporter 'otel' cần cài opentelemetry-api")
+        self.tracer = otel_trace.get_tracer("gym_agent_test")
+
+    def _emit(self, span: Span, context=None):
+        otel_span = self.tracer.start_span(
+            span.name,
+            context=context,
+            start_time=span.start_ns,
+            attributes={
+                k: v if isinstance(v, (str, bool, int, float)) else str(v)
+                for k, v in span.attributes.items()
+            },
+        )
+        if span.error:
+            otel_span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR))
+            otel_span.set_attribute("error.message", span.error)
+        child_context = otel_trace.set_span_in_context(otel_span)
+        for child in span.children:
+            self._emit(child, child_context)
+        otel_span.end(end_time=span.start_ns + int((span.duration_ms or 0) * 1e6))
+
+    def export(self, span: Span):
+        self._emit(span)
+
+
+EXPORTERS = {"console": ConsoleExporter, "json": JsonExporter, "otel": OtelExporter}
+_exporters = []
+_observers = []
+
+
+def configure(names=TRACE_EXPORTERS):
+    """Bật các exporter theo tên ("console,json" hoặc list); rỗng là tắt tracing"""
+    if isinstance(names, str):
+        names = [name.strip() for name in names.split(",") if name.strip()]
+    _exporters[:] = [EXPORTERS[name]() for name in names]
+
+
+def add_observer(observer):
+    """observer(span) được gọi cho mọi span khi kết thúc (kể cả span con)"""
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def enabled() -> bool:
+    return bool(_exporters or _observers)
+
+
+def current_span():
+    return _current_span.get() or NOOP_SPAN
+
+
+def start_span(name: str, **attributes):
+    """Mở span con của span hiện tại và đặt làm span hiện tại; kết thúc bằng end_span"""
+    if not enabled():
+        return NOOP_SPAN
+    span = Span(name, attributes, _current_span.get())
+    _current_span.set(span)
+    return span
+
+
+def end_span(span, error=None):
+    if not span.recording:
+        return
+    span.finish()
+    if error is not None:
+        span.error = f"{type(error).__name__}: {error}"
+    # set thay vì reset token: callback start/end có thể chạy ở context khác nhau
+    _current_span.set(span.parent)
+    for observer in _observers:
+        observer(span)
+    if span.parent is None:
+        for exporter in _exporters:
+            exporter.export(span)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Span cho khối with; lỗi được ghi vào span rồi raise tiếp"""
+    current = start_span(name, **attributes)
+    try:
+        yield current
+    except Exception as e:
+        end_span(current, e)
+        raise
+    end_span(current)
+
+
+class TracingCallbacks(BaseCallbackHandler):
+    """Span cho mỗi lần gọi LLM (kèm token) và mỗi tool call của agent"""
+
+    def __init__(self):
+        self._spans = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("_type", "")
+        self._spans[run_id] = start_span("llm", model=model)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        llm_span = self._spans.pop(run_id, NOOP_SPAN)
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or {}
+                for key in ("input_tokens", "output_tokens"):
+                    llm_span.add(key, usage.get(key, 0))
+                    if llm_span.recording:
+                        llm_span.root.add(f"llm.{key}", usage.get(key, 0))
+                if getattr(message, "tool_calls", None):
+                    llm_span.set(tool_calls=len(message.tool_calls))
+        end_span(llm_span)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        end_span(self._spans.pop(run_id, NOOP_SPAN), error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name", "")
+        self._spans[run_id] = start_span(f"tool.{name}", input_chars=len(input_str))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        tool_span = self._spans.pop(run_id, NOOP_SPAN)
+        tool_span.set(output_chars=len(str(output)))
+        end_span(tool_span)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        end_span(self._spans.pop(run_id, NOOP_SPAN), error)
+
+
+_callbacks = TracingCallbacks()
+
+
+def trace_config() -> dict:
+    """Config cho Runnable.invoke: gắn callback tracing khi đang bật"""
+    return {"callbacks": [_callbacks]} if enabled() else {}
+
+
+configure()
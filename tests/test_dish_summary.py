@@ -0,0 +1,85 @@
+import pytest
+
+from gym_agent_test.dish_summary import (
+    invalidate_dish_summaries,
+    refresh_dish_summaries,
+    summary_signature,
+)
+from gym_agent_test.fakes import FakeGraphDriver
+from gym_agent_test.main_RAG_Graph import find_dishes
+
+
+@pytest.fixture
+def driver():
+    driver = FakeGraphDriver()
+    refresh_dish_summaries(driver, "neo4j")
+    return driver
+
+
+def lookup(driver, keyword):
+    driver.queries.clear()
+    with driver.session() as session:
+        rows = find_dishes(session, keyword)
+    return rows, driver.queries.get("dish_by_name", 0)
+
+
+def pho_bo(driver):
+    return next(d for d in driver.graph.dishes if d["name"] == "Phở bò")
+
+
+def ingredient_names(rows):
+    row = next(row for row in rows if row.name == "Phở bò")
+    return [ing.name for ing in row.ingredients]
+
+
+def test_fresh_summary_skips_traversal(driver):
+    rows, traversals = lookup(driver, "Phở bò")
+    assert rows and traversals == 0
+    assert refresh_dish_summaries(driver, "neo4j")["updated"] == 0
+
+
+def test_signature_ignores_order_and_tracks_names():
+    ingredients = [
+        {"name": "thịt bò", "quantity": 80, "benefits": ["Tăng cơ"]},
+        {"name": "gừng", "quantity": 5, "benefits": []},
+    ]
+    signature = summary_signature("Miền Bắc", ingredients, ["Collagen", "Dễ tiêu"])
+    assert signature == summary_signature(
+        "Miền Bắc", ingredients[::-1], ["Dễ tiêu", "Collagen"]
+    )
+    renamed = [{**ingredients[0], "name": "thịt bê"}, ingredients[1]]
+    assert signature != summary_signature("Miền Bắc", renamed, ["Collagen", "Dễ tiêu"])
+    swapped = [{**ingredients[0], "benefits": ["Giàu sắt"]}, ingredients[1]]
+    assert signature != summary_signature("Miền Bắc", swapped, ["Collagen", "Dễ tiêu"])
+
+
+@pytest.mark.parametrize("change", ["add_ingredient", "quantity", "rename"])
+def test_write_path_invalidates_then_refreshes(driver, change):
+    dish = pho_bo(driver)
+    name, quantity = dish["ingredients"][0]
+    if change == "add_ingredient":
+        dish["ingredients"].append(("giá đỗ", 30))
+    elif change == "quantity":
+        dish["ingredients"][0] = (name, quantity + 50)
+    else:
+        dish["ingredients"][0] = ("bánh phở tươi", quantity)
+    invalidate_dish_summaries(driver, "neo4j", ["Phở bò"])
+
+    rows, traversals = lookup(driver, "Phở bò")
+    assert traversals == 1
+    assert ingredient_names(rows) == [n for n, _ in dish["ingredients"]]
+
+    stats = refresh_dish_summaries(driver, "neo4j", names=["Phở bò"])
+    assert stats["updated"] == 1
+    rows, traversals = lookup(driver, "Phở bò")
+    assert traversals == 0
+    assert ingredient_names(rows) == [n for n, _ in dish["ingredients"]]
+
+
+def test_refresh_detects_changed_source(driver):
+    dish = pho_bo(driver)
+    name, quantity = dish["ingredients"][0]
+    dish["ingredients"][0] = ("bánh phở tươi", quantity)
+    assert refresh_dish_summaries(driver, "neo4j")["updated"] == 1
+    rows, _ = lookup(driver, "Phở bò")
+    assert ingredient_names(rows)[0] == "bánh phở tươi"
@@ -0,0 +1,45 @@
+import pytest
+
+from gym_agent_test.fast_path import is_confident, parse_measurements, route_query
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Tính BMI cho tôi: 25 tuổi, 170cm, 65kg", (1.7, 65.0)),
+        ("tôi 25 tuổi cao 1m6 nặng 50kg, tính bmi", (1.6, 50.0)),
+        ("Tính BMI giúp tôi: 1.80m, 85kg", (1.8, 85.0)),
+        ("bmi 1m75 70 ký", (1.75, 70.0)),
+    ],
+)
+def test_parse_measurements_reads_units(text, expected):
+    assert parse_measurements(text.lower()) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["tính bmi cao 1.7 nặng 65", "bmi 170cm, 25 tuổi", "cao 1.75,70 thì sao"],
+)
+def test_no_fast_path_without_units(text):
+    assert parse_measurements(text.lower()) is None
+    assert not is_confident(route_query(text))
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Tính BMI 1.75,70", (1.75, 70.0)),
+        ("Tính BMI cho tôi 1.75,70", (1.75, 70.0)),
+        ("bmi: 1.6, 52.5", (1.6, 52.5)),
+    ],
+)
+def test_bmi_keyword_accepts_calc_bmi_pair(text, expected):
+    decision = route_query(text)
+    assert decision["intent"] == "bmi" and is_confident(decision)
+    assert (decision["slots"]["height"], decision["slots"]["weight"]) == expected
+
+
+def test_age_is_not_taken_as_weight():
+    decision = route_query("Tính BMI cho tôi: 25 tuổi, 170cm, 65kg")
+    assert is_confident(decision)
+    assert decision["slots"] == {"height": pytest.approx(1.7), "weight": 65.0}
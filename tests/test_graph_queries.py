@@ -0,0 +1,46 @@
+import pytest
+
+from gym_agent_test import query_profile
+from gym_agent_test.fakes import FakeGraphDriver
+from gym_agent_test.graph_queries import QUERIES, WRITE_QUERIES, run_query
+
+
+@pytest.fixture
+def session(monkeypatch, tmp_path):
+    monkeypatch.setattr(query_profile, "CYPHER_PROFILE", True)
+    monkeypatch.setattr(query_profile, "SLOW_QUERY_MS", None)
+    monkeypatch.setattr(query_profile, "SLOW_QUERY_LOG", tmp_path / "slow.jsonl")
+    with FakeGraphDriver().session() as session:
+        yield session
+
+
+def test_write_queries_are_in_catalog():
+    assert WRITE_QUERIES <= set(QUERIES)
+
+
+def test_profile_applies_to_reads_only(session):
+    read = run_query(session, "high_protein_dishes")
+    assert read.summary.query.startswith("PROFILE ")
+    assert read.summary.profile
+
+    write = run_query(session, "dish_name_index")
+    assert not write.summary.query.startswith("PROFILE ")
+
+
+def test_profile_alone_logs_every_profiled_query(session, tmp_path):
+    run_query(session, "low_calorie_dishes")
+    (entry,) = query_profile.load_log(tmp_path / "slow.jsonl")
+    assert entry["query"] == "low_calorie_dishes"
+    assert "db_hits" in entry
+
+
+def test_slow_query_log_is_off_without_profile(session, monkeypatch, tmp_path):
+    monkeypatch.setattr(query_profile, "CYPHER_PROFILE", False)
+    run_query(session, "low_calorie_dishes")
+    assert not (tmp_path / "slow.jsonl").exists()
+
+
+def test_explicit_threshold_wins(session, monkeypatch, tmp_path):
+    monkeypatch.setattr(query_profile, "SLOW_QUERY_MS", 10_000.0)
+    run_query(session, "low_calorie_dishes")
+    assert not (tmp_path / "slow.jsonl").exists()
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from gym_agent_test.history_store import ConversationHistory, tail_lines
+
+
+def write_log(path, count: int):
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(count):
+            record = {"ts": i, "user": f"hỏi {i}", "ai": f"đáp {i}"}
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+@pytest.mark.parametrize("block", [7, 64, 4096])
+def test_tail_lines_reads_last_lines(tmp_path, block):
+    path = tmp_path / "log.jsonl"
+    write_log(path, 50)
+    lines = tail_lines(path, 5, block=block)
+    assert [json.loads(line)["user"] for line in lines] == [
+        f"hỏi {i}" for i in range(45, 50)
+    ]
+
+
+def test_tail_lines_skips_partial_last_line(tmp_path):
+    path = tmp_path / "log.jsonl"
+    write_log(path, 3)
+    with path.open("a", encoding="utf-8") as f:
+        f.write('{"ts": 3, "user": "ghi d')
+    assert len(tail_lines(path, 10, block=8)) == 3
+
+
+def test_history_restores_tail_from_log(tmp_path):
+    write_log(tmp_path / "u1.jsonl", 100)
+    history = ConversationHistory("u1", limit=4, log_dir=tmp_path)
+    assert history.last(2) == [("hỏi 98", "đáp 98"), ("hỏi 99", "đáp 99")]
+    assert len(history) == 4
+
+
+def test_history_keeps_limit_and_appends_log(tmp_path):
+    history = ConversationHistory("u2", limit=3, log_dir=tmp_path)
+    for i in range(5):
+        history.append(f"q{i}", f"a{i}")
+    assert list(history) == [("q2", "a2"), ("q3", "a3"), ("q4", "a4")]
+    reloaded = ConversationHistory("u2", limit=10, log_dir=tmp_path)
+    assert len(reloaded) == 5
+    history.clear()
+    assert len(history) == 0
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from gym_agent_test import meal_plan
+from gym_agent_test.fakes import FakeGraph
+from gym_agent_test.meal_plan import DishCatalog, plan_day, plan_week
+
+
+@pytest.fixture
+def catalog():
+    return DishCatalog.from_records(FakeGraph().dish_catalog())
+
+
+def random_catalog(n: int, seed: int = 7) -> DishCatalog:
+    rng = np.random.default_rng(seed)
+    matrix = np.column_stack(
+        [
+            rng.uniform(30, 800, n),
+            rng.uniform(0, 50, n),
+            rng.uniform(0, 100, n),
+            rng.uniform(0, 35, n),
+        ]
+    )
+    return DishCatalog([f"Món {i}" for i in range(n)], matrix)
+
+
+@pytest.mark.parametrize("solver", ["local", "milp"])
+def test_week_days_are_filled_and_vary(catalog, solver):
+    if solver == "milp" and meal_plan.milp is None:
+        pytest.skip("scipy chưa cài")
+    plans = plan_week(catalog, 1800, solver=solver)
+    assert len(plans) == 7
+    for plan in plans:
+        assert plan["dishes"]
+        assert plan["on_target"]
+    for today, tomorrow in zip(plans, plans[1:]):
+        assert today["dishes"] != tomorrow["dishes"]
+
+
+def test_day_missing_calorie_window_is_flagged(catalog):
+    plan = plan_day(catalog, 4000, exclude=["thịt", "bò", "gà"])
+    assert not plan["on_target"]
+    assert plan["totals"]["calories"] < 4000 * (1 - meal_plan.CALORIE_TOLERANCE)
+
+
+def test_penalty_steers_away_from_dish(catalog):
+    first = plan_day(catalog, 1800)
+    penalty = np.zeros(len(catalog))
+    penalty[first["indices"]] = 1.0
+    second = plan_day(catalog, 1800, penalty=penalty)
+    assert not set(first["indices"]) & set(second["indices"])
+
+
+def test_milp_candidates_are_capped():
+    big = random_catalog(meal_plan.MILP_CANDIDATES * 4)
+    target, weights = meal_plan._targets(2200, 150)
+    allowed = np.ones(len(big), dtype=bool)
+    allowed[::2] = False
+    candidates = meal_plan._milp_candidates(
+        big.matrix, allowed, target, weights, np.zeros(len(big))
+    )
+    assert len(candidates) == meal_plan.MILP_CANDIDATES
+    assert allowed[candidates].all()
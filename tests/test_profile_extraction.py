@@ -0,0 +1,33 @@
+import pytest
+
+from gym_agent_test.profile import new_user_profile
+from gym_agent_test.profile_extraction import extract_profile_slots, update_profile
+
+
+@pytest.mark.parametrize(
+    "text, height, weight",
+    [
+        ("tôi cao 1m70 nặng 65kg", 1.7, 65.0),
+        ("cao 1m6, nặng 50 ký", 1.6, 50.0),
+        ("175cm 72 kg", 1.75, 72.0),
+        ("cao 1.68 nặng 58", 1.68, 58.0),
+        ("25 tuổi, 170cm, 65kg", 1.7, 65.0),
+    ],
+)
+def test_extract_measurements(text, height, weight):
+    slots = extract_profile_slots(text)
+    assert slots["height"] == pytest.approx(height)
+    assert slots["weight"] == pytest.approx(weight)
+
+
+def test_units_only_ignores_unitless_numbers():
+    slots = extract_profile_slots("cao 1.68 nặng 58", units_only=True)
+    assert slots["height"] is None and slots["weight"] is None
+
+
+def test_update_profile_sets_bmi_and_dedupes_goals():
+    profile = new_user_profile()
+    update_profile(profile, "tôi cao 1m70 nặng 65kg muốn tăng cơ")
+    update_profile(profile, "vẫn muốn tăng cơ")
+    assert profile["bmi"] == pytest.approx(65 / 1.7**2)
+    assert profile["goals"] == ["tăng cơ"]
@@ -0,0 +1,75 @@
+import re
+
+import pytest
+from rich.console import Console
+
+from gym_agent_test.fakes import FakeGraphDriver
+from gym_agent_test.ranking import merge_ranked, rank_dishes
+
+PROFILE = {"height": 1.7, "weight": 65.0, "goals": ["tăng cơ"]}
+
+
+def dish(name, calories, protein, carbs=40, fat=10):
+    return {
+        "name": name,
+        "calories": calories,
+        "protein": protein,
+        "carbs": carbs,
+        "fat": fat,
+    }
+
+
+def test_rank_dishes_prefers_protein_for_muscle_gain():
+    candidates = [dish("ít đạm", 500, 5), dish("nhiều đạm", 500, 45)]
+    assert rank_dishes(candidates, PROFILE, k=1)[0]["name"] == "nhiều đạm"
+
+
+def test_merge_ranked_keeps_query_order_for_ordered_groups():
+    low_cal = [dish("a", 150, 5), dish("b", 180, 40), dish("c", 220, 10)]
+    assert merge_ranked([(low_cal, True)], PROFILE, k=5) == low_cal
+
+
+def test_merge_ranked_fills_from_groups_in_order():
+    ordered = [dish("a", 150, 5), dish("b", 180, 10)]
+    by_benefit = [dish("x", 900, 5), dish("y", 600, 45)]
+    merged = merge_ranked([(ordered, True), (by_benefit, False)], PROFILE, k=3)
+    assert [d["name"] for d in merged] == ["a", "b", "y"]
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    import gym_agent_test.main_RAG_Graph as agent
+
+    monkeypatch.setattr(agent, "console", Console(quiet=True))
+    monkeypatch.setattr(agent, "ingredient_names_cache", [])
+    assert agent.initialize_rag(FakeGraphDriver())
+    yield agent
+    monkeypatch.setattr(agent, "graph_driver", None)
+
+
+def answered(agent, query):
+    """[(tên, calories, protein)] theo thứ tự trong câu trả lời"""
+    out = agent.nutrition_advisor_rag.func(query)
+    pattern = r"\*\*\d\. (.*?)\*\*\n   📊 Calories: (\d+) \| Protein: (\d+)"
+    return [(name, int(cal), int(pro)) for name, cal, pro in re.findall(pattern, out)]
+
+
+def test_calorie_target_order_is_kept(agent):
+    calories = [cal for _, cal, _ in answered(agent, "Món nào khoảng 300 cal?")]
+    distances = [abs(cal - 300) for cal in calories]
+    assert calories and distances == sorted(distances)
+
+
+def test_low_calorie_order_is_kept(agent):
+    calories = [cal for _, cal, _ in answered(agent, "món ít calories")]
+    assert calories and calories == sorted(calories)
+
+
+def test_high_protein_order_is_kept(agent):
+    protein = [pro for _, _, pro in answered(agent, "món protein cao")]
+    assert protein and protein == sorted(protein, reverse=True)
+
+
+def test_ingredient_matches_before_incidental_name_matches(agent):
+    names = [name for name, _, _ in answered(agent, "tôi có thịt gà và gừng")]
+    assert names[:4] == ["Cháo gà", "Gà luộc", "Phở gà", "Phở bò"]
@@ -0,0 +1,110 @@
+import pytest
+
+from gym_agent_test.dish_similarity import refresh_similarity
+from gym_agent_test.dish_summary import build_summary, refresh_dish_summaries
+from gym_agent_test.fakes import FakeGraphDriver
+from gym_agent_test.graph_queries import QUERIES
+from gym_agent_test.models import Benefit, Dish, IngredientUse, benefit
+from gym_agent_test.result_rows import (
+    ROW_SPECS,
+    check_columns,
+    fetch_rows,
+    map_rows,
+    return_columns,
+)
+
+# Tham số chạy thử cho từng truy vấn trong ROW_SPECS
+PARAMS = {
+    "dish_by_name": {"keyword": "phở"},
+    "dish_summary_by_name": {"keyword": "phở"},
+    "dishes_by_ingredients": {"ingredient_names": ["thịt bò"], "limit": 5},
+    "dishes_by_calories": {"target_cal": 350},
+    "dishes_by_benefit": {"search_terms": ["protein"]},
+    "high_protein_dishes": {},
+    "low_calorie_dishes": {},
+    "ingredient_macros": {"search_term": "thịt"},
+    "similar_dishes": {"dish_name": "Phở bò", "goal": None, "limit": 5},
+}
+
+
+@pytest.fixture(scope="module")
+def driver():
+    driver = FakeGraphDriver()
+    refresh_dish_summaries(driver, "neo4j")
+    refresh_similarity(driver, "neo4j", full=True)
+    return driver
+
+
+def test_cypher_columns_match_row_specs():
+    assert check_columns() == []
+
+
+def test_every_row_spec_has_sample_params():
+    assert set(PARAMS) == set(ROW_SPECS)
+
+
+def test_return_columns_skips_subquery_returns():
+    columns = return_columns(QUERIES["dish_summary_source"])
+    assert columns[:2] == ["name", "summary"]
+    assert "ingredient_benefits" not in columns
+
+
+@pytest.mark.parametrize("name", sorted(ROW_SPECS))
+def test_fake_graph_rows_fill_every_slot(driver, name):
+    spec = ROW_SPECS[name]
+    with driver.session() as session:
+        rows = fetch_rows(session, name, **PARAMS[name])
+    assert rows
+    slots = {slot for _, slot, convert in spec.columns if slot is not None}
+    for row in rows:
+        assert type(row) is spec.row_type
+        assert row.type == spec.kind
+        assert row.name
+        for slot in slots:
+            assert hasattr(row, slot)
+
+
+def test_missing_column_raises_key_error():
+    record = {"dish_name": "Phở bò", "calories": 350, "protein": 15, "carbs": 45}
+    with pytest.raises(KeyError):
+        map_rows("high_protein_dishes", [record])
+
+
+def test_summary_is_parsed_into_models():
+    text = build_summary(
+        "Miền Bắc",
+        [
+            {"name": "thịt bò", "quantity": 80, "benefits": ["Tăng cơ", None]},
+            None,
+            {"name": None, "quantity": 5, "benefits": []},
+        ],
+        ["Collagen", "Collagen", None],
+    )
+    record = {
+        "dish_name": "Phở bò",
+        "calories": 350,
+        "protein": 15,
+        "carbs": 45,
+        "fat": 12,
+        "summary": text,
+    }
+    (row,) = map_rows("dish_summary_by_name", [record])
+    assert isinstance(row, Dish)
+    assert row.cuisine == "Miền Bắc"
+    assert row.ingredients == (IngredientUse("thịt bò", 80, (benefit("Tăng cơ"),)),)
+    assert row.benefits == (Benefit("Collagen"),)
+    assert row.benefits[0] is benefit("Collagen")
+    assert row["calories"] == 350 and row.get("carbs") == 45
+
+
+def test_missing_summary_leaves_slots_empty():
+    record = {
+        "dish_name": "Phở bò",
+        "calories": 350,
+        "protein": 15,
+        "carbs": 45,
+        "fat": 12,
+        "summary": None,
+    }
+    (row,) = map_rows("dish_summary_by_name", [record])
+    assert row.ingredients is None
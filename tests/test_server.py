@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from gym_agent_test.server import ChatService, create_app
+
+
+class EchoService(ChatService):
+    """Không khởi tạo LLM/Neo4j; trả lời lại tin nhắn"""
+
+    def start(self):
+        pass
+
+    async def chat(self, session_id: str, message: str) -> dict:
+        return {"session_id": session_id, "response": message}
+
+
+def post_chat(**kwargs):
+    async def run():
+        async with TestClient(TestServer(create_app(EchoService()))) as client:
+            response = await client.post("/chat", **kwargs)
+            return response.status, await response.json()
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("body", ["[]", '"hi"', "1", "null"])
+def test_non_object_json_body_is_rejected(body):
+    status, payload = post_chat(data=body, headers={"Content-Type": "application/json"})
+    assert status == 400
+    assert "error" in payload
+
+
+def test_invalid_json_is_rejected():
+    status, _ = post_chat(data="{", headers={"Content-Type": "application/json"})
+    assert status == 400
+
+
+def test_chat_message_is_answered():
+    status, payload = post_chat(json={"session_id": "u1", "message": " xin chào "})
+    assert status == 200
+    assert payload == {"session_id": "u1", "response": "xin chào"}
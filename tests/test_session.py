@@ -0,0 +1,36 @@
+from gym_agent_test.history_store import ConversationHistory
+from gym_agent_test.memory import MAX_RECENT_TURNS
+from gym_agent_test.session import ChatSession
+
+
+def test_reload_summarizes_turns_outside_window(tmp_path):
+    history = ConversationHistory("u1", limit=30, log_dir=tmp_path)
+    for i in range(12):
+        history.append(f"hỏi {i}", f"đáp {i}")
+
+    session = ChatSession("u1", summarizer=None, log_dir=tmp_path)
+    memory = session.memory
+    memory.wait_idle()
+
+    assert [user for user, _ in memory.recent] == [
+        f"hỏi {i}" for i in range(12 - MAX_RECENT_TURNS, 12)
+    ]
+    for i in range(12 - MAX_RECENT_TURNS):
+        assert f"User hỏi: hỏi {i}" in memory.summary
+    assert memory.messages()[0][0] == "system"
+
+
+def test_reload_passes_old_turns_to_summarizer(tmp_path):
+    history = ConversationHistory("u2", limit=30, log_dir=tmp_path)
+    for i in range(8):
+        history.append(f"hỏi {i}", f"đáp {i}")
+    seen = []
+
+    def summarizer(summary, turns):
+        seen.extend(turns)
+        return f"{len(seen)} lượt cũ"
+
+    session = ChatSession("u2", summarizer=summarizer, log_dir=tmp_path)
+    session.memory.wait_idle()
+    assert [user for user, _ in seen] == [f"hỏi {i}" for i in range(3)]
+    assert session.memory.summary == "3 lượt cũ"